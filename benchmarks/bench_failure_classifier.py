@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Compare the compiled failure classifier with the original per-pattern scan.
+
+    python benchmarks/bench_failure_classifier.py [--sizes 20000,2000000,20000000]
+
+For each synthetic log size it times:
+  reference  the original classify_failure (lowercase + one re.search per pattern)
+  compiled   orchestrator.failure.classify_failure
+  file/mmap  orchestrator.failure.classify_failure_file on the same text on disk
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from orchestrator.failure import _PATTERNS, classify_failure, classify_failure_file
+
+_WORDS = (
+    "collected items passed ok running step src main py line warning info debug "
+    "writing reading file module request response retry decision special"
+).split()
+
+
+def reference_classify(text: str, rc: int | None = None):
+    hay = (text or "").lower()
+    if rc is not None and rc in (126, 127):
+        return ("agent", f"runner rc={rc}")
+    for kind, patterns in _PATTERNS:
+        for pat in patterns:
+            if re.search(pat, hay):
+                return (kind, f"matched:{pat}")
+    return ("unknown", f"runner rc={rc}")
+
+
+def synthetic_log(size: int, seed: int = 1) -> str:
+    rnd = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        line = " ".join(rnd.choice(_WORDS) for _ in range(12)) + "\n"
+        lines.append(line)
+        total += len(line)
+    return "".join(lines)
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="20000,2000000,20000000")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    print(f"{'size':>10} {'case':<10} {'reference':>11} {'compiled':>11} {'file/mmap':>11} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        base = synthetic_log(size)
+        cases = {
+            "no-match": base,
+            "agent-end": base + "codex exited with status 1\n",
+            "lint-end": base + "ruff check failed\n",
+        }
+        for name, text in cases.items():
+            expected = reference_classify(text, rc=1)
+            got = classify_failure(text, rc=1)
+            assert (got.kind, got.detail) == expected, (name, got, expected)
+
+            ref_s = _time(lambda: reference_classify(text, rc=1), args.repeat)
+            new_s = _time(lambda: classify_failure(text, rc=1), args.repeat)
+
+            with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False, encoding="utf-8") as f:
+                f.write(text)
+                path = f.name
+            try:
+                file_s = _time(lambda: classify_failure_file(path, rc=1), args.repeat)
+            finally:
+                os.unlink(path)
+
+            print(
+                f"{size:>10} {name:<10} {ref_s * 1000:>9.2f}ms {new_s * 1000:>9.2f}ms "
+                f"{file_s * 1000:>9.2f}ms {ref_s / new_s:>7.1f}x"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
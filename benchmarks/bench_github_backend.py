@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Per-call latency of the monitor's GitHub backends against a local stub API.
+
+    python benchmarks/bench_github_backend.py [--calls 50] [--latency 0.02] [--connect-latency 0.05]
+
+A stub REST server on localhost answers the PR-listing endpoint. It sleeps
+--latency per request (server time plus round trip) and --connect-latency per
+new connection (stands in for the TCP+TLS handshake). The backends compared:
+  gh    a fake `gh` executable on PATH, one process and one connection per call
+  http  orchestrator.github_api.GitHubHttpBackend: keep-alive pool plus
+        If-None-Match, so repeated calls on unchanged data are 304s
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from orchestrator import monitor
+from orchestrator.github_api import GitHubHttpBackend
+
+_FAKE_GH = textwrap.dedent(
+    """\
+    #!{python}
+    import os, sys, urllib.request
+    args = sys.argv[1:]
+    repo = args[args.index("--repo") + 1]
+    with urllib.request.urlopen(os.environ["FAKE_GH_API"] + "/repos/" + repo + "/pulls") as r:
+        sys.stdout.write(r.read().decode())
+    """
+)
+
+
+def _pulls(n: int) -> bytes:
+    return json.dumps(
+        [
+            {
+                "number": i + 1,
+                "html_url": f"https://github.com/org/repo/pull/{i + 1}",
+                "state": "open",
+                "merged_at": None,
+                "head": {"ref": f"orchestrator/t{i}", "sha": f"{i:040x}"},
+                # gh-shaped keys too, so the fake gh can print the same body.
+                "url": f"https://github.com/org/repo/pull/{i + 1}",
+                "headRefName": f"orchestrator/t{i}",
+            }
+            for i in range(n)
+        ]
+    ).encode()
+
+
+class _Stub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, body: bytes, latency: float, connect_latency: float):
+        self.body = body
+        self.etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.statuses: list = []
+        super().__init__(("127.0.0.1", 0), _Handler)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        time.sleep(self.server.connect_latency)
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        srv = self.server
+        body = b"" if self.headers.get("If-None-Match") == srv.etag else srv.body
+        status = 304 if not body else 200
+        srv.statuses.append(status)
+        self.send_response(status)
+        self.send_header("ETag", srv.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _timed(fn, calls: int) -> list:
+    out = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def _report(name: str, samples: list, statuses: list) -> None:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(
+        f"{name:<6} {statistics.mean(samples) * 1000:>9.1f}ms {statistics.median(samples) * 1000:>9.1f}ms "
+        f"{p95 * 1000:>9.1f}ms {statuses.count(200):>5} {statuses.count(304):>5}"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=50)
+    ap.add_argument("--prs", type=int, default=100, help="PRs in the listing")
+    ap.add_argument("--latency", type=float, default=0.02, help="seconds per request")
+    ap.add_argument("--connect-latency", type=float, default=0.05, help="seconds per new connection")
+    args = ap.parse_args(argv)
+
+    srv = _Stub(_pulls(args.prs), args.latency, args.connect_latency)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = "http://%s:%d" % srv.server_address
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gh = os.path.join(tmp, "gh")
+        with open(gh, "w", encoding="utf-8") as f:
+            f.write(_FAKE_GH.format(python=sys.executable))
+        os.chmod(gh, 0o755)
+        os.environ["PATH"] = tmp + os.pathsep + os.environ.get("PATH", "")
+        os.environ["FAKE_GH_API"] = base
+
+        print(f"{args.calls} calls, {args.prs} PRs, latency {args.latency * 1000:.0f}ms, connect {args.connect_latency * 1000:.0f}ms")
+        print(f"{'path':<6} {'mean':>11} {'p50':>11} {'p95':>11} {'200':>5} {'304':>5}")
+
+        cli = monitor.GhCliBackend()
+        srv.statuses.clear()
+        samples = _timed(lambda: cli.list_prs("org/repo", limit=args.prs), args.calls)
+        _report("gh", samples, srv.statuses)
+
+        http = GitHubHttpBackend("bench", base_url=base)
+        srv.statuses.clear()
+        samples = _timed(lambda: http.list_prs("org/repo", limit=args.prs), args.calls)
+        _report("http", samples, srv.statuses)
+        http.close()
+
+    srv.shutdown()
+    srv.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Sweep time of the CI monitor against fake `gh`/`git` binaries with latency.
+
+    python benchmarks/bench_monitor_sweep.py [--repos 8] [--tasks-per-repo 20] [--latency 0.2]
+
+Fake `gh` and `git` executables are put first on PATH. `gh` sleeps --latency
+seconds per call to stand in for GitHub round trips. The same DB is swept at
+several --parallelism values, and the script reports wall time and how many
+gh/git processes were spawned. The first (cold) sweep fills the per-task
+branch/slug cache; later sweeps should spawn no git processes.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import textwrap
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from orchestrator import db as dbm
+from orchestrator.monitor import monitor_sweep
+
+_FAKE_GH = textwrap.dedent(
+    """\
+    #!{python}
+    import json, os, re, sys, time
+    with open(os.environ["FAKE_CALLS"], "a") as f:
+        f.write("gh\\n")
+    time.sleep(float(os.environ.get("FAKE_GH_LATENCY", "0")))
+    args = sys.argv[1:]
+    if args[:2] == ["pr", "list"]:
+        repo = args[args.index("--repo") + 1]
+        name = repo.split("/")[1]
+        n = int(os.environ["FAKE_TASKS_PER_REPO"])
+        print(json.dumps([
+            {{"number": i + 1, "url": f"https://github.com/{{repo}}/pull/{{i + 1}}", "headRefName": f"orchestrator/{{name}}-t{{i}}"}}
+            for i in range(n)
+        ]))
+    elif args[:2] == ["api", "graphql"]:
+        q = args[3]
+        run = {{"__typename": "CheckRun", "name": "ci", "status": "COMPLETED", "conclusion": "SUCCESS", "detailsUrl": "u"}}
+        rollup = {{"commits": {{"nodes": [{{"commit": {{"statusCheckRollup": {{"contexts": {{"nodes": [run]}}}}}}}}]}}}}
+        print(json.dumps({{"data": {{"repository": {{a: rollup for a in re.findall(r"(pr\\d+):", q)}}}}}}))
+    else:
+        sys.exit("unexpected gh call: " + " ".join(args))
+    """
+)
+
+_FAKE_GIT = textwrap.dedent(
+    """\
+    #!{python}
+    import os, sys
+    with open(os.environ["FAKE_CALLS"], "a") as f:
+        f.write("git\\n")
+    args = sys.argv[1:]
+    cwd = os.getcwd()
+    if args[:2] == ["rev-parse", "--abbrev-ref"]:
+        print("orchestrator/" + os.path.basename(cwd))
+    elif args[:2] == ["remote", "get-url"]:
+        repo = os.path.basename(cwd.split("/.orchestrator/")[0])
+        print(f"git@github.com:org/{{repo}}.git")
+    else:
+        sys.exit("unexpected git call: " + " ".join(args))
+    """
+)
+
+
+def _write_exe(path: str, body: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(body.format(python=sys.executable))
+    os.chmod(path, 0o755)
+
+
+def _seed(tmp: str, repos: int, per_repo: int) -> str:
+    db_path = os.path.join(tmp, "orch.db")
+    con = dbm.connect(dbm.DbConfig(path=db_path))
+    dbm.migrate(con)
+    for r in range(repos):
+        repo = os.path.join(tmp, f"repo{r}")
+        for i in range(per_repo):
+            tid = f"repo{r}-t{i}"
+            wt = os.path.join(repo, ".orchestrator", "worktrees", tid)
+            os.makedirs(wt, exist_ok=True)
+            con.execute(
+                "INSERT INTO tasks(id, kind, plan_id, status, repo_path, worktree_path, created_at, updated_at) "
+                "VALUES(?, 'subtask', 'bench', 'succeeded', ?, ?, 0, 0)",
+                (tid, repo, wt),
+            )
+    con.close()
+    return db_path
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repos", type=int, default=8)
+    ap.add_argument("--tasks-per-repo", type=int, default=20)
+    ap.add_argument("--latency", type=float, default=0.2, help="seconds per fake gh call")
+    ap.add_argument("--parallelism", default="1,4,8")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bindir = os.path.join(tmp, "bin")
+        os.makedirs(bindir)
+        _write_exe(os.path.join(bindir, "gh"), _FAKE_GH)
+        _write_exe(os.path.join(bindir, "git"), _FAKE_GIT)
+        calls = os.path.join(tmp, "calls")
+
+        os.environ["PATH"] = bindir + os.pathsep + os.environ.get("PATH", "")
+        os.environ["FAKE_CALLS"] = calls
+        os.environ["FAKE_GH_LATENCY"] = str(args.latency)
+        os.environ["FAKE_TASKS_PER_REPO"] = str(args.tasks_per_repo)
+
+        db_path = _seed(tmp, args.repos, args.tasks_per_repo)
+        total = args.repos * args.tasks_per_repo
+        print(f"{total} tasks in {args.repos} repos, gh latency {args.latency * 1000:.0f}ms")
+        print(f"{'parallelism':>11} {'sweep':>9} {'updated':>8} {'gh':>5} {'git':>5}")
+        levels = [int(p) for p in args.parallelism.split(",")]
+        for i, par in enumerate([levels[-1]] + levels):
+            open(calls, "w").close()
+            t0 = time.perf_counter()
+            res = monitor_sweep(db_path, parallelism=par)
+            elapsed = time.perf_counter() - t0
+            with open(calls, encoding="utf-8") as f:
+                spawned = f.read().split()
+            assert not res.errors, res.errors
+            label = f"{par} (cold)" if i == 0 else str(par)
+            print(f"{label:>11} {elapsed:>8.2f}s {res.updated:>8} {spawned.count('gh'):>5} {spawned.count('git'):>5}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
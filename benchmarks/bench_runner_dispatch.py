@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Per-task dispatch overhead: `--runner` shell command vs `--runner-pool`.
+
+    python benchmarks/bench_runner_dispatch.py [--tasks 30]
+
+Every task has an unsupported routing, so run_task returns 64 as soon as it
+has looked the task up. What gets timed is therefore pure overhead: for the
+shell path that is interpreter startup, imports, connect and migrate; for the
+pool path it is a round trip to an already-initialised worker.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from orchestrator import db as dbm
+from orchestrator.daemon import _run_cmd
+from orchestrator.queue import enqueue_plan
+from orchestrator.runner_pool import RunnerPool
+
+
+def _report(name: str, samples: list) -> None:
+    print(f"{name:<8} {statistics.mean(samples) * 1000:>9.1f}ms {statistics.median(samples) * 1000:>9.1f}ms {max(samples) * 1000:>9.1f}ms")
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tasks", type=int, default=30)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "orch.db")
+        con = dbm.connect(dbm.DbConfig(path=db_path))
+        dbm.migrate(con)
+        ids = [f"t{i}" for i in range(args.tasks)]
+        enqueue_plan(con, {"planId": "bench", "subtasks": [{"id": t, "prompt": "x", "routing": "bench-noop"} for t in ids]})
+
+        print(f"{args.tasks} tasks")
+        print(f"{'path':<8} {'mean':>11} {'p50':>11} {'max':>11}")
+
+        runner = os.path.join(ROOT, "bin", "run_task.py")
+        shell = []
+        for t in ids:
+            t0 = time.perf_counter()
+            res = _run_cmd(f"{sys.executable} {runner} --db {db_path} --task-id {t}", os.path.join(tmp, f"{t}.shell.log"))
+            shell.append(time.perf_counter() - t0)
+            assert res.returncode == 64, res.output
+        _report("shell", shell)
+
+        t0 = time.perf_counter()
+        pool = RunnerPool(db_path, 1)
+        print(f"(pool start-up, once: {(time.perf_counter() - t0) * 1000:.0f}ms)")
+        pooled = []
+        try:
+            for t in ids:
+                t0 = time.perf_counter()
+                res = pool.submit(t, os.path.join(tmp, f"{t}.pool.log")).result()
+                pooled.append(time.perf_counter() - t0)
+                assert res.returncode == 64, res.output
+        finally:
+            pool.shutdown()
+        _report("pool", pooled)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,6 +5,7 @@ import argparse
 import json
 import os
 import sys
+import time
 
 # Allow running from a checkout without installation
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -12,7 +13,9 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 from orchestrator import db as dbm
+from orchestrator.notify import notify
 from orchestrator.queue import enqueue_plan
+from orchestrator.runs import duration_percentiles
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -29,6 +32,12 @@ def main(argv: list[str] | None = None) -> int:
     p_list = sub.add_parser("list")
     p_list.add_argument("--status", default=None)
 
+    sub.add_parser("wake", help="nudge a running daemon to re-scan the queue now")
+
+    p_runs = sub.add_parser("runs", help="run duration percentiles per routing")
+    p_runs.add_argument("--status", default="succeeded", help="runs with this final status (succeeded|failed|lost)")
+    p_runs.add_argument("--since-hours", type=float, default=None, help="only runs finished in the last N hours")
+
     args = ap.parse_args(argv)
 
     con = dbm.connect(dbm.DbConfig(path=args.db))
@@ -52,6 +61,20 @@ def main(argv: list[str] | None = None) -> int:
             print(f"{r['id']}\t{r['kind']}\t{r['routing'] or ''}\t{r['status']}\t{r['attempt']}/{r['max_attempts']}\t{r['updated_at']}")
         return 0
 
+    if args.cmd == "runs":
+        since = time.time() - args.since_hours * 3600 if args.since_hours else 0.0
+        print("routing\tn\tp50\tp90\tp95\tp99")
+        for r in duration_percentiles(con, status=args.status, since=since):
+            pcts = "\t".join(f"{r.percentiles[p]:.1f}" for p in (50, 90, 95, 99))
+            print(f"{r.routing or '-'}\t{r.count}\t{pcts}")
+        return 0
+
+    if args.cmd == "wake":
+        if not notify(args.db):
+            print("no daemon listening", file=sys.stderr)
+            return 1
+        return 0
+
     raise RuntimeError("unreachable")
 
 
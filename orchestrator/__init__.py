@@ -7,4 +7,10 @@ __all__ = [
   "failure",
   "worktree",
   "monitor",
+  "github_api",
+  "notify",
+  "scheduler",
+  "runner_pool",
+  "runs",
+  "webhook",
 ]
@@ -1,17 +1,38 @@
 from __future__ import annotations
 
 import argparse
+import fnmatch
 import os
+import secrets
+import selectors
 import signal
+import socket
 import subprocess
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from . import db as dbm
 from .failure import classify_failure
-from .queue import next_runnable_task, refresh_blocked_and_plans
-from .retry_policy import decide_retry
+from .limits import Limiter, LimitsConfig, load_limits
+from .notify import Waker
+from .queue import (
+    Completion,
+    TaskResult,
+    claim_tasks,
+    complete_tasks,
+    expire_leases,
+    held_leases,
+    reclaim_expired_leases,
+    refresh_blocked_and_plans,
+    renew_leases,
+)
+from .runner import group_alive
+from .runner_pool import RunnerPool, agent_pidfile, kill_lost_agent
+from .runs import RunStats, recent_durations
+from .scheduler import DurationStats, ReadyQueue
 from .worktree import cleanup_task_worktree
 
 
@@ -19,8 +40,38 @@ from .worktree import cleanup_task_worktree
 class DaemonConfig:
     db_path: str
     poll_seconds: float = 1.0
+    # Fallback re-scan interval while the wakeup socket is bound; enqueue and
+    # task completion wake the daemon directly, so this only catches changes
+    # made behind its back (e.g. manual SQL).
+    idle_poll_seconds: float = 30.0
     runner_cmd: str = "bash -lc 'echo TODO runner for {task_id}; exit 1'"
     log_dir: str = "./logs"
+    concurrency: int = 1
+    # Run the built-in runner in pre-forked worker processes instead of
+    # spawning runner_cmd per attempt (runner_cmd is then unused).
+    runner_pool: bool = False
+    # Per-attempt limits in seconds (None = unlimited). A task's own
+    # timeoutSeconds/idleTimeoutSeconds win, then the first matching
+    # route_timeouts entry (routing glob, total, idle), then these defaults.
+    timeout_seconds: Optional[float] = None
+    idle_timeout_seconds: Optional[float] = None
+    route_timeouts: Tuple[Tuple[str, Optional[float], Optional[float]], ...] = ()
+    # Claims are leases renewed every lease_seconds/3 while the daemon lives;
+    # running tasks whose lease lapses (crashed daemon) are reclaimed and go
+    # through decide_retry.
+    lease_seconds: float = 60.0
+    # "critical-path": run the ready task heading the longest remaining chain
+    # first (weighted by median run time per routing, seeded from the runs
+    # table); "fifo": oldest first.
+    schedule: str = "critical-path"
+    # Per-route/per-repo concurrency caps and start rates (--limits FILE, see
+    # orchestrator.limits); tasks behind a saturated limit wait while other
+    # ready work runs.
+    limits: Optional[LimitsConfig] = None
+    # Share claims fairly between repos, then between plans within a repo
+    # (weighted by plan "priority"), instead of one global order in which a
+    # big plan's backlog starves a small plan enqueued after it.
+    fair_share: bool = True
 
 
 def run_daemon(cfg: DaemonConfig) -> int:
@@ -29,142 +80,629 @@ def run_daemon(cfg: DaemonConfig) -> int:
 
     os.makedirs(cfg.log_dir, exist_ok=True)
 
+    waker = Waker(cfg.db_path)
+    poll = cfg.idle_poll_seconds if waker.listening else cfg.poll_seconds
+
     stop = False
 
     def _sig(_signum, _frame):
         nonlocal stop
         stop = True
+        waker.wake()
 
     signal.signal(signal.SIGINT, _sig)
     signal.signal(signal.SIGTERM, _sig)
 
-    while not stop:
-        refresh_blocked_and_plans(con)
-        task = next_runnable_task(con)
-        if not task:
-            time.sleep(cfg.poll_seconds)
+    slots = max(1, int(cfg.concurrency))
+    if cfg.runner_pool:
+        pool = RunnerPool(cfg.db_path, slots)
+
+        def _launch(run: _Inflight) -> Future:
+            return pool.submit(run.task_id, run.logfile, timeout=run.timeout, idle_timeout=run.idle_timeout)
+
+    else:
+        pool = ThreadPoolExecutor(max_workers=slots, thread_name_prefix="orch-slot")
+
+        def _launch(run: _Inflight) -> Future:
+            return pool.submit(_run_cmd, run.cmd, run.logfile, timeout=run.timeout, idle_timeout=run.idle_timeout)
+
+    inflight: Dict[Future, _Inflight] = {}
+
+    owner = _owner_id()
+    beat_every = max(0.5, cfg.lease_seconds / 3)
+    stats = None
+    if cfg.schedule == "critical-path":
+        # Start from the durations recorded by earlier runs, not from scratch.
+        stats = DurationStats()
+        for routing, seconds in recent_durations(con):
+            stats.observe(routing, seconds)
+    sched = ReadyQueue(stats=stats, fair_share=cfg.fair_share)
+    limiter = Limiter(cfg.limits) if cfg.limits else None
+
+    # Runs orphaned by an earlier daemon on this host can be taken back right
+    # away; those of other hosts once their lease runs out.
+    _expire_dead_local_owners(con)
+    _apply_completions(con, sched, reclaim_expired_leases(con))
+    sched.rebuild(con)
+    next_beat = time.monotonic() + beat_every
+    next_rescan = time.monotonic() + poll
+
+    try:
+        # On stop, no new claims are made but in-flight runs are drained and recorded.
+        while not stop or inflight:
+            finished = [f for f in inflight if f.done()]
+            if finished:
+                done = []
+                for f in finished:
+                    run = inflight.pop(f)
+                    done.append((run, _result_of(f, run)))
+                if limiter:
+                    for run, _ in done:
+                        limiter.release(run.gates)
+                _finish_runs(con, sched, done, owner=owner)
+
+            if time.monotonic() >= next_beat:
+                # Renew our own leases before looking for lapsed ones.
+                runs = list(inflight.values())
+                if renew_leases(con, owner, [run.task_id for run in runs], lease_seconds=cfg.lease_seconds) < len(runs):
+                    _stop_lost_runs(con, owner, runs)
+                _apply_completions(con, sched, reclaim_expired_leases(con))
+                next_beat = time.monotonic() + beat_every
+
+            if finished or not stop:
+                refresh_blocked_and_plans(con)
+
+            if limiter:
+                for gate in limiter.reopened():
+                    sched.unpark(gate)
+
+            if not stop and len(inflight) < slots:
+                for run in _claim_ready(con, cfg, sched, slots - len(inflight), owner=owner, limiter=limiter):
+                    fut = _launch(run)
+                    fut.add_done_callback(lambda _f: waker.wake())
+                    inflight[fut] = run
+
+            if not finished:
+                wake_at = min(next_rescan, next_beat)
+                due_at = sched.next_due_at()
+                if due_at is not None:
+                    # A backed-off retry becomes claimable (wall clock).
+                    wake_at = min(wake_at, time.monotonic() + due_at - time.time())
+                refill_at = limiter.next_refill_at() if limiter else None
+                if refill_at is not None:
+                    # A rate-limited route/repo gets a start token back.
+                    wake_at = min(wake_at, refill_at)
+                woke = waker.wait(max(0.0, wake_at - time.monotonic()))
+                if woke == "external" or (woke is None and time.monotonic() >= next_rescan):
+                    # Enqueue, ctl nudge or fallback tick: the DB may have changed
+                    # behind our back, so resync the ready queue from it.
+                    sched.rebuild(con)
+                    next_rescan = time.monotonic() + poll
+    finally:
+        pool.shutdown(wait=True)
+        waker.close()
+
+    return 0
+
+
+@dataclass(frozen=True)
+class _Inflight:
+    task_id: str
+    attempt: int
+    max_attempts: int
+    logfile: str
+    cmd: str
+    timeout: Optional[float] = None
+    idle_timeout: Optional[float] = None
+    routing: Optional[str] = None
+    started: float = 0.0           # time.monotonic() at launch
+    started_at: float = 0.0        # time.time() at launch, for the runs row
+    gates: Tuple[str, ...] = ()    # limiter gates held while the run is in flight
+
+
+def _timeouts_for(cfg: DaemonConfig, task: dict) -> Tuple[Optional[float], Optional[float]]:
+    """Effective (wall clock, idle) limits for a claimed task."""
+    total, idle = cfg.timeout_seconds, cfg.idle_timeout_seconds
+    routing = (task.get("routing") or "").strip().lower()
+    for pattern, route_total, route_idle in cfg.route_timeouts:
+        if fnmatch.fnmatchcase(routing, pattern.lower()):
+            total = route_total if route_total is not None else total
+            idle = route_idle if route_idle is not None else idle
+            break
+    if task.get("timeout_seconds") is not None:
+        total = float(task["timeout_seconds"])
+    if task.get("idle_timeout_seconds") is not None:
+        idle = float(task["idle_timeout_seconds"])
+    return total, idle
+
+
+def _owner_id() -> str:
+    """Lease owner for this daemon process: host:pid:nonce (the nonce survives pid reuse)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+
+
+def _expire_dead_local_owners(con) -> None:
+    """Expire the leases of daemons on this host whose process is gone."""
+    host = socket.gethostname()
+    rows = con.execute(
+        "SELECT DISTINCT lease_owner FROM tasks WHERE status='running' AND lease_owner IS NOT NULL"
+    ).fetchall()
+    for r in rows:
+        owner_host, _, rest = r["lease_owner"].partition(":")
+        pid_s = rest.partition(":")[0]
+        if owner_host != host or not pid_s.isdigit() or int(pid_s) == os.getpid():
             continue
+        try:
+            os.kill(int(pid_s), 0)
+        except ProcessLookupError:
+            expire_leases(con, r["lease_owner"])
+        except PermissionError:
+            pass  # alive, another user's process
 
-        task_id = task["id"]
-        attempt = int(task.get("attempt", 0))
-        max_attempts = int(task.get("max_attempts", 3))
-
-        # claim
-        with dbm.tx_immediate(con):
-            row = con.execute("SELECT status, attempt FROM tasks WHERE id=?", (task_id,)).fetchone()
-            if not row or row["status"] != "queued":
-                continue
-            now = dbm.now_ts()
-            con.execute(
-                "UPDATE tasks SET status='running', attempt=attempt+1, updated_at=? WHERE id=?",
-                (now, task_id),
-            )
-            con.execute(
-                "INSERT INTO events(task_id, ts, level, message) VALUES(?,?,?,?)",
-                (task_id, now, "info", f"claimed for run (attempt {attempt+1}/{max_attempts})"),
-            )
 
-        # run
-        logfile = os.path.join(cfg.log_dir, f"{task_id}.attempt{attempt+1}.log")
+def _claim_ready(
+    con,
+    cfg: DaemonConfig,
+    sched: ReadyQueue,
+    free: int,
+    *,
+    owner: Optional[str] = None,
+    limiter: Optional[Limiter] = None,
+) -> List[_Inflight]:
+    """Pop up to `free` ready tasks and claim them in a single transaction.
+
+    With a limiter, tasks whose route/repo limit is saturated are parked by the
+    ready queue and the next ready task is taken instead; admitted tasks hold
+    their gates until the run ends.
+    """
+    admitted: List[Tuple[str, ...]] = []
+
+    def _admit(routing: str, repo: Optional[str]) -> Optional[str]:
+        assert limiter is not None
+        gates = limiter.gates_for(routing, repo)
+        blocked = limiter.blocking(gates)
+        if blocked is None:
+            limiter.acquire(gates)
+            admitted.append(gates)
+        return blocked
+
+    candidates: List[str] = []
+    held: Dict[str, Tuple[str, ...]] = {}
+    while len(candidates) < free:
+        task_id = sched.pop(_admit if limiter else None)
+        if task_id is None:
+            break
+        candidates.append(task_id)
+        if limiter:
+            held[task_id] = admitted[-1]
+    if not candidates:
+        return []
+
+    claimed = claim_tasks(con, candidates, limit=free, owner=owner, lease_seconds=cfg.lease_seconds)
+    got = {t["id"] for t in claimed}
+    for task_id in candidates:
+        if task_id not in got:
+            sched.discard(task_id)
+            if limiter:
+                limiter.release(held[task_id], refund=True)
+
+    runs: List[_Inflight] = []
+    for task in claimed:
+        task_id = task["id"]
+        attempt = int(task["attempt"])
+        logfile = os.path.join(cfg.log_dir, f"{task_id}.attempt{attempt}.log")
         cmd = cfg.runner_cmd.format(
             task_id=task_id,
             routing=task.get("routing"),
             prompt=task.get("prompt"),
             db_path=cfg.db_path,
         )
+        timeout, idle_timeout = _timeouts_for(cfg, task)
+        runs.append(
+            _Inflight(
+                task_id=task_id,
+                attempt=attempt,
+                max_attempts=int(task["max_attempts"]),
+                logfile=logfile,
+                cmd=cmd,
+                timeout=timeout,
+                idle_timeout=idle_timeout,
+                routing=task.get("routing"),
+                started=time.monotonic(),
+                started_at=time.time(),
+                gates=held.get(task_id, ()),
+            )
+        )
+    return runs
 
-        result = _run_cmd(cmd, logfile)
-        rc = result.returncode
 
-        if rc == 0:
-            _mark_succeeded(con, task_id)
-            # Keep successful worktrees for review/commit/PR flow.
-        else:
-            cls = classify_failure(result.output, rc=rc)
-            detail = f"{cls.detail}; log={logfile}"
-            _mark_failed(con, task_id, failure_kind=cls.kind, failure_detail=detail)
-            # decide retry
-            row = con.execute("SELECT attempt, max_attempts, failure_kind, failure_detail FROM tasks WHERE id=?", (task_id,)).fetchone()
-            dec = decide_retry(
-                failure_kind=row["failure_kind"],
-                failure_detail=row["failure_detail"],
-                attempt=int(row["attempt"]),
-                max_attempts=int(row["max_attempts"]),
+def _stop_lost_runs(con, owner: str, runs: List[_Inflight]) -> None:
+    """Kill the runs whose lease was reclaimed while this daemon stalled.
+
+    The task may already be requeued; its old agent must not keep writing to
+    the worktree while a new attempt runs. The killed run's result is then
+    dropped as "lost" by complete_tasks.
+    """
+    held = held_leases(con, owner, [(run.task_id, run.attempt) for run in runs])
+    for run in runs:
+        if run.task_id not in held:
+            kill_lost_agent(run.logfile)
+
+
+def _result_of(fut: Future, run: _Inflight) -> CmdResult:
+    try:
+        return fut.result()
+    except BrokenProcessPool as e:
+        # A pool worker died and took every run in flight with it, healthy ones
+        # included. Stop the orphaned agent before the task can be re-claimed.
+        kill_lost_agent(run.logfile)
+        return CmdResult(returncode=1, output=f"runner slot lost: {e}", slot_lost=f"runner slot lost: {e}")
+    except Exception as e:
+        # The slot itself broke (e.g. log dir vanished); surface it as a runner failure.
+        return CmdResult(returncode=1, output=f"runner slot error: {e}")
+
+
+def _finish_runs(
+    con, sched: ReadyQueue, finished: List[Tuple[_Inflight, CmdResult]], *, owner: Optional[str] = None
+) -> None:
+    """Record every run that finished since the last pass in one commit."""
+    results: List[TaskResult] = []
+    now = time.monotonic()
+    for run, result in finished:
+        stats = RunStats(
+            exit_code=result.returncode,
+            started_at=run.started_at,
+            finished_at=result.finished_at or time.time(),
+            log_path=run.logfile,
+            output_bytes=result.output_bytes,
+            cpu_user=result.cpu_user,
+            cpu_sys=result.cpu_sys,
+            max_rss_kb=result.max_rss_kb,
+        )
+        if result.returncode == 0 and not result.timed_out:
+            results.append(TaskResult(task_id=run.task_id, ok=True, attempt=run.attempt, run=stats))
+            # Successful run times weight the critical-path ranking.
+            sched.observe(run.routing, now - run.started)
+            continue
+        if result.slot_lost:
+            # Nothing is known against the task itself; decide_retry retries it.
+            results.append(
+                TaskResult(
+                    task_id=run.task_id,
+                    ok=False,
+                    failure_kind="runner_lost",
+                    failure_detail=f"{result.slot_lost}; log={run.logfile}",
+                    attempt=run.attempt,
+                    run=stats,
+                )
             )
-            if dec.should_retry:
-                with dbm.tx_immediate(con):
-                    now = dbm.now_ts()
-                    con.execute(
-                        "UPDATE tasks SET status='queued', updated_at=? WHERE id=?",
-                        (now, task_id),
-                    )
-                    con.execute(
-                        "INSERT INTO events(task_id, ts, level, message) VALUES(?,?,?,?)",
-                        (task_id, now, "warn", f"retry allowed: {dec.reason}"),
-                    )
-            else:
-                with dbm.tx_immediate(con):
-                    now = dbm.now_ts()
-                    con.execute(
-                        "INSERT INTO events(task_id, ts, level, message) VALUES(?,?,?,?)",
-                        (task_id, now, "warn", f"no retry: {dec.reason}"),
-                    )
-                cleanup_task_worktree(con, task_id=task_id)
-
-        refresh_blocked_and_plans(con)
+            continue
+        if result.timed_out or result.returncode == _TIMEOUT_RC:
+            # "timeout" in the detail is what decide_retry retries on.
+            why = result.timed_out or f"timeout: runner rc={result.returncode}"
+            results.append(
+                TaskResult(
+                    task_id=run.task_id,
+                    ok=False,
+                    failure_kind="timeout",
+                    failure_detail=f"{why}; log={run.logfile}",
+                    attempt=run.attempt,
+                    run=stats,
+                )
+            )
+            continue
+        cls = classify_failure(result.output, rc=result.returncode)
+        results.append(
+            TaskResult(
+                task_id=run.task_id,
+                ok=False,
+                failure_kind=cls.kind,
+                failure_detail=f"{cls.detail}; log={run.logfile}",
+                attempt=run.attempt,
+                run=stats,
+            )
+        )
 
-    return 0
+    _apply_completions(con, sched, complete_tasks(con, results, owner=owner))
+
+
+def _apply_completions(con, sched: ReadyQueue, completions: List[Completion]) -> None:
+    for done in completions:
+        if done.status == "lost":
+            # Reclaimed while we ran it; its new state is someone else's to report.
+            sched.discard(done.task_id)
+        elif done.status == "succeeded":
+            # Keep successful worktrees for review/commit/PR flow.
+            sched.task_succeeded(done.task_id)
+        elif done.status == "queued":
+            sched.task_requeued(done.task_id, done.not_before)
+        else:
+            sched.task_failed(done.task_id)
+            cleanup_task_worktree(con, task_id=done.task_id)
 
 
 @dataclass(frozen=True)
 class CmdResult:
     returncode: int
-    output: str
+    output: str                # tail of the merged output, for classify_failure
+    output_bytes: int = 0      # total bytes written to the log
+    timed_out: Optional[str] = None   # why the run was killed, if it hit a timeout
+    slot_lost: Optional[str] = None   # the pool worker running it died (run outcome unknown)
+    finished_at: Optional[float] = None  # time.time() when the child exited
+    # Child rusage (wait4): CPU seconds and peak RSS in KiB; None if unknown.
+    cpu_user: Optional[float] = None
+    cpu_sys: Optional[float] = None
+    max_rss_kb: Optional[int] = None
 
 
-def _run_cmd(cmd: str, logfile: str) -> CmdResult:
-    p = subprocess.run(cmd, shell=True, text=True, capture_output=True)
-    merged = (p.stdout or "") + ("\n" if p.stdout and p.stderr else "") + (p.stderr or "")
-    with open(logfile, "w", encoding="utf-8") as f:
-        f.write(merged)
-    return CmdResult(returncode=p.returncode, output=merged[-20000:])
+# Enough for classify_failure; everything else only lives in the log file.
+_TAIL_BYTES = 20000
 
+# Runner exit code for a timed-out agent (as timeout(1)); see runner._TIMEOUT_RC.
+_TIMEOUT_RC = 124
 
-def _mark_succeeded(con, task_id: str) -> None:
-    with dbm.tx_immediate(con):
-        now = dbm.now_ts()
-        con.execute(
-            "UPDATE tasks SET status='succeeded', failure_kind=NULL, failure_detail=NULL, updated_at=? WHERE id=?",
-            (now, task_id),
-        )
-        con.execute(
-            "INSERT INTO events(task_id, ts, level, message) VALUES(?,?,?,?)",
-            (task_id, now, "info", "succeeded"),
-        )
+# Seconds between SIGTERM and SIGKILL for a timed-out process group.
+_KILL_GRACE_SECONDS = 5.0
 
 
-def _mark_failed(con, task_id: str, *, failure_kind: str, failure_detail: str) -> None:
-    with dbm.tx_immediate(con):
-        now = dbm.now_ts()
-        con.execute(
-            "UPDATE tasks SET status='failed', failure_kind=?, failure_detail=?, updated_at=? WHERE id=?",
-            (failure_kind, failure_detail, now, task_id),
-        )
-        con.execute(
-            "INSERT INTO events(task_id, ts, level, message) VALUES(?,?,?,?)",
-            (task_id, now, "error", f"failed: {failure_kind} ({failure_detail})"),
+def _run_cmd(
+    cmd: str,
+    logfile: str,
+    *,
+    tail_bytes: int = _TAIL_BYTES,
+    timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+) -> CmdResult:
+    """Run cmd, streaming merged stdout/stderr into logfile as it arrives.
+
+    Memory stays O(tail_bytes) however chatty the runner is, and the log can
+    be tailed while the task runs. cmd gets its own process group; with a
+    timeout (wall clock) or idle_timeout (no output) the whole group (shell,
+    runner, agent) is killed on expiry.
+    """
+    tail = _TailBuffer(tail_bytes)
+    total = 0
+    timed_out: Optional[str] = None
+    with open(logfile, "wb", buffering=0) as f:
+        p = subprocess.Popen(
+            cmd,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
         )
+        assert p.stdout is not None
+        # Like runner-pool workers, name the run's process group for
+        # kill_lost_agent (lost lease).
+        pidfile = agent_pidfile(logfile)
+        with open(pidfile, "w", encoding="utf-8") as pf:
+            pf.write(str(p.pid))
+        started = last_output = time.monotonic()
+
+        def _expiry() -> Optional[Tuple[float, str]]:
+            deadlines = [(started + timeout, f"timeout: exceeded {timeout:g}s wall clock")] if timeout else []
+            if idle_timeout:
+                deadlines.append((last_output + idle_timeout, f"timeout: no output for {idle_timeout:g}s"))
+            return min(deadlines) if deadlines else None
+
+        def _log(chunk: bytes) -> None:
+            nonlocal total
+            f.write(chunk)
+            tail.add(chunk)
+            total += len(chunk)
+
+        reaped = None
+        with p.stdout, selectors.DefaultSelector() as sel:
+            sel.register(p.stdout, selectors.EVENT_READ)
+            while True:
+                wait = None
+                expiry = _expiry()
+                if expiry:
+                    wait = expiry[0] - time.monotonic()
+                    if wait <= 0:
+                        timed_out = expiry[1]
+                        break
+                if not sel.select(wait):
+                    continue
+                chunk = p.stdout.read1(65536)
+                if not chunk:
+                    break
+                last_output = time.monotonic()
+                _log(chunk)
+            expiry = _expiry()
+            if not timed_out and expiry:
+                # EOF only means the pipe closed: a child that redirected its
+                # output can still hang, so the deadlines hold until it exits.
+                reaped = _wait_with_rusage(p, deadline=expiry[0])
+                if reaped is None:
+                    timed_out = expiry[1]
+            if timed_out:
+                # The pipe stays open meanwhile, so a group logging its way
+                # out is not killed by SIGPIPE during the grace period.
+                reaped = _kill_group(p)
+                drained = 0
+                while drained < tail_bytes and sel.select(0):
+                    chunk = p.stdout.read1(65536)
+                    if not chunk:
+                        break
+                    drained += len(chunk)
+                    _log(chunk)
+                _log(f"\n[orchestrator] {timed_out}; killed process group\n".encode())
+        rc, usage = reaped or _wait_with_rusage(p)
+        if os.path.exists(pidfile):
+            os.remove(pidfile)
+    return CmdResult(
+        returncode=rc,
+        output=tail.text(),
+        output_bytes=total,
+        timed_out=timed_out,
+        finished_at=time.time(),
+        cpu_user=usage.ru_utime if usage else None,
+        cpu_sys=usage.ru_stime if usage else None,
+        max_rss_kb=usage.ru_maxrss if usage else None,
+    )
+
+
+def _wait_with_rusage(p: subprocess.Popen, deadline: Optional[float] = None):
+    """Reap p with wait4 to get its rusage (which includes the descendants it
+    reaped): (returncode, rusage), or (returncode, None) if p was already reaped.
+
+    With a deadline (time.monotonic()), returns None if p is still running then.
+    """
+    if p.returncode is not None:
+        return p.returncode, None
+    while True:
+        pid, status, usage = os.wait4(p.pid, 0 if deadline is None else os.WNOHANG)
+        if pid:
+            p.returncode = os.waitstatus_to_exitcode(status)
+            return p.returncode, usage
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return None
+        time.sleep(min(0.05, left))
+
+
+def _kill_group(p: subprocess.Popen):
+    """SIGTERM p's process group, then SIGKILL whatever is left after the grace
+    period. The grace period is for the whole group (runner, agent), not just
+    the shell leading it. Reaps p like _wait_with_rusage, so killed runs keep
+    their rusage."""
+    try:
+        os.killpg(p.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return _wait_with_rusage(p)
+    deadline = time.monotonic() + _KILL_GRACE_SECONDS
+    reaped = None
+    while True:
+        if reaped is None:
+            reaped = _wait_with_rusage(p, deadline=0.0)
+        if reaped is not None and not group_alive(p.pid):
+            return reaped
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(0.05)
+    try:
+        os.killpg(p.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    return reaped or _wait_with_rusage(p)
+
+
+class _TailBuffer:
+    """Keeps the last `limit` bytes of a stream (amortised O(1) per byte)."""
+
+    __slots__ = ("limit", "_buf")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._buf = bytearray()
+
+    def add(self, chunk: bytes) -> None:
+        self._buf += chunk
+        if len(self._buf) > 2 * self.limit:
+            del self._buf[: len(self._buf) - self.limit]
+
+    def text(self) -> str:
+        return bytes(self._buf[-self.limit:]).decode("utf-8", errors="replace")
+
+
+def _parse_route_timeout(value: str) -> Tuple[str, Optional[float], Optional[float]]:
+    """'codex*=3600:600' -> ('codex*', 3600.0, 600.0); either number may be empty."""
+    pattern, sep, limits = value.partition("=")
+    total_s, _, idle_s = limits.partition(":")
+    try:
+        total = float(total_s) if total_s.strip() else None
+        idle = float(idle_s) if idle_s.strip() else None
+    except ValueError:
+        total = idle = -1.0
+    if not sep or not pattern.strip() or (total is None and idle is None) or any(v is not None and v <= 0 for v in (total, idle)):
+        raise ValueError(f"--route-timeout expects GLOB=TOTAL[:IDLE] with positive seconds, got {value!r}")
+    return pattern.strip(), total, idle
 
 
 def main(argv: Optional[list[str]] = None) -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--db", required=True, help="sqlite db path")
-    ap.add_argument("--poll", type=float, default=1.0)
-    ap.add_argument("--runner", required=True, help="runner command template; supports {task_id} {routing} {prompt} {db_path}")
+    ap.add_argument("--poll", type=float, default=1.0, help="poll interval when the wakeup socket is unavailable")
+    ap.add_argument("--idle-poll", type=float, default=30.0, help="fallback re-scan interval while the wakeup socket is bound")
+    ap.add_argument("--runner", default=None, help="runner command template; supports {task_id} {routing} {prompt} {db_path}")
+    ap.add_argument(
+        "--runner-pool",
+        action="store_true",
+        help="run the built-in runner (orchestrator.runner) in pre-forked worker processes instead of --runner",
+    )
     ap.add_argument("--logs", default="./logs")
+    ap.add_argument("--concurrency", type=int, default=1, help="max runner processes in flight")
+    ap.add_argument("--timeout", type=float, default=None, help="default wall-clock limit per attempt, seconds")
+    ap.add_argument("--idle-timeout", type=float, default=None, help="default limit on time without output, seconds")
+    ap.add_argument(
+        "--route-timeout",
+        action="append",
+        default=[],
+        metavar="GLOB=TOTAL[:IDLE]",
+        help="limits for routings matching GLOB, e.g. 'codex*=3600:600' or 'triage=300' (repeatable, first match wins)",
+    )
+    ap.add_argument(
+        "--lease",
+        type=float,
+        default=60.0,
+        help="claim lease in seconds, renewed every third of it; a crashed daemon's tasks are reclaimed after this",
+    )
+    ap.add_argument(
+        "--schedule",
+        choices=("critical-path", "fifo"),
+        default="critical-path",
+        help="order of ready tasks: longest remaining dependency chain first (default) or oldest first",
+    )
+    ap.add_argument(
+        "--limits",
+        default=None,
+        metavar="FILE",
+        help="JSON with per-route/per-repo maxConcurrent and ratePerMinute/burst limits (see orchestrator/limits.py)",
+    )
+    ap.add_argument(
+        "--no-fair-share",
+        dest="fair_share",
+        action="store_false",
+        help="one global ready order instead of round-robin across repos and plans (weighted by plan priority)",
+    )
     args = ap.parse_args(argv)
+    if args.concurrency < 1:
+        ap.error("--concurrency must be >= 1")
+    if args.lease <= 0:
+        ap.error("--lease must be > 0")
+    for flag, value in (("--timeout", args.timeout), ("--idle-timeout", args.idle_timeout)):
+        if value is not None and value <= 0:
+            ap.error(f"{flag} must be > 0")
+    if bool(args.runner) == args.runner_pool:
+        ap.error("exactly one of --runner and --runner-pool is required")
+    try:
+        route_timeouts = tuple(_parse_route_timeout(v) for v in args.route_timeout)
+    except ValueError as e:
+        ap.error(str(e))
+    limits = None
+    if args.limits:
+        try:
+            limits = load_limits(args.limits)
+        except (OSError, ValueError) as e:
+            ap.error(f"--limits: {e}")
 
-    cfg = DaemonConfig(db_path=args.db, poll_seconds=args.poll, runner_cmd=args.runner, log_dir=args.logs)
+    cfg = DaemonConfig(
+        db_path=args.db,
+        poll_seconds=args.poll,
+        idle_poll_seconds=args.idle_poll,
+        runner_cmd=args.runner or DaemonConfig.runner_cmd,
+        log_dir=args.logs,
+        concurrency=args.concurrency,
+        runner_pool=args.runner_pool,
+        timeout_seconds=args.timeout,
+        idle_timeout_seconds=args.idle_timeout,
+        route_timeouts=route_timeouts,
+        lease_seconds=args.lease,
+        schedule=args.schedule,
+        limits=limits,
+        fair_share=args.fair_share,
+    )
     return run_daemon(cfg)
 
 
@@ -6,7 +6,7 @@ import time
 from contextlib import contextmanager
 from dataclasses import dataclass
 
-SCHEMA_VERSION = 3
+SCHEMA_VERSION = 14
 
 
 @dataclass(frozen=True)
@@ -54,6 +54,50 @@ def migrate(con: sqlite3.Connection) -> None:
         _migrate_2_to_3(con)
         current = 3
 
+    if current == 3:
+        _migrate_3_to_4(con)
+        current = 4
+
+    if current == 4:
+        _migrate_4_to_5(con)
+        current = 5
+
+    if current == 5:
+        _migrate_5_to_6(con)
+        current = 6
+
+    if current == 6:
+        _migrate_6_to_7(con)
+        current = 7
+
+    if current == 7:
+        _migrate_7_to_8(con)
+        current = 8
+
+    if current == 8:
+        _migrate_8_to_9(con)
+        current = 9
+
+    if current == 9:
+        _migrate_9_to_10(con)
+        current = 10
+
+    if current == 10:
+        _migrate_10_to_11(con)
+        current = 11
+
+    if current == 11:
+        _migrate_11_to_12(con)
+        current = 12
+
+    if current == 12:
+        _migrate_12_to_13(con)
+        current = 13
+
+    if current == 13:
+        _migrate_13_to_14(con)
+        current = 14
+
     con.execute(
         "INSERT OR REPLACE INTO meta(key,value) VALUES('schema_version', ?)",
         (str(current),),
@@ -144,6 +188,172 @@ def _migrate_2_to_3(con: sqlite3.Connection) -> None:
         con.execute("ALTER TABLE tasks ADD COLUMN ci_url TEXT")
 
 
+def _migrate_3_to_4(con: sqlite3.Connection) -> None:
+    # Plans whose subtasks changed since the last reconciliation pass. Triggers
+    # keep it current for every writer (daemon, runner, ctl, manual SQL).
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS dirty_plans (
+          plan_id TEXT PRIMARY KEY
+        ) WITHOUT ROWID;
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_dirty_plan_insert
+        AFTER INSERT ON tasks
+        WHEN NEW.kind='subtask' AND NEW.plan_id IS NOT NULL
+        BEGIN
+          INSERT OR IGNORE INTO dirty_plans(plan_id) VALUES(NEW.plan_id);
+        END;
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_dirty_plan_status
+        AFTER UPDATE OF status ON tasks
+        WHEN NEW.kind='subtask' AND NEW.plan_id IS NOT NULL AND NEW.status IS NOT OLD.status
+        BEGIN
+          INSERT OR IGNORE INTO dirty_plans(plan_id) VALUES(NEW.plan_id);
+        END;
+        """
+    )
+
+    # Existing plans have never been reconciled under this scheme.
+    con.execute("INSERT OR IGNORE INTO dirty_plans(plan_id) SELECT id FROM tasks WHERE kind='plan'")
+
+
+def _migrate_4_to_5(con: sqlite3.Connection) -> None:
+    cols = {r["name"] for r in con.execute("PRAGMA table_info(tasks)").fetchall()}
+    if "blocked_by" not in cols:
+        # Root failed/canceled task that caused a dependency_failed block.
+        con.execute("ALTER TABLE tasks ADD COLUMN blocked_by TEXT")
+
+
+def _migrate_5_to_6(con: sqlite3.Connection) -> None:
+    # Indexes for the scheduler hot path; tests/test_query_plans.py pins the
+    # resulting query plans.
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tasks_kind_status_created ON tasks(kind, status, created_at)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tasks_plan_kind_status ON tasks(plan_id, kind, status)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_deps_depends_on ON deps(depends_on, task_id)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_events_task_ts ON events(task_id, ts)")
+
+
+def _migrate_6_to_7(con: sqlite3.Connection) -> None:
+    cols = {r["name"] for r in con.execute("PRAGMA table_info(tasks)").fetchall()}
+    if "pr_state" not in cols:
+        con.execute("ALTER TABLE tasks ADD COLUMN pr_state TEXT")           # OPEN|MERGED|CLOSED
+    if "ci_next_check_at" not in cols:
+        con.execute("ALTER TABLE tasks ADD COLUMN ci_next_check_at INTEGER")  # NULL = due now
+    con.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_ci_next_check ON tasks(ci_next_check_at) WHERE worktree_path IS NOT NULL"
+    )
+
+
+def _migrate_7_to_8(con: sqlite3.Connection) -> None:
+    # Latest state of each check on a PR's head commit, as delivered by
+    # webhooks (orchestrator.webhook); folded into tasks.ci_* on every event.
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ci_checks (
+          repo TEXT NOT NULL,                 -- owner/name
+          pr_number INTEGER NOT NULL,
+          name TEXT NOT NULL,
+          head_sha TEXT,
+          state TEXT NOT NULL,                -- gh pr checks style (SUCCESS, FAILURE, IN_PROGRESS...)
+          link TEXT,
+          updated_at INTEGER NOT NULL,
+          PRIMARY KEY (repo, pr_number, name)
+        ) WITHOUT ROWID;
+        """
+    )
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tasks_worktree_branch ON tasks(worktree_branch)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tasks_pr_number ON tasks(pr_number)")
+
+
+def _migrate_8_to_9(con: sqlite3.Connection) -> None:
+    cols = {r["name"] for r in con.execute("PRAGMA table_info(tasks)").fetchall()}
+    if "repo_slug" not in cols:
+        # GitHub owner/name of the worktree's origin; set with worktree_branch
+        # when the worktree is created, cleared with it.
+        con.execute("ALTER TABLE tasks ADD COLUMN repo_slug TEXT")
+
+
+def _migrate_9_to_10(con: sqlite3.Connection) -> None:
+    cols = {r["name"] for r in con.execute("PRAGMA table_info(tasks)").fetchall()}
+    if "timeout_seconds" not in cols:
+        con.execute("ALTER TABLE tasks ADD COLUMN timeout_seconds REAL")        # wall clock per attempt
+    if "idle_timeout_seconds" not in cols:
+        con.execute("ALTER TABLE tasks ADD COLUMN idle_timeout_seconds REAL")   # max time without output
+
+
+def _migrate_10_to_11(con: sqlite3.Connection) -> None:
+    cols = {r["name"] for r in con.execute("PRAGMA table_info(tasks)").fetchall()}
+    if "lease_owner" not in cols:
+        con.execute("ALTER TABLE tasks ADD COLUMN lease_owner TEXT")            # daemon holding a running task
+    if "lease_expires_at" not in cols:
+        con.execute("ALTER TABLE tasks ADD COLUMN lease_expires_at INTEGER")    # renewed by heartbeats
+    con.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_lease_expiry ON tasks(lease_expires_at) WHERE status='running'"
+    )
+    # Rows left 'running' by a pre-lease daemon have no owner to heartbeat
+    # them: expire them now so the next daemon reclaims them.
+    con.execute("UPDATE tasks SET lease_expires_at=0 WHERE status='running' AND lease_expires_at IS NULL")
+
+
+def _migrate_11_to_12(con: sqlite3.Connection) -> None:
+    cols = {r["name"] for r in con.execute("PRAGMA table_info(tasks)").fetchall()}
+    if "not_before" not in cols:
+        con.execute("ALTER TABLE tasks ADD COLUMN not_before INTEGER")          # retry backoff; NULL = now
+    # Carry not_before in the scheduler index so backed-off rows are skipped
+    # on the index entry, without reading the task row.
+    con.execute("DROP INDEX IF EXISTS idx_tasks_kind_status_created")
+    con.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_kind_status_created ON tasks(kind, status, created_at, not_before)"
+    )
+
+
+def _migrate_12_to_13(con: sqlite3.Connection) -> None:
+    # One row per attempt; see orchestrator/runs.py. Times are wall-clock
+    # seconds (REAL).
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS runs (
+          id INTEGER PRIMARY KEY,
+          task_id TEXT NOT NULL,
+          attempt INTEGER NOT NULL,
+          routing TEXT,
+          owner TEXT,                         -- lease owner that claimed it
+          status TEXT NOT NULL,               -- running|succeeded|failed|lost
+          failure_kind TEXT,
+          exit_code INTEGER,
+          queued_at REAL,
+          claimed_at REAL,
+          started_at REAL,
+          finished_at REAL,
+          duration_s REAL,                    -- finished_at - started_at
+          log_path TEXT,
+          output_bytes INTEGER,
+          cpu_user REAL,
+          cpu_sys REAL,
+          max_rss_kb INTEGER,
+          UNIQUE(task_id, attempt)
+        );
+        """
+    )
+    # Covers the per-routing duration rollups (runs._ROLLUP_SQL).
+    con.execute(
+        "CREATE INDEX IF NOT EXISTS idx_runs_rollup ON runs(status, routing, duration_s, finished_at)"
+    )
+
+
+def _migrate_13_to_14(con: sqlite3.Connection) -> None:
+    cols = {r["name"] for r in con.execute("PRAGMA table_info(tasks)").fetchall()}
+    if "priority" not in cols:
+        # Plan's fair-share weight, copied onto its subtasks (plan "priority").
+        con.execute("ALTER TABLE tasks ADD COLUMN priority INTEGER NOT NULL DEFAULT 1")
+
+
 @contextmanager
 def tx_immediate(con: sqlite3.Connection):
     """Acquire a write lock early; safe for worker claim."""
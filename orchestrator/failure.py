@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import mmap
+import os
 import re
 from dataclasses import dataclass
 
@@ -47,6 +49,19 @@ _PATTERNS = (
             r"\bfailed to build\b",
         ],
     ),
+    (
+        # Provider/API throttling: not the task's fault, retried after a long
+        # backoff. Only in HTTP/provider error context and after the specific
+        # kinds, so a test or build failure that mentions rate limits keeps its kind.
+        "rate_limit",
+        [
+            r"\b429 too many requests\b",
+            r"\b(?:http|status) 429\b",
+            r"\brate_limit_exceeded\b",
+            r"\berror:.*\brate limit(?:ed)?\b",
+            r"\byou've hit your usage limit\b",
+        ],
+    ),
     (
         "ci",
         [
@@ -76,16 +91,81 @@ _PATTERNS = (
 )
 
 
-def classify_failure(text: str, *, rc: int | None = None) -> FailureClassification:
-    hay = (text or "").lower()
-    if rc is not None and rc in (126, 127):
-        return FailureClassification(kind="agent", detail=f"runner rc={rc}")
+def _required_literals(pat: str) -> tuple:
+    """Substrings any match of pat must contain; () when unsure.
+
+    Understands the constructs used in _PATTERNS: \\b, optional groups
+    "(?:...)?" and ".*". Anything else disables the pre-filter for that pattern.
+    """
+    s = re.sub(r"\(\?:[^()]*\)\?", "\0", pat).replace(r"\b", "").replace(".*", "\0")
+    parts = tuple(p for p in s.split("\0") if p)
+    if any(re.search(r"[\\.^$*+?{}\[\]|()]", p) for p in parts):
+        return ()
+    return parts
+
+
+# Flattened in priority order (kind order, then pattern order), compiled once.
+# Each entry carries its required literals: a cheap substring pre-filter that
+# rules out almost every pattern before the regex engine runs.
+_TABLE = tuple(
+    (kind, pat, re.compile(pat), _required_literals(pat))
+    for kind, patterns in _PATTERNS
+    for pat in patterns
+)
+
+_CHUNK_BYTES = 8 << 20
+
 
-    for kind, patterns in _PATTERNS:
-        for pat in patterns:
-            if re.search(pat, hay):
-                return FailureClassification(kind=kind, detail=f"matched:{pat}")
+def _first_match(hay: str, limit: int) -> int | None:
+    """Index of the highest-priority pattern (below limit) matching hay."""
+    for i in range(limit):
+        _, _, rx, lits = _TABLE[i]
+        if all(lit in hay for lit in lits) and rx.search(hay):
+            return i
+    return None
 
+
+def _classification(best: int | None, rc: int | None) -> FailureClassification:
+    if best is not None:
+        kind, pat, _, _ = _TABLE[best]
+        return FailureClassification(kind=kind, detail=f"matched:{pat}")
     if rc is not None:
         return FailureClassification(kind="unknown", detail=f"runner rc={rc}")
     return FailureClassification(kind="unknown", detail="no failure signal matched")
+
+
+def classify_failure(text: str, *, rc: int | None = None) -> FailureClassification:
+    if rc is not None and rc in (126, 127):
+        return FailureClassification(kind="agent", detail=f"runner rc={rc}")
+    return _classification(_first_match((text or "").lower(), len(_TABLE)), rc)
+
+
+def classify_failure_file(path: str, *, rc: int | None = None, chunk_bytes: int = _CHUNK_BYTES) -> FailureClassification:
+    """classify_failure over a whole log file without loading it into memory.
+
+    The file is memory-mapped and scanned in newline-aligned chunks. No
+    pattern spans a line, so the result equals classify_failure on the full
+    text. Each chunk only looks for patterns that beat the best match so far.
+    """
+    if rc is not None and rc in (126, 127):
+        return FailureClassification(kind="agent", detail=f"runner rc={rc}")
+
+    best: int | None = None
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return _classification(None, rc)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size and best != 0:
+                end = min(start + chunk_bytes, size)
+                if end < size:
+                    nl = mm.rfind(b"\n", start, end)
+                    if nl > start:
+                        end = nl + 1
+                hay = mm[start:end].decode("utf-8", errors="replace").lower()
+                found = _first_match(hay, len(_TABLE) if best is None else best)
+                if found is not None:
+                    best = found
+                start = end
+    return _classification(best, rc)
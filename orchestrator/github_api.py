@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import http.client
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from .monitor import GhRateLimited, GitHubUnavailable, check_run_state, with_backoff
+
+# Pooled GitHub REST client for the monitor (`--backend http`).
+#
+# All calls share a few keep-alive connections instead of paying a gh process
+# start and a TLS handshake each. GETs are conditional: the last ETag per URL
+# is replayed as If-None-Match, and a 304 (which GitHub does not count against
+# the rate limit) returns the cached body. Network, auth and 5xx errors raise
+# GitHubUnavailable so the monitor can fall back to gh for that call.
+
+
+class _ConnectionPool:
+    def __init__(self, base_url: str, *, max_idle: int = 8, timeout: float = 30.0):
+        u = urlsplit(base_url)
+        self._cls = http.client.HTTPSConnection if u.scheme == "https" else http.client.HTTPConnection
+        self._host = u.hostname or ""
+        self._port = u.port
+        self.prefix = u.path.rstrip("/")
+        self._timeout = timeout
+        self._max_idle = max_idle
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def request(self, method: str, path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        for attempt in (0, 1):
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, self.prefix + path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (ConnectionResetError, BrokenPipeError, http.client.HTTPException):
+                conn.close()
+                if reused and attempt == 0:
+                    continue  # the server dropped an idle keep-alive connection
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return resp.status, {k.lower(): v for k, v in resp.getheaders()}, body
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+            self.opened += 1
+        return self._cls(self._host, self._port, timeout=self._timeout), False
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+
+class _EtagCache:
+    """URL -> (ETag, decoded body), least recently used evicted first."""
+
+    def __init__(self, max_entries: int = 4096):
+        self._max = max_entries
+        self._data: "OrderedDict[str, Tuple[str, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Tuple[str, object]]:
+        with self._lock:
+            hit = self._data.get(url)
+            if hit is not None:
+                self._data.move_to_end(url)
+            return hit
+
+    def put(self, url: str, etag: str, payload: object) -> None:
+        with self._lock:
+            self._data[url] = (etag, payload)
+            self._data.move_to_end(url)
+            while len(self._data) > self._max:
+                self._data.popitem(last=False)
+
+
+class GitHubHttpBackend:
+    """monitor backend over the GitHub REST API (see monitor.GhCliBackend)."""
+
+    name = "http"
+
+    def __init__(
+        self,
+        token: str,
+        *,
+        base_url: str = "https://api.github.com",
+        max_connections: int = 8,
+        timeout: float = 30.0,
+    ):
+        self._pool = _ConnectionPool(base_url, max_idle=max_connections, timeout=timeout)
+        self._etags = _EtagCache()
+        # (repo, PR) -> head SHA from the latest listing, so checks need no PR lookup.
+        self._heads: Dict[Tuple[str, int], str] = {}
+        self._headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": "orchestrator-monitor",
+        }
+        self.requests = 0
+        self.not_modified = 0
+
+    @property
+    def connections_opened(self) -> int:
+        return self._pool.opened
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def list_prs(self, repo_slug: str, *, limit: int, head: Optional[str] = None) -> List[dict]:
+        per_page = max(1, min(limit, 100))
+        params = {"state": "all", "sort": "created", "direction": "desc", "per_page": per_page}
+        if head:
+            params["head"] = f"{repo_slug.split('/', 1)[0]}:{head}"
+        items: List[dict] = []
+        page = 1
+        while len(items) < limit:
+            batch = self.get_json(f"/repos/{repo_slug}/pulls", {**params, "page": page}) or []
+            items.extend(batch)
+            if len(batch) < per_page:
+                break
+            page += 1
+
+        out = []
+        for pr in items[:limit]:
+            ref = pr.get("head") or {}
+            if ref.get("sha"):
+                self._heads[(repo_slug, int(pr["number"]))] = ref["sha"]
+            out.append(
+                {
+                    "number": pr["number"],
+                    "url": pr.get("html_url"),
+                    "headRefName": ref.get("ref"),
+                    "state": "MERGED" if pr.get("merged_at") else str(pr.get("state") or "").upper(),
+                    "createdAt": pr.get("created_at"),
+                }
+            )
+        return out
+
+    def pr_checks(self, repo_slug: str, pr_number: int) -> List[dict]:
+        sha = self._heads.get((repo_slug, pr_number))
+        if sha is None:
+            pr = self.get_json(f"/repos/{repo_slug}/pulls/{int(pr_number)}") or {}
+            sha = (pr.get("head") or {}).get("sha")
+            if not sha:
+                return []
+            self._heads[(repo_slug, pr_number)] = sha
+
+        runs = self.get_json(f"/repos/{repo_slug}/commits/{sha}/check-runs", {"per_page": 100}) or {}
+        status = self.get_json(f"/repos/{repo_slug}/commits/{sha}/status", {"per_page": 100}) or {}
+        items = [
+            {
+                "name": r.get("name"),
+                "state": check_run_state(r.get("status"), r.get("conclusion")),
+                "link": r.get("details_url") or r.get("html_url"),
+            }
+            for r in runs.get("check_runs") or []
+        ]
+        items += [
+            {"name": s.get("context"), "state": str(s.get("state") or "").upper(), "link": s.get("target_url")}
+            for s in status.get("statuses") or []
+        ]
+        return items
+
+    def pr_checks_many(self, repo_slug: str, pr_numbers: List[int]) -> Dict[int, List[dict]]:
+        return {n: self.pr_checks(repo_slug, n) for n in pr_numbers}
+
+    def get_json(self, path: str, params: Optional[dict] = None):
+        url = path + ("?" + urlencode(params) if params else "")
+        return with_backoff(self._get_once, url)
+
+    def _get_once(self, url: str):
+        headers = dict(self._headers)
+        cached = self._etags.get(url)
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+        self.requests += 1
+        try:
+            status, resp_headers, body = self._pool.request("GET", url, headers)
+        except (OSError, http.client.HTTPException) as e:
+            raise GitHubUnavailable(f"GitHub API unreachable: {e}") from e
+
+        if status == 304 and cached is not None:
+            self.not_modified += 1
+            return cached[1]
+        if status == 200:
+            payload = json.loads(body) if body else None
+            if resp_headers.get("etag"):
+                self._etags.put(url, resp_headers["etag"], payload)
+            return payload
+
+        msg = f"HTTP {status}: {_error_message(body)}"
+        if status == 429 or (
+            status == 403 and (resp_headers.get("x-ratelimit-remaining") == "0" or "rate limit" in msg.lower())
+        ):
+            raise GhRateLimited(msg)
+        if status == 401 or status >= 500:
+            raise GitHubUnavailable(msg)
+        raise RuntimeError(msg)
+
+
+def _error_message(body: bytes) -> str:
+    try:
+        return str(json.loads(body).get("message") or "").strip() or "request failed"
+    except (ValueError, AttributeError):
+        return body.decode("utf-8", "replace").strip()[:200] or "request failed"
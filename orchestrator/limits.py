@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import fnmatch
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Per-route and per-repo admission limits for the daemon (--limits FILE):
+#
+#   {
+#     "routes": {"codex*": {"maxConcurrent": 2, "ratePerMinute": 6, "burst": 2},
+#                "triage*": {"maxConcurrent": 8}},
+#     "repos":  {"org/big": {"maxConcurrent": 3},
+#                "*": {"maxConcurrent": 1}}
+#   }
+#
+# Rules match case-insensitively as globs, first match wins (file order). A
+# route rule is one shared budget for every routing it matches (one codex
+# quota for codex-backend and codex-frontend); a repo rule applies to each
+# repo it matches separately. maxConcurrent caps runs in flight;
+# ratePerMinute/burst is a token bucket on run starts.
+#
+# The daemon's ready queue parks a task whose gate is saturated and takes the
+# next ready one; parked tasks return to the queue once their gate reopens.
+
+
+@dataclass(frozen=True)
+class Limit:
+    max_concurrent: Optional[int] = None
+    rate_per_minute: Optional[float] = None
+    burst: Optional[int] = None           # token bucket size (default 1)
+
+
+@dataclass(frozen=True)
+class LimitsConfig:
+    routes: Tuple[Tuple[str, Limit], ...] = ()
+    repos: Tuple[Tuple[str, Limit], ...] = ()
+
+
+def load_limits(path: str) -> LimitsConfig:
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_limits(json.load(f))
+
+
+def parse_limits(obj: Any) -> LimitsConfig:
+    """Validate the --limits document; raises ValueError with the offending key."""
+    if not isinstance(obj, dict):
+        raise ValueError("limits must be an object")
+    unknown = set(obj) - {"routes", "repos"}
+    if unknown:
+        raise ValueError(f"limits: unknown key(s): {', '.join(sorted(unknown))}")
+    return LimitsConfig(
+        routes=_parse_rules(obj.get("routes"), "routes"),
+        repos=_parse_rules(obj.get("repos"), "repos"),
+    )
+
+
+def _parse_rules(rules: Any, where: str) -> Tuple[Tuple[str, Limit], ...]:
+    if rules is None:
+        return ()
+    if not isinstance(rules, dict):
+        raise ValueError(f"limits.{where} must be an object of glob -> limit")
+    out = []
+    for pattern, spec in rules.items():
+        at = f"limits.{where}[{pattern!r}]"
+        if not pattern.strip():
+            raise ValueError(f"{at}: empty pattern")
+        if not isinstance(spec, dict):
+            raise ValueError(f"{at} must be an object")
+        unknown = set(spec) - {"maxConcurrent", "ratePerMinute", "burst"}
+        if unknown:
+            raise ValueError(f"{at}: unknown key(s): {', '.join(sorted(unknown))}")
+        limit = Limit(
+            max_concurrent=_positive(spec.get("maxConcurrent"), f"{at}.maxConcurrent", integer=True),
+            rate_per_minute=_positive(spec.get("ratePerMinute"), f"{at}.ratePerMinute"),
+            burst=_positive(spec.get("burst"), f"{at}.burst", integer=True),
+        )
+        if limit.burst is not None and limit.rate_per_minute is None:
+            raise ValueError(f"{at}.burst needs ratePerMinute")
+        if limit.max_concurrent is None and limit.rate_per_minute is None:
+            raise ValueError(f"{at} sets no limit")
+        out.append((pattern.strip().lower(), limit))
+    return tuple(out)
+
+
+def _positive(value: Any, where: str, *, integer: bool = False):
+    if value is None:
+        return None
+    ok = not isinstance(value, bool) and isinstance(value, int if integer else (int, float)) and value > 0
+    if not ok:
+        raise ValueError(f"{where} must be a positive {'integer' if integer else 'number'}")
+    return value
+
+
+class _Bucket:
+    """Token bucket on run starts: `rate` tokens/second, at most `size` banked."""
+
+    __slots__ = ("rate", "size", "tokens", "stamp")
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int], now: float):
+        self.rate = rate_per_minute / 60.0
+        self.size = float(burst or 1)
+        self.tokens = self.size
+        self.stamp = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.size, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def ready_at(self, now: float) -> float:
+        self.refill(now)
+        return now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+
+
+class _Gate:
+    __slots__ = ("limit", "inflight", "bucket")
+
+    def __init__(self, limit: Limit, now: float):
+        self.limit = limit
+        self.inflight = 0
+        self.bucket = _Bucket(limit.rate_per_minute, limit.burst, now) if limit.rate_per_minute else None
+
+    def open(self, now: float) -> bool:
+        if self.limit.max_concurrent is not None and self.inflight >= self.limit.max_concurrent:
+            return False
+        return self.bucket is None or self.bucket.ready_at(now) <= now
+
+
+class Limiter:
+    """Admission state for the limits in a LimitsConfig (daemon thread only)."""
+
+    def __init__(self, cfg: LimitsConfig, clock: Callable[[], float] = time.monotonic):
+        self.cfg = cfg
+        self._clock = clock
+        self._gates: Dict[str, _Gate] = {}
+        self._closed: Dict[str, None] = {}     # gates that turned a task away, in order
+
+    def gates_for(self, routing: Optional[str], repo: Optional[str]) -> Tuple[str, ...]:
+        keys = []
+        routing = (routing or "").strip().lower()
+        for pattern, limit in self.cfg.routes:
+            if fnmatch.fnmatchcase(routing, pattern):
+                keys.append(self._gate(f"route:{pattern}", limit))
+                break
+        repo = (repo or "").strip().lower()
+        for pattern, limit in self.cfg.repos:
+            if fnmatch.fnmatchcase(repo, pattern):
+                keys.append(self._gate(f"repo:{repo}", limit))
+                break
+        return tuple(keys)
+
+    def blocking(self, gates: Tuple[str, ...]) -> Optional[str]:
+        """The first of `gates` that is saturated right now, or None."""
+        now = self._clock()
+        for key in gates:
+            if not self._gates[key].open(now):
+                self._closed[key] = None
+                return key
+        return None
+
+    def acquire(self, gates: Tuple[str, ...]) -> None:
+        now = self._clock()
+        for key in gates:
+            gate = self._gates[key]
+            gate.inflight += 1
+            if gate.bucket is not None:
+                gate.bucket.refill(now)
+                gate.bucket.tokens -= 1
+
+    def release(self, gates: Tuple[str, ...], *, refund: bool = False) -> None:
+        """A run ended (or, with refund, never started: its token is returned)."""
+        for key in gates:
+            gate = self._gates[key]
+            gate.inflight -= 1
+            if refund and gate.bucket is not None:
+                gate.bucket.tokens = min(gate.bucket.size, gate.bucket.tokens + 1)
+
+    def reopened(self) -> List[str]:
+        """Gates that turned tasks away and would admit one now."""
+        now = self._clock()
+        out = [key for key in self._closed if self._gates[key].open(now)]
+        for key in out:
+            del self._closed[key]
+        return out
+
+    def next_refill_at(self) -> Optional[float]:
+        """Earliest clock() at which a gate closed by its rate (not by its
+        concurrency cap, which only a release reopens) gets a token back."""
+        now = self._clock()
+        times = []
+        for key in self._closed:
+            gate = self._gates[key]
+            capped = gate.limit.max_concurrent is not None and gate.inflight >= gate.limit.max_concurrent
+            if gate.bucket is not None and not capped:
+                times.append(gate.bucket.ready_at(now))
+        return min(times) if times else None
+
+    def _gate(self, key: str, limit: Limit) -> str:
+        if key not in self._gates:
+            self._gates[key] = _Gate(limit, self._clock())
+        return key
@@ -2,9 +2,18 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import random
+import re
+import signal
 import subprocess
-from dataclasses import dataclass
-from typing import Iterable, Optional
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from . import db as dbm
 
@@ -13,6 +22,7 @@ from . import db as dbm
 class PullRequestInfo:
     number: int
     url: str
+    state: Optional[str] = None       # OPEN|MERGED|CLOSED
 
 
 @dataclass(frozen=True)
@@ -22,79 +32,383 @@ class CiInfo:
     url: Optional[str]
 
 
-def monitor_once(db_path: str, *, task_id: Optional[str] = None) -> int:
-    con = dbm.connect(dbm.DbConfig(path=db_path))
-    dbm.migrate(con)
+@dataclass(frozen=True)
+class _Target:
+    task_id: str
+    repo_slug: str
+    branch: str
+    created_at: int = 0
 
-    rows = _load_tasks(con, task_id=task_id)
-    updated = 0
-    for row in rows:
-        wt = (row["worktree_path"] or "").strip()
-        if not wt:
-            continue
-        try:
-            branch = _git(wt, "rev-parse", "--abbrev-ref", "HEAD").strip()
-        except Exception:
-            continue
-        if not branch:
-            continue
 
-        _update_worktree_branch(con, row["id"], branch)
+# PRs per bulk listing; tasks older than a truncated listing fall back to a
+# per-branch lookup.
+_PR_LIST_LIMIT = 200
+# Slack between the local task clock and GitHub's createdAt.
+_CLOCK_SKEW_SECONDS = 300
+# PRs per batched GraphQL checks query (aliases in one request).
+_CHECKS_BATCH = 50
 
-        repo_slug = _repo_slug_from_worktree(wt)
-        if not repo_slug:
-            continue
 
-        pr = discover_pr(repo_slug, branch)
-        if not pr:
-            continue
+@dataclass(frozen=True)
+class WatchConfig:
+    pending_seconds: int = 30         # CI still running
+    unknown_seconds: int = 300        # no PR yet / no checks / lookup failed
+    settled_seconds: int = 900        # CI passed or failed on a PR that is still open
+    max_sleep_seconds: float = 60.0   # how soon newly added worktrees get picked up
+
+
+# Merged/closed PR with settled CI (or past its final check): nothing left to watch.
+_NEVER = 2**63 - 1
+_TERMINAL_PR_STATES = ("MERGED", "CLOSED")
 
-        ci = discover_ci(repo_slug, pr.number)
-        _write_pr_ci(con, task_id=row["id"], pr=pr, ci=ci)
-        updated += 1
 
-    return updated
+@dataclass
+class SweepResult:
+    updated: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)   # repo slug or task id -> message
+
+
+def monitor_once(db_path: str, *, task_id: Optional[str] = None, parallelism: int = 4) -> int:
+    return monitor_sweep(db_path, task_id=task_id, parallelism=parallelism).updated
+
+
+def monitor_sweep(db_path: str, *, task_id: Optional[str] = None, parallelism: int = 4) -> SweepResult:
+    con = dbm.connect(dbm.DbConfig(path=db_path))
+    dbm.migrate(con)
+    return _sweep(con, _load_tasks(con, task_id=task_id), parallelism=parallelism, watch=WatchConfig())
+
+
+def monitor_watch(
+    db_path: str,
+    *,
+    parallelism: int = 4,
+    watch: WatchConfig = WatchConfig(),
+    should_stop: Callable[[], bool] = lambda: False,
+) -> int:
+    """Long-running monitor: re-check each task only when its next-check time is due.
+
+    The schedule lives in tasks.ci_next_check_at, so a restart picks it up
+    where it left off; merged/closed PRs are never polled again once CI settled
+    or after one final check.
+    """
+    con = dbm.connect(dbm.DbConfig(path=db_path))
+    dbm.migrate(con)
+
+    while not should_stop():
+        res = _sweep(con, _load_due_tasks(con, dbm.now_ts()), parallelism=parallelism, watch=watch)
+        for key, msg in sorted(res.errors.items()):
+            print(f"{key}: {msg}", file=sys.stderr)
+
+        row = con.execute(_NEXT_DUE_SQL).fetchone()
+        nxt = row["next_at"] if row else None
+        delay = watch.max_sleep_seconds if nxt is None else min(watch.max_sleep_seconds, nxt - dbm.now_ts())
+        deadline = time.monotonic() + max(1.0, delay)
+        while not should_stop() and time.monotonic() < deadline:
+            time.sleep(min(1.0, deadline - time.monotonic()))
+    return 0
+
+
+def next_check_delay(
+    pr: Optional[PullRequestInfo],
+    ci: Optional[CiInfo],
+    watch: WatchConfig,
+    *,
+    prev_pr_state: Optional[str] = None,
+) -> Optional[int]:
+    """Seconds until a task should be re-checked; None if it never needs to be.
+
+    A merged/closed PR is done once its CI settled. If CI is still pending or
+    unknown (cancelled at merge, a repo without checks), it gets one final
+    check: prev_pr_state is the PR state recorded before this check, and a PR
+    already seen merged/closed is not polled again.
+    """
+    if pr is None or ci is None:
+        return watch.unknown_seconds
+    settled = ci.state in ("passed", "failed")
+    if (pr.state or "").upper() in _TERMINAL_PR_STATES and (
+        settled or (prev_pr_state or "").upper() in _TERMINAL_PR_STATES
+    ):
+        return None
+    if ci.state == "pending":
+        return watch.pending_seconds
+    if settled:
+        return watch.settled_seconds
+    return watch.unknown_seconds
+
+
+def _sweep(con, task_rows, *, parallelism: int, watch: WatchConfig) -> SweepResult:
+    """One sweep over the given tasks, one worker per repo (up to `parallelism`).
+
+    A failing repo (or task) is recorded in SweepResult.errors and does not
+    abort the rest of the sweep. DB writes stay on the calling thread. Every
+    swept task gets its next-check time from next_check_delay.
+    """
+    # Worktrees of one repo share its origin: one worker (and one listing) per
+    # repo, keyed by the cached slug when known and by the path otherwise.
+    rows = [dict(row) for row in task_rows if (row["worktree_path"] or "").strip()]
+    path_slug = {(r["repo_path"] or "").strip(): r["repo_slug"] for r in rows if r["repo_slug"]}
+    groups: Dict[str, List[dict]] = {}
+    for row in rows:
+        path = (row["repo_path"] or "").strip()
+        key = row["repo_slug"] or (path and path_slug.get(path)) or path or row["worktree_path"].strip()
+        groups.setdefault(key, []).append(row)
+
+    result = SweepResult()
+    if not groups:
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(groups))), thread_name_prefix="orch-monitor") as pool:
+        futs = {pool.submit(_sweep_group, rows): rows for rows in groups.values()}
+        for fut in as_completed(futs):
+            resolved, found, errors = fut.result()
+            for tid, (branch, slug) in resolved.items():
+                _cache_worktree_refs(con, tid, branch, slug)
+            seen = set()
+            prev_state = {row["id"]: row["pr_state"] for row in futs[fut]}
+            for tid, pr, ci in found:
+                next_check_at = _next_check_at(pr, ci, watch, prev_pr_state=prev_state.get(tid))
+                _write_pr_ci(con, task_id=tid, pr=pr, ci=ci, next_check_at=next_check_at)
+                seen.add(tid)
+                result.updated += 1
+            for row in futs[fut]:
+                if row["id"] not in seen:
+                    _schedule_next_check(con, row["id"], _next_check_at(None, None, watch))
+            result.errors.update(errors)
+
+    return result
+
+
+def _sweep_group(rows: List[dict]):
+    """PRs and CI for the tasks of one repo.
+
+    Runs on a worker thread without DB access; never raises, failures come
+    back keyed by repo slug (or task id). Branch and slug come from the task
+    row; git is only asked for tasks whose cache is empty, and what it returns
+    is handed back to be stored.
+    """
+    resolved: Dict[str, Tuple[str, Optional[str]]] = {}
+    errors: Dict[str, str] = {}
+    targets: List[_Target] = []
+    group_slug: Optional[str] = next((r["repo_slug"] for r in rows if r["repo_slug"]), None)
+    for row in rows:
+        wt = row["worktree_path"].strip()
+        branch = row["worktree_branch"]
+        slug = row["repo_slug"]
+        if not branch or not slug:
+            if not branch:
+                try:
+                    branch = _git(wt, "rev-parse", "--abbrev-ref", "HEAD").strip()
+                except Exception:
+                    continue
+                if not branch:
+                    continue
+            if not slug:
+                if group_slug is None:
+                    group_slug = _repo_slug_from_worktree(wt) or ""
+                slug = group_slug or None
+            resolved[row["id"]] = (branch, slug)
+        if slug:
+            targets.append(
+                _Target(task_id=row["id"], repo_slug=slug, branch=branch, created_at=int(row.get("created_at") or 0))
+            )
+
+    if not targets:
+        return resolved, [], errors
+
+    repo_slug = targets[0].repo_slug
+    try:
+        prs, task_errors = _match_prs(repo_slug, targets)
+        errors.update(task_errors)
+        found = []
+        if prs:
+            cis = discover_ci_many(repo_slug, sorted({pr.number for pr in prs.values()}))
+            found = [(t.task_id, prs[t.task_id], cis[prs[t.task_id].number]) for t in targets if t.task_id in prs]
+    except Exception as e:
+        errors[repo_slug] = str(e)
+        found = []
+    return resolved, found, errors
+
+
+def _match_prs(repo_slug: str, targets: List[_Target]):
+    """Map task id -> PR using one bulk listing of the repo's recent PRs.
+
+    A task's PR is opened after the task, so only tasks created before the
+    oldest PR of a truncated listing get a per-branch lookup.
+    """
+    listing, window_start = _list_prs_window(repo_slug, limit=_PR_LIST_LIMIT)
+    out: Dict[str, PullRequestInfo] = {}
+    errors: Dict[str, str] = {}
+    for t in targets:
+        pr = listing.get(t.branch)
+        if pr is None and window_start is not None and t.created_at - _CLOCK_SKEW_SECONDS < window_start:
+            try:
+                pr = discover_pr(repo_slug, t.branch)
+            except RuntimeError as e:
+                errors[t.task_id] = str(e)
+        if pr is not None:
+            out[t.task_id] = pr
+    return out, errors
+
+
+def list_prs(repo_slug: str, *, limit: int = _PR_LIST_LIMIT) -> Dict[str, PullRequestInfo]:
+    """Newest PR (any state) per head branch, from one bulk listing."""
+    return _list_prs_window(repo_slug, limit=limit)[0]
+
+
+def _list_prs_window(repo_slug: str, *, limit: int) -> Tuple[Dict[str, PullRequestInfo], Optional[int]]:
+    """list_prs plus the start of the window it covers (epoch seconds).
+
+    PRs created before the start may be missing: None when the listing is
+    complete, the oldest listed PR's createdAt when it was truncated, and
+    sys.maxsize when that time is unknown.
+    """
+    items = _BACKEND.list_prs(repo_slug, limit=limit)
+    out: Dict[str, PullRequestInfo] = {}
+    for item in items:
+        # Listings are newest first.
+        branch = item.get("headRefName")
+        if branch and branch not in out:
+            out[branch] = _pr_info(item)
+    if len(items) < limit:
+        return out, None
+    created = _parse_github_time(items[-1].get("createdAt"))
+    return out, sys.maxsize if created is None else created
+
+
+def _parse_github_time(value) -> Optional[int]:
+    try:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return None
 
 
 def discover_pr(repo_slug: str, branch: str) -> Optional[PullRequestInfo]:
-    payload = _gh_json(
-        "pr",
-        "list",
-        "--repo",
-        repo_slug,
-        "--state",
-        "all",
-        "--head",
-        branch,
-        "--limit",
-        "20",
-        "--json",
-        "number,url,headRefName",
-    )
+    payload = _BACKEND.list_prs(repo_slug, limit=20, head=branch)
     for item in payload:
         if item.get("headRefName") == branch:
-            return PullRequestInfo(number=int(item["number"]), url=str(item["url"]))
+            return _pr_info(item)
     if payload:
-        item = payload[0]
-        return PullRequestInfo(number=int(item["number"]), url=str(item["url"]))
+        return _pr_info(payload[0])
     return None
 
 
+def _pr_info(item) -> PullRequestInfo:
+    state = item.get("state")
+    return PullRequestInfo(number=int(item["number"]), url=str(item["url"]), state=str(state).upper() if state else None)
+
+
 def discover_ci(repo_slug: str, pr_number: int) -> CiInfo:
-    payload = _gh_json("pr", "checks", str(pr_number), "--repo", repo_slug, "--json", "state,link,name")
+    return ci_from_checks(_BACKEND.pr_checks(repo_slug, pr_number))
+
+
+def discover_ci_many(repo_slug: str, pr_numbers: List[int]) -> Dict[int, CiInfo]:
+    """CI state for many PRs of one repo (batched where the backend can)."""
+    return {n: ci_from_checks(items) for n, items in _BACKEND.pr_checks_many(repo_slug, pr_numbers).items()}
+
+
+class GhCliBackend:
+    """GitHub access through the gh CLI, one subprocess per call.
+
+    Backends return gh-shaped items: PR listings as {number, url, headRefName,
+    state, createdAt} and checks as {name, state, link}.
+    """
+
+    name = "gh"
+
+    def list_prs(self, repo_slug: str, *, limit: int, head: Optional[str] = None) -> List[dict]:
+        args = ["pr", "list", "--repo", repo_slug, "--state", "all"]
+        if head:
+            args += ["--head", head]
+        return _gh(*args, "--limit", str(limit), "--json", "number,url,headRefName,state,createdAt")
+
+    def pr_checks(self, repo_slug: str, pr_number: int) -> List[dict]:
+        return _gh("pr", "checks", str(pr_number), "--repo", repo_slug, "--json", "state,link,name")
+
+    def pr_checks_many(self, repo_slug: str, pr_numbers: List[int]) -> Dict[int, List[dict]]:
+        # One GraphQL query (aliases) per _CHECKS_BATCH PRs.
+        owner, name = repo_slug.split("/", 1)
+        out: Dict[int, List[dict]] = {}
+        for i in range(0, len(pr_numbers), _CHECKS_BATCH):
+            batch = pr_numbers[i : i + _CHECKS_BATCH]
+            payload = _gh("api", "graphql", "-f", f"query={_checks_query(owner, name, batch)}")
+            repo = ((payload or {}).get("data") or {}).get("repository") or {}
+            for n in batch:
+                out[n] = _rollup_checks(repo.get(f"pr{n}"))
+        return out
+
+
+class GitHubUnavailable(RuntimeError):
+    """The API backend cannot serve the call (network, auth, 5xx); gh can."""
+
+
+class _FallbackBackend:
+    """Primary backend with per-call fallback to gh when it is unavailable."""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name}+{fallback.name}"
+
+    def list_prs(self, repo_slug: str, *, limit: int, head: Optional[str] = None) -> List[dict]:
+        try:
+            return self.primary.list_prs(repo_slug, limit=limit, head=head)
+        except GitHubUnavailable:
+            return self.fallback.list_prs(repo_slug, limit=limit, head=head)
+
+    def pr_checks(self, repo_slug: str, pr_number: int) -> List[dict]:
+        try:
+            return self.primary.pr_checks(repo_slug, pr_number)
+        except GitHubUnavailable:
+            return self.fallback.pr_checks(repo_slug, pr_number)
+
+    def pr_checks_many(self, repo_slug: str, pr_numbers: List[int]) -> Dict[int, List[dict]]:
+        try:
+            return self.primary.pr_checks_many(repo_slug, pr_numbers)
+        except GitHubUnavailable:
+            return self.fallback.pr_checks_many(repo_slug, pr_numbers)
+
+
+_BACKEND = GhCliBackend()
+
+
+def set_backend(backend) -> None:
+    global _BACKEND
+    _BACKEND = backend
+
+
+def make_backend(name: str = "auto", *, token: Optional[str] = None, api_url: Optional[str] = None):
+    """Backend by name: "gh", "http" (pooled API client, gh fallback), or
+    "auto" (http when a token is available, else gh)."""
+    token = token or os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+    if name == "gh" or (name == "auto" and not token):
+        return GhCliBackend()
+    if name not in ("http", "auto"):
+        raise ValueError(f"unknown GitHub backend: {name}")
+    if not token:
+        raise ValueError("http backend needs GH_TOKEN or GITHUB_TOKEN")
+    from .github_api import GitHubHttpBackend
+
+    http = GitHubHttpBackend(token, base_url=api_url or os.environ.get("GITHUB_API_URL") or "https://api.github.com")
+    return _FallbackBackend(http, GhCliBackend())
+
+
+_FAILED_STATES = {"FAILURE", "ERROR", "TIMED_OUT", "CANCELLED", "ACTION_REQUIRED"}
+_SUCCESS_STATES = {"SUCCESS", "SKIPPED", "NEUTRAL"}
+_PENDING_STATES = {"PENDING", "IN_PROGRESS", "QUEUED", "WAITING"}
+
+
+def ci_from_checks(payload) -> CiInfo:
+    """Fold `gh pr checks --json state,link,name` style items into one CiInfo."""
     if not payload:
         return CiInfo(state="unknown", detail="no checks", url=None)
 
     states = [str(i.get("state") or "").upper() for i in payload]
-    failed_states = {"FAILURE", "ERROR", "TIMED_OUT", "CANCELLED", "ACTION_REQUIRED"}
-    success_states = {"SUCCESS", "SKIPPED", "NEUTRAL"}
-    pending_states = {"PENDING", "IN_PROGRESS", "QUEUED", "WAITING"}
 
-    if any(s in failed_states for s in states):
+    if any(s in _FAILED_STATES for s in states):
         state = "failed"
-    elif all((s in success_states) for s in states if s):
+    elif all((s in _SUCCESS_STATES) for s in states if s):
         state = "passed"
-    elif any(s in pending_states for s in states):
+    elif any(s in _PENDING_STATES for s in states):
         state = "pending"
     else:
         state = "unknown"
@@ -109,6 +423,46 @@ def discover_ci(repo_slug: str, pr_number: int) -> CiInfo:
     return CiInfo(state=state, detail=detail, url=ci_url)
 
 
+def check_run_state(status: Optional[str], conclusion: Optional[str]) -> str:
+    """gh-style state of a check run: its conclusion once completed, else its status."""
+    st = (status or "").upper()
+    if st == "COMPLETED":
+        return (conclusion or "").upper()
+    return st
+
+
+def _checks_query(owner: str, name: str, numbers: List[int]) -> str:
+    fields = " ".join(f"pr{int(n)}: pullRequest(number: {int(n)}) {{ ...rollup }}" for n in numbers)
+    return (
+        f"query {{ repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {fields} }} }} "
+        "fragment rollup on PullRequest { commits(last: 1) { nodes { commit { statusCheckRollup { "
+        "contexts(first: 100) { nodes { __typename "
+        "... on CheckRun { name status conclusion detailsUrl } "
+        "... on StatusContext { context state targetUrl } } } } } } } }"
+    )
+
+
+def _rollup_checks(pr) -> List[dict]:
+    """GraphQL statusCheckRollup contexts -> `gh pr checks` style items."""
+    nodes = (((pr or {}).get("commits") or {}).get("nodes")) or []
+    if not nodes:
+        return []
+    rollup = ((nodes[0].get("commit") or {}).get("statusCheckRollup")) or {}
+    items = []
+    for ctx in ((rollup.get("contexts") or {}).get("nodes")) or []:
+        if ctx.get("__typename") == "CheckRun":
+            items.append(
+                {
+                    "name": ctx.get("name"),
+                    "state": check_run_state(ctx.get("status"), ctx.get("conclusion")),
+                    "link": ctx.get("detailsUrl"),
+                }
+            )
+        else:
+            items.append({"name": ctx.get("context"), "state": ctx.get("state"), "link": ctx.get("targetUrl")})
+    return items
+
+
 def parse_github_repo(remote_url: str) -> Optional[str]:
     url = (remote_url or "").strip()
     if not url:
@@ -142,31 +496,67 @@ def _repo_slug_from_worktree(worktree_path: str) -> Optional[str]:
 def _load_tasks(con, *, task_id: Optional[str]) -> Iterable:
     if task_id:
         return con.execute(
-            "SELECT id, worktree_path, worktree_branch FROM tasks WHERE id=?",
+            "SELECT id, worktree_path, worktree_branch, repo_slug, repo_path, pr_state, created_at FROM tasks WHERE id=?",
             (task_id,),
         ).fetchall()
     return con.execute(
-        "SELECT id, worktree_path, worktree_branch FROM tasks WHERE kind='subtask' AND worktree_path IS NOT NULL",
+        "SELECT id, worktree_path, worktree_branch, repo_slug, repo_path, pr_state, created_at FROM tasks "
+        "WHERE kind='subtask' AND worktree_path IS NOT NULL",
     ).fetchall()
 
 
-def _update_worktree_branch(con, task_id: str, branch: str) -> None:
+# Due tasks for watch mode, as two range lookups on idx_tasks_ci_next_check
+# (an OR would scan it). "+kind" keeps the planner off the kind index.
+_DUE_TASKS_SQL = """
+    SELECT id, worktree_path, worktree_branch, repo_slug, repo_path, pr_state, created_at
+    FROM tasks
+    WHERE worktree_path IS NOT NULL AND +kind='subtask' AND ci_next_check_at <= ?
+    UNION ALL
+    SELECT id, worktree_path, worktree_branch, repo_slug, repo_path, pr_state, created_at
+    FROM tasks
+    WHERE worktree_path IS NOT NULL AND +kind='subtask' AND ci_next_check_at IS NULL
+"""
+
+_NEXT_DUE_SQL = """
+    SELECT MIN(ci_next_check_at) AS next_at
+    FROM tasks
+    WHERE worktree_path IS NOT NULL AND +kind='subtask'
+"""
+
+
+def _load_due_tasks(con, now: int) -> Iterable:
+    return con.execute(_DUE_TASKS_SQL, (now,)).fetchall()
+
+
+def _next_check_at(
+    pr: Optional[PullRequestInfo], ci: Optional[CiInfo], watch: WatchConfig, *, prev_pr_state: Optional[str] = None
+) -> int:
+    delay = next_check_delay(pr, ci, watch, prev_pr_state=prev_pr_state)
+    return _NEVER if delay is None else dbm.now_ts() + delay
+
+
+def _schedule_next_check(con, task_id: str, next_check_at: int) -> None:
+    con.execute("UPDATE tasks SET ci_next_check_at=? WHERE id=?", (next_check_at, task_id))
+
+
+def _cache_worktree_refs(con, task_id: str, branch: str, repo_slug: Optional[str]) -> None:
     now = dbm.now_ts()
     con.execute(
-        "UPDATE tasks SET worktree_branch=?, updated_at=? WHERE id=?",
-        (branch, now, task_id),
+        "UPDATE tasks SET worktree_branch=?, repo_slug=COALESCE(?, repo_slug), updated_at=? WHERE id=?",
+        (branch, repo_slug, now, task_id),
     )
 
 
-def _write_pr_ci(con, *, task_id: str, pr: PullRequestInfo, ci: CiInfo) -> None:
+def _write_pr_ci(con, *, task_id: str, pr: PullRequestInfo, ci: CiInfo, next_check_at: Optional[int] = None) -> None:
     now = dbm.now_ts()
     con.execute(
         """
         UPDATE tasks
-        SET pr_number=?, pr_url=?, ci_state=?, ci_detail=?, ci_url=?, updated_at=?
+        SET pr_number=?, pr_url=?, pr_state=COALESCE(?, pr_state), ci_state=?, ci_detail=?, ci_url=?,
+            ci_next_check_at=COALESCE(?, ci_next_check_at), updated_at=?
         WHERE id=?
         """,
-        (pr.number, pr.url, ci.state, ci.detail, ci.url, now, task_id),
+        (pr.number, pr.url, pr.state, ci.state, ci.detail, ci.url, next_check_at, now, task_id),
     )
 
 
@@ -177,31 +567,124 @@ def _git(cwd: str, *args: str) -> str:
     return p.stdout
 
 
+class GhRateLimited(RuntimeError):
+    pass
+
+
+_RATE_LIMIT_RE = re.compile(r"rate limit|abuse detection|http 429", re.IGNORECASE)
+
+
 def _gh_json(*args: str):
     try:
         p = subprocess.run(["gh", *args], text=True, capture_output=True)
     except FileNotFoundError as e:
         raise RuntimeError("gh CLI not found in PATH") from e
     if p.returncode != 0:
-        raise RuntimeError(p.stderr.strip() or p.stdout.strip() or "gh command failed")
+        msg = p.stderr.strip() or p.stdout.strip() or "gh command failed"
+        if _RATE_LIMIT_RE.search(msg):
+            raise GhRateLimited(msg)
+        raise RuntimeError(msg)
     text = (p.stdout or "").strip()
     if not text:
         return []
     return json.loads(text)
 
 
+class _Backoff:
+    """Sweep-wide cool-down shared by all monitor workers.
+
+    When any call is rate limited, every worker holds off until the cool-down
+    ends (exponential per consecutive hit, with jitter); a success resets it.
+    """
+
+    def __init__(self, *, base: float = 5.0, cap: float = 300.0, max_tries: int = 5):
+        self.base = base
+        self.cap = cap
+        self.max_tries = max_tries
+        self._lock = threading.Lock()
+        self._until = 0.0
+        self._hits = 0
+
+    def gate(self) -> None:
+        with self._lock:
+            delay = self._until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def hit(self) -> None:
+        with self._lock:
+            self._hits += 1
+            delay = min(self.cap, self.base * (2 ** (self._hits - 1)))
+            self._until = max(self._until, time.monotonic() + delay * random.uniform(0.8, 1.2))
+
+    def ok(self) -> None:
+        with self._lock:
+            self._hits = 0
+
+
+_BACKOFF = _Backoff()
+
+
+def with_backoff(fn, *args):
+    """Call fn(*args) under the shared rate-limit back-off, retrying GhRateLimited."""
+    for attempt in range(_BACKOFF.max_tries):
+        _BACKOFF.gate()
+        try:
+            payload = fn(*args)
+        except GhRateLimited:
+            if attempt + 1 >= _BACKOFF.max_tries:
+                raise
+            _BACKOFF.hit()
+            continue
+        _BACKOFF.ok()
+        return payload
+    raise GhRateLimited("gh rate limited")
+
+
+def _gh(*args: str):
+    return with_backoff(_gh_json, *args)
+
+
 def main(argv: Optional[list[str]] = None) -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--db", required=True)
     ap.add_argument("--task-id", default=None)
+    ap.add_argument("--parallelism", type=int, default=4, help="repos swept concurrently")
+    ap.add_argument(
+        "--backend",
+        choices=("auto", "gh", "http"),
+        default="auto",
+        help="GitHub access: gh CLI, pooled HTTP API client (needs GH_TOKEN/GITHUB_TOKEN), or http when a token is set",
+    )
+    ap.add_argument("--api-url", default=None, help="API base URL for the http backend (default: $GITHUB_API_URL or api.github.com)")
+    ap.add_argument("--watch", action="store_true", help="keep running; re-check each task on its own schedule")
+    ap.add_argument("--pending-interval", type=int, default=WatchConfig.pending_seconds)
+    ap.add_argument("--unknown-interval", type=int, default=WatchConfig.unknown_seconds)
+    ap.add_argument("--settled-interval", type=int, default=WatchConfig.settled_seconds)
     args = ap.parse_args(argv)
-    try:
-        updated = monitor_once(args.db, task_id=args.task_id)
-    except RuntimeError as e:
-        print(str(e))
-        return 2
-    print(updated)
-    return 0
+    set_backend(make_backend(args.backend, api_url=args.api_url))
+
+    if args.watch:
+        stop = False
+
+        def _sig(_signum, _frame):
+            nonlocal stop
+            stop = True
+
+        signal.signal(signal.SIGINT, _sig)
+        signal.signal(signal.SIGTERM, _sig)
+        watch = WatchConfig(
+            pending_seconds=args.pending_interval,
+            unknown_seconds=args.unknown_interval,
+            settled_seconds=args.settled_interval,
+        )
+        return monitor_watch(args.db, parallelism=args.parallelism, watch=watch, should_stop=lambda: stop)
+
+    res = monitor_sweep(args.db, task_id=args.task_id, parallelism=args.parallelism)
+    for key, msg in sorted(res.errors.items()):
+        print(f"{key}: {msg}", file=sys.stderr)
+    print(res.updated)
+    return 2 if res.errors else 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+import select
+import socket
+from typing import Optional
+
+# Local wakeup channel: the daemon binds a Unix datagram socket next to the DB
+# file and anything that changes runnable state sends it one byte. Sends are
+# best-effort; with no daemon listening they are dropped and the daemon's slow
+# fallback poll covers the gap.
+
+
+def socket_path(db_path: str) -> str:
+    return os.path.abspath(db_path) + ".wake"
+
+
+def db_path_of(con) -> Optional[str]:
+    for r in con.execute("PRAGMA database_list").fetchall():
+        if r["name"] == "main":
+            return r["file"] or None
+    return None
+
+
+def notify(db_path: str) -> bool:
+    """Nudge the daemon serving db_path. Returns False if nobody is listening."""
+    try:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    except OSError:
+        return False
+    try:
+        s.setblocking(False)
+        s.sendto(b"w", socket_path(db_path))
+        return True
+    except OSError:
+        # No daemon, stale socket file, or a full buffer (which already means a
+        # wakeup is pending).
+        return False
+    finally:
+        s.close()
+
+
+def notify_con(con) -> bool:
+    path = db_path_of(con)
+    return notify(path) if path else False
+
+
+class Waker:
+    """Daemon side of the wakeup channel.
+
+    wake() is safe from worker threads and signal handlers; wait() blocks until
+    a wakeup arrives or the timeout expires, and says where it came from:
+    "external" (another process may have changed the DB), "internal"
+    (in-process wake) or None (timeout).
+    """
+
+    def __init__(self, db_path: str):
+        self.path = socket_path(db_path)
+        self._r, self._w = socket.socketpair()
+        self._r.setblocking(False)
+        self._w.setblocking(False)
+        self._sock: Optional[socket.socket] = self._bind(self.path)
+
+    @property
+    def listening(self) -> bool:
+        return self._sock is not None
+
+    def wake(self) -> None:
+        try:
+            self._w.send(b"w")
+        except OSError:
+            pass
+
+    def wait(self, timeout: Optional[float]) -> Optional[str]:
+        fds = [self._r] + ([self._sock] if self._sock else [])
+        ready, _, _ = select.select(fds, [], [], timeout)
+        for s in ready:
+            _drain(s)
+        if not ready:
+            return None
+        return "external" if self._sock in ready else "internal"
+
+    def close(self) -> None:
+        for s in (self._r, self._w):
+            s.close()
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _bind(path: str) -> Optional[socket.socket]:
+        if os.path.exists(path):
+            if _is_live(path):
+                # Another daemon owns this DB's socket; leave it alone and poll.
+                return None
+            try:
+                os.unlink(path)
+            except OSError:
+                return None
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            s.bind(path)
+        except OSError:
+            # e.g. path longer than sun_path allows, or a read-only directory.
+            s.close()
+            return None
+        s.setblocking(False)
+        return s
+
+
+def _is_live(path: str) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def _drain(s: socket.socket) -> None:
+    while True:
+        try:
+            if not s.recv(64):
+                return
+        except OSError:
+            # BlockingIOError once the buffer is empty.
+            return
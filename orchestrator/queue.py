@@ -1,9 +1,16 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List, Optional
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from . import db as dbm
+from . import runs
+from .notify import notify_con
+from .retry_policy import RetryDecision, decide_retry
+from .runs import RunStats
 from .schema import validate_plan
 
 
@@ -26,6 +33,7 @@ def enqueue_plan(
     plan_repo = plan.get("repo")
     plan_repo_path = plan.get("repoPath") or plan.get("repo_path")
     plan_worktree_path = plan.get("worktreePath") or plan.get("worktree_path")
+    priority = int(plan.get("priority") or 1)
 
     now = dbm.now_ts()
 
@@ -40,10 +48,12 @@ def enqueue_plan(
 
         con.execute(
             """
-            INSERT INTO tasks(id, kind, plan_id, title, repo, repo_path, worktree_path, status, max_attempts, idempotency_key, created_at, updated_at)
-            VALUES(?, 'plan', ?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?)
+            INSERT INTO tasks(id, kind, plan_id, title, repo, repo_path, worktree_path, status, max_attempts, priority,
+                              idempotency_key, created_at, updated_at)
+            VALUES(?, 'plan', ?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?)
             """,
-            (plan_id, plan_id, title, plan_repo, plan_repo_path, plan_worktree_path, max_attempts, idempotency_key, now, now),
+            (plan_id, plan_id, title, plan_repo, plan_repo_path, plan_worktree_path, max_attempts, priority,
+             idempotency_key, now, now),
         )
 
         for st in plan["subtasks"]:
@@ -53,12 +63,16 @@ def enqueue_plan(
             repo = st.get("repo", plan_repo)
             repo_path = st.get("repoPath") or st.get("repo_path") or plan_repo_path
             worktree_path = st.get("worktreePath") or st.get("worktree_path") or plan_worktree_path
+            timeout = st.get("timeoutSeconds", plan.get("timeoutSeconds"))
+            idle_timeout = st.get("idleTimeoutSeconds", plan.get("idleTimeoutSeconds"))
             con.execute(
                 """
-                INSERT INTO tasks(id, kind, plan_id, title, routing, prompt, repo, repo_path, worktree_path, status, max_attempts, created_at, updated_at)
-                VALUES(?, 'subtask', ?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)
+                INSERT INTO tasks(id, kind, plan_id, title, routing, prompt, repo, repo_path, worktree_path, status, max_attempts,
+                                  priority, timeout_seconds, idle_timeout_seconds, created_at, updated_at)
+                VALUES(?, 'subtask', ?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?, ?)
                 """,
-                (sid, plan_id, st.get("title"), routing, prompt, repo, repo_path, worktree_path, max_attempts, now, now),
+                (sid, plan_id, st.get("title"), routing, prompt, repo, repo_path, worktree_path, max_attempts,
+                 priority, timeout, idle_timeout, now, now),
             )
 
             for dep in (st.get("dependsOn") or []):
@@ -72,101 +86,422 @@ def enqueue_plan(
             (plan_id, now, "info", "enqueued plan", json.dumps({"subtasks": len(plan["subtasks"])}, ensure_ascii=False)),
         )
 
+    notify_con(con)
     return str(plan_id)
 
 
+_NEXT_RUNNABLE_SQL = """
+    SELECT t.*
+    FROM tasks t
+    WHERE t.kind='subtask'
+      AND t.status='queued'
+      AND (t.not_before IS NULL OR t.not_before <= ?)
+      AND NOT EXISTS (
+        SELECT 1
+        FROM deps d
+        JOIN tasks td ON td.id = d.depends_on
+        WHERE d.task_id = t.id
+          AND td.status != 'succeeded'
+      )
+    ORDER BY t.created_at ASC
+    LIMIT ?
+"""
+
+# Re-validates a specific candidate: still queued, not backing off, deps all succeeded.
+_CLAIMABLE_SQL = """
+    SELECT t.*
+    FROM tasks t
+    WHERE t.id = ?
+      AND t.status = 'queued'
+      AND (t.not_before IS NULL OR t.not_before <= ?)
+      AND NOT EXISTS (
+        SELECT 1
+        FROM deps d
+        JOIN tasks td ON td.id = d.depends_on
+        WHERE d.task_id = t.id
+          AND td.status != 'succeeded'
+      )
+"""
+
+
 def next_runnable_task(con) -> Optional[dict]:
-    """Find one runnable subtask: queued and all deps succeeded."""
+    """Find one runnable subtask: queued, not backing off, and all deps succeeded."""
+
+    row = con.execute(_NEXT_RUNNABLE_SQL, (dbm.now_ts(), 1)).fetchone()
+    return dict(row) if row else None
+
+
+def claim_tasks(
+    con,
+    task_ids: Optional[Iterable[str]] = None,
+    *,
+    limit: int = 1,
+    owner: Optional[str] = None,
+    lease_seconds: float = 60.0,
+) -> List[dict]:
+    """Atomically claim up to `limit` runnable subtasks in one write transaction.
+
+    With task_ids, those candidates are re-validated and claimed in order
+    (candidates that are no longer runnable are skipped); otherwise the oldest
+    runnable subtasks are taken. Returns the claimed rows as they are after the
+    claim (status='running', attempt incremented).
+
+    With an owner, each claim carries a lease expiring lease_seconds from now;
+    the owner keeps it alive with renew_leases(), and reclaim_expired_leases()
+    recovers tasks whose owner stopped renewing (crashed daemon).
+    """
+
+    claimed: List[dict] = []
+    if limit < 1:
+        return claimed
+
+    with dbm.tx_immediate(con):
+        now = dbm.now_ts()
+        if task_ids is None:
+            rows = con.execute(_NEXT_RUNNABLE_SQL, (now, limit)).fetchall()
+        else:
+            rows = []
+            for tid in task_ids:
+                if len(rows) >= limit:
+                    break
+                row = con.execute(_CLAIMABLE_SQL, (tid, now)).fetchone()
+                if row:
+                    rows.append(row)
+
+        expires = _lease_expiry(now, lease_seconds) if owner else None
+        claimed_at = time.time()
+        for row in rows:
+            task = dict(row)
+            attempt = int(task.get("attempt") or 0) + 1
+            runs.record_claim(con, task, attempt=attempt, owner=owner, claimed_at=claimed_at)
+            task["status"] = "running"
+            task["attempt"] = attempt
+            task["not_before"] = None
+            task["updated_at"] = now
+            task["lease_owner"] = owner
+            task["lease_expires_at"] = expires
+            con.execute(
+                """
+                UPDATE tasks SET status='running', attempt=?, not_before=NULL, lease_owner=?, lease_expires_at=?, updated_at=?
+                WHERE id=?
+                """,
+                (task["attempt"], owner, expires, now, task["id"]),
+            )
+            con.execute(
+                "INSERT INTO events(task_id, ts, level, message) VALUES(?,?,?,?)",
+                (task["id"], now, "info", f"claimed for run (attempt {task['attempt']}/{task['max_attempts']})"),
+            )
+            claimed.append(task)
+
+    return claimed
+
+
+def renew_leases(con, owner: str, task_ids: Iterable[str], *, lease_seconds: float = 60.0) -> int:
+    """Heartbeat: push out the leases `owner` still holds on task_ids.
+
+    One UPDATE for all of the owner's in-flight tasks. Returns how many leases
+    were renewed; a task missing from the count was reclaimed by someone else.
+    """
+
+    ids = list(task_ids)
+    if not ids:
+        return 0
+    marks = ",".join("?" * len(ids))
+    cur = con.execute(
+        f"""
+        UPDATE tasks SET lease_expires_at=?
+        WHERE status='running' AND lease_owner=? AND id IN ({marks})
+        """,
+        (_lease_expiry(dbm.now_ts(), lease_seconds), owner, *ids),
+    )
+    return cur.rowcount
+
+
+def held_leases(con, owner: str, runs: Iterable[Tuple[str, int]]) -> Set[str]:
+    """Task ids among `runs` ((task_id, attempt) pairs) whose lease `owner`
+    still holds for that very attempt."""
+
+    want = dict(runs)
+    if not want:
+        return set()
+    marks = ",".join("?" * len(want))
+    rows = con.execute(
+        f"SELECT id, attempt FROM tasks WHERE status='running' AND lease_owner=? AND id IN ({marks})",
+        (owner, *want),
+    ).fetchall()
+    return {r["id"] for r in rows if int(r["attempt"]) == want[r["id"]]}
+
+
+def expire_leases(con, owner: str) -> int:
+    """Expire every lease held by `owner` now (e.g. it is known to be dead)."""
+
+    cur = con.execute(
+        "UPDATE tasks SET lease_expires_at=0 WHERE status='running' AND lease_owner=?",
+        (owner,),
+    )
+    return cur.rowcount
+
+
+# Running subtasks whose owner stopped heartbeating; served by the partial
+# lease index, so the periodic check is cheap however many tasks are running.
+_EXPIRED_LEASES_SQL = """
+    SELECT id, lease_owner
+    FROM tasks
+    WHERE status='running' AND lease_expires_at <= ?
+"""
+
+
+def reclaim_expired_leases(con, *, now: Optional[int] = None) -> List[Completion]:
+    """Recover running tasks whose lease has expired.
+
+    Each one is recorded as a failed attempt (failure_kind='lease') and goes
+    through decide_retry like any other failure: requeued if attempts remain,
+    failed otherwise. Worktree cleanup for terminal failures is left to the
+    caller, as with complete_tasks.
+    """
+
+    now = dbm.now_ts() if now is None else now
+    if con.execute(_EXPIRED_LEASES_SQL + " LIMIT 1", (now,)).fetchone() is None:
+        return []
+
+    out: List[Completion] = []
+    with dbm.tx_immediate(con):
+        for row in con.execute(_EXPIRED_LEASES_SQL, (now,)).fetchall():
+            res = TaskResult(
+                task_id=row["id"],
+                ok=False,
+                failure_kind="lease",
+                failure_detail=f"lease expired (owner {row['lease_owner'] or 'unknown'})",
+            )
+            out.append(_record_failure(con, res, now, run_status="lost"))
+    if out:
+        notify_con(con)
+    return out
+
+
+def _lease_expiry(now: int, lease_seconds: float) -> int:
+    return now + max(1, int(round(lease_seconds)))
+
+
+@dataclass(frozen=True)
+class TaskResult:
+    task_id: str
+    ok: bool
+    failure_kind: Optional[str] = None
+    failure_detail: Optional[str] = None
+    attempt: Optional[int] = None     # with complete_tasks(owner=...): the attempt the result belongs to
+    run: Optional[RunStats] = None    # measurements for the attempt's runs row
+
 
-    # Note: simple query; you can optimize later.
+@dataclass(frozen=True)
+class Completion:
+    task_id: str
+    status: str                       # succeeded|queued (retry allowed)|failed|lost (lease reclaimed)
+    retry: Optional[RetryDecision] = None
+    not_before: Optional[int] = None  # queued: earliest time the retry may be claimed
+
+
+def complete_tasks(con, results: Iterable[TaskResult], *, owner: Optional[str] = None) -> List[Completion]:
+    """Record several run results, retry decisions and their events in one commit.
+
+    Failed tasks go through decide_retry: allowed retries are requeued in the
+    same transaction, so no reader ever sees a retryable task as 'failed', with
+    not_before set from the decision's backoff.
+    Worktree cleanup for terminal failures is left to the caller (it shells
+    out to git and must not hold the write lock).
+
+    With an owner, a result is only recorded if that owner still holds the
+    task's lease for the result's attempt; otherwise the task was reclaimed
+    meanwhile and the result is dropped (Completion status 'lost').
+    """
+
+    out: List[Completion] = []
+    with dbm.tx_immediate(con):
+        now = dbm.now_ts()
+        for res in results:
+            if owner is not None and not _holds_lease(con, res.task_id, owner, res.attempt):
+                _event(con, res.task_id, now, "warn", f"result dropped: lease lost by {owner}")
+                out.append(Completion(task_id=res.task_id, status="lost"))
+                continue
+
+            if res.ok:
+                con.execute(
+                    """
+                    UPDATE tasks SET status='succeeded', failure_kind=NULL, failure_detail=NULL,
+                                     lease_owner=NULL, lease_expires_at=NULL, updated_at=?
+                    WHERE id=?
+                    """,
+                    (now, res.task_id),
+                )
+                _event(con, res.task_id, now, "info", "succeeded")
+                runs.record_finish(con, res.task_id, res.attempt, status="succeeded", stats=res.run)
+                out.append(Completion(task_id=res.task_id, status="succeeded"))
+                continue
+
+            out.append(_record_failure(con, res, now))
+
+    return out
+
+
+def _holds_lease(con, task_id: str, owner: str, attempt: Optional[int]) -> bool:
     row = con.execute(
-        """
-        SELECT t.*
-        FROM tasks t
-        WHERE t.kind='subtask'
-          AND t.status='queued'
-          AND NOT EXISTS (
-            SELECT 1
-            FROM deps d
-            JOIN tasks td ON td.id = d.depends_on
-            WHERE d.task_id = t.id
-              AND td.status != 'succeeded'
-          )
-        ORDER BY t.created_at ASC
-        LIMIT 1
-        """
+        "SELECT attempt FROM tasks WHERE id=? AND status='running' AND lease_owner=?",
+        (task_id, owner),
     ).fetchone()
+    return row is not None and (attempt is None or int(row["attempt"]) == attempt)
+
+
+def _record_failure(con, res: TaskResult, now: int, *, run_status: str = "failed") -> Completion:
+    """Mark a failed attempt and apply decide_retry (caller holds the write lock)."""
+
+    runs.record_finish(
+        con, res.task_id, res.attempt, status=run_status, failure_kind=res.failure_kind, stats=res.run
+    )
+    con.execute(
+        """
+        UPDATE tasks SET status='failed', failure_kind=?, failure_detail=?,
+                         lease_owner=NULL, lease_expires_at=NULL, updated_at=?
+        WHERE id=?
+        """,
+        (res.failure_kind, res.failure_detail, now, res.task_id),
+    )
+    _event(con, res.task_id, now, "error", f"failed: {res.failure_kind} ({res.failure_detail})")
+
+    row = con.execute("SELECT attempt, max_attempts FROM tasks WHERE id=?", (res.task_id,)).fetchone()
+    dec = decide_retry(
+        failure_kind=res.failure_kind,
+        failure_detail=res.failure_detail,
+        attempt=int(row["attempt"]) if row else 0,
+        max_attempts=int(row["max_attempts"]) if row else 0,
+    )
+    if dec.should_retry:
+        delay = int(math.ceil(dec.delay_seconds))
+        not_before = now + delay if delay > 0 else None
+        con.execute(
+            "UPDATE tasks SET status='queued', not_before=?, updated_at=? WHERE id=?",
+            (not_before, now, res.task_id),
+        )
+        _event(con, res.task_id, now, "warn", f"retry allowed: {dec.reason} (backoff {delay}s)")
+        return Completion(task_id=res.task_id, status="queued", retry=dec, not_before=not_before)
+    _event(con, res.task_id, now, "warn", f"no retry: {dec.reason}")
+    return Completion(task_id=res.task_id, status="failed", retry=dec)
+
+
+def _event(con, task_id: str, ts: int, level: str, message: str) -> None:
+    con.execute(
+        "INSERT INTO events(task_id, ts, level, message) VALUES(?,?,?,?)",
+        (task_id, ts, level, message),
+    )
 
-    return dict(row) if row else None
+
+# Every queued subtask of a dirty plan downstream of a terminal failure, with
+# the root failure that dooms it. Seeds are direct dependents of failed/
+# blocked/canceled tasks (a blocked dependency passes on its own root); the
+# recursive step walks the rest of the descendant closure, so a chain of any
+# depth is blocked in one pass. Deps never cross plans, so only dirty plans
+# can gain new blocks.
+_DOOMED_SQL = """
+    WITH RECURSIVE doomed(task_id, root) AS (
+      SELECT d.task_id,
+             CASE WHEN f.status = 'blocked' THEN COALESCE(f.blocked_by, f.id) ELSE f.id END
+      FROM tasks f
+      JOIN deps d ON d.depends_on = f.id
+      JOIN tasks t ON t.id = d.task_id
+      WHERE f.plan_id IN (SELECT plan_id FROM dirty_plans)
+        AND f.kind = 'subtask'
+        AND f.status IN ('failed','blocked','canceled')
+        AND t.status = 'queued'
+      UNION
+      SELECT d.task_id, doomed.root
+      FROM doomed
+      JOIN deps d ON d.depends_on = doomed.task_id
+      JOIN tasks t ON t.id = d.task_id
+      WHERE t.status = 'queued'
+    )
+    SELECT task_id, MIN(root) AS root
+    FROM doomed
+    GROUP BY task_id
+"""
+
+# Derived status per dirty plan; same precedence as the subtask state machine:
+# all succeeded > any running > any queued > any failed/blocked/canceled.
+# CROSS JOIN pins dirty_plans as the outer loop so only dirty plans are read.
+_DIRTY_PLAN_STATUS_SQL = """
+    SELECT p.id AS plan_id,
+           p.status AS old_status,
+           CASE
+             WHEN SUM(s.status = 'succeeded') = COUNT(*) THEN 'succeeded'
+             WHEN SUM(s.status = 'running') > 0 THEN 'running'
+             WHEN SUM(s.status = 'queued') > 0 THEN 'queued'
+             WHEN SUM(s.status IN ('failed','blocked','canceled')) > 0 THEN 'failed'
+             ELSE 'queued'
+           END AS new_status
+    FROM dirty_plans dp
+    CROSS JOIN tasks p ON p.id = dp.plan_id AND p.kind = 'plan'
+    CROSS JOIN tasks s ON s.plan_id = dp.plan_id AND s.kind = 'subtask'
+    GROUP BY p.id
+"""
 
 
 def refresh_blocked_and_plans(con) -> None:
-    """Best-effort state reconciliation.
+    """State reconciliation for plans whose subtasks changed since the last pass.
 
-    1) If a queued subtask depends on a terminal-failed dependency, mark it blocked.
-    2) Recompute each plan status from its subtasks.
+    1) Mark every queued subtask downstream of a terminal-failed task blocked,
+       recording the root failure in blocked_by.
+    2) Recompute each dirty plan status from its subtasks.
+
+    Plans are marked dirty by triggers on subtask insert/status change, so
+    settled historical plans cost nothing. Both steps are set-based and share
+    one write transaction.
     """
 
-    now = dbm.now_ts()
+    if con.execute("SELECT 1 FROM dirty_plans LIMIT 1").fetchone() is None:
+        return
 
-    # 1) blocked subtasks
-    rows = con.execute(
-        """
-        SELECT t.id AS task_id
-        FROM tasks t
-        WHERE t.kind='subtask'
-          AND t.status='queued'
-          AND EXISTS (
-            SELECT 1
-            FROM deps d
-            JOIN tasks td ON td.id = d.depends_on
-            WHERE d.task_id = t.id
-              AND td.status IN ('failed','blocked','canceled')
-          )
-        """
-    ).fetchall()
+    now = dbm.now_ts()
 
-    for r in rows:
-        tid = r["task_id"]
+    with dbm.tx_immediate(con):
+        # 1) blocked subtasks, through the full descendant closure
+        con.execute("CREATE TEMP TABLE IF NOT EXISTS doomed(task_id TEXT PRIMARY KEY, root TEXT NOT NULL)")
+        con.execute("DELETE FROM temp.doomed")
+        con.execute(f"INSERT INTO temp.doomed(task_id, root) {_DOOMED_SQL}")
         con.execute(
-            "UPDATE tasks SET status='blocked', blocked_reason='dependency_failed', updated_at=? WHERE id=?",
-            (now, tid),
+            """
+            INSERT INTO events(task_id, ts, level, message)
+            SELECT task_id, ?, 'warn', 'blocked: dependency_failed (root ' || root || ')'
+            FROM temp.doomed
+            """,
+            (now,),
         )
         con.execute(
-            "INSERT INTO events(task_id, ts, level, message) VALUES(?,?,?,?)",
-            (tid, now, "warn", "blocked: dependency_failed"),
+            """
+            UPDATE tasks
+            SET status='blocked', blocked_reason='dependency_failed', blocked_by=dm.root, updated_at=?
+            FROM temp.doomed AS dm
+            WHERE tasks.id = dm.task_id
+            """,
+            (now,),
         )
 
-    # 2) recompute plan status
-    plan_rows = con.execute("SELECT id FROM tasks WHERE kind='plan'").fetchall()
-    for pr in plan_rows:
-        plan_id = pr["id"]
-        subt = con.execute(
-            "SELECT status FROM tasks WHERE kind='subtask' AND plan_id=?",
-            (plan_id,),
-        ).fetchall()
-        if not subt:
-            continue
-
-        statuses = [s["status"] for s in subt]
-        if all(s == "succeeded" for s in statuses):
-            new_status = "succeeded"
-        elif any(s == "running" for s in statuses):
-            new_status = "running"
-        elif any(s == "queued" for s in statuses):
-            new_status = "queued"
-        elif any(s in ("failed", "blocked", "canceled") for s in statuses):
-            new_status = "failed"
-        else:
-            new_status = "queued"
+        # 2) recompute dirty plan statuses
+        con.execute(
+            f"""
+            INSERT INTO events(task_id, ts, level, message)
+            SELECT plan_id, ?, 'info', 'plan status -> ' || new_status
+            FROM ({_DIRTY_PLAN_STATUS_SQL})
+            WHERE new_status != old_status
+            """,
+            (now,),
+        )
+        con.execute(
+            f"""
+            UPDATE tasks
+            SET status=ps.new_status, updated_at=?
+            FROM ({_DIRTY_PLAN_STATUS_SQL}) AS ps
+            WHERE tasks.id = ps.plan_id
+              AND ps.new_status != ps.old_status
+            """,
+            (now,),
+        )
 
-        old = con.execute("SELECT status FROM tasks WHERE id=?", (plan_id,)).fetchone()
-        if old and old["status"] != new_status:
-            con.execute(
-                "UPDATE tasks SET status=?, updated_at=? WHERE id=?",
-                (new_status, now, plan_id),
-            )
-            con.execute(
-                "INSERT INTO events(task_id, ts, level, message) VALUES(?,?,?,?)",
-                (plan_id, now, "info", f"plan status -> {new_status}"),
-            )
+        con.execute("DELETE FROM dirty_plans")
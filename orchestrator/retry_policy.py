@@ -1,13 +1,47 @@
 from __future__ import annotations
 
+import random
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Dict, Tuple
 
 
 @dataclass(frozen=True)
 class RetryDecision:
     should_retry: bool
     reason: str
+    delay_seconds: float = 0.0      # backoff before the retry may run
+
+
+# (base, cap) in seconds of the retry backoff per failure kind: attempt n
+# waits base * 2**(n-1), capped. Rate-limited runs back off hardest; a lost
+# lease or runner slot says nothing against the task, so it retries almost at once.
+_BACKOFF: Dict[str, Tuple[float, float]] = {
+    "rate_limit": (300.0, 3600.0),
+    "timeout": (60.0, 1800.0),
+    "test": (120.0, 3600.0),
+    "ci": (120.0, 3600.0),
+    "lint": (10.0, 600.0),
+    "format": (10.0, 600.0),
+    "type": (10.0, 600.0),
+    "build": (30.0, 900.0),
+    "lease": (2.0, 120.0),
+    "runner_lost": (2.0, 120.0),
+}
+_DEFAULT_BACKOFF = (30.0, 1800.0)
+
+
+def retry_delay(failure_kind: str | None, attempt: int, *, rng: Callable[[], float] = random.random) -> float:
+    """Seconds to wait before retrying attempt `attempt` (1-based) of a task.
+
+    Exponential per failure kind, with "equal jitter": half the delay is
+    fixed, the other half random, so tasks that failed together (one CI
+    outage, one rate limit) do not all retry in the same second.
+    """
+
+    fk = (failure_kind or "unknown").lower()
+    base, cap = _BACKOFF.get(fk, _DEFAULT_BACKOFF)
+    delay = min(cap, base * 2 ** max(0, attempt - 1))
+    return delay / 2 + rng() * delay / 2
 
 
 def decide_retry(
@@ -16,6 +50,7 @@ def decide_retry(
     failure_detail: str | None,
     attempt: int,
     max_attempts: int,
+    rng: Callable[[], float] = random.random,
 ) -> RetryDecision:
     """Hard gate for automatic retries.
 
@@ -23,6 +58,7 @@ def decide_retry(
     - Prefer rerunning *the same CI/test step* once for flakiness.
     - Only allow LLM-driven 'fix-and-retry' for fixable categories.
     - Never exceed max_attempts.
+    - Back off between attempts (retry_delay) instead of retrying at once.
 
     This is a placeholder policy; tune with your own signals.
     """
@@ -30,6 +66,14 @@ def decide_retry(
     if attempt >= max_attempts:
         return RetryDecision(False, f"attempt {attempt} >= max_attempts {max_attempts}")
 
+    dec = _gate(failure_kind, failure_detail)
+    if not dec.should_retry:
+        return dec
+    delay = retry_delay(failure_kind, attempt, rng=rng)
+    return RetryDecision(True, dec.reason, delay)
+
+
+def _gate(failure_kind: str | None, failure_detail: str | None) -> RetryDecision:
     fk = (failure_kind or "unknown").lower()
     detail = (failure_detail or "").lower()
 
@@ -37,6 +81,18 @@ def decide_retry(
     if "timeout" in detail or "flaky" in detail or "temporar" in detail:
         return RetryDecision(True, "flaky/timeout signal")
 
+    # The owning daemon died or stalled mid-run; nothing is known against the task itself
+    if fk == "lease":
+        return RetryDecision(True, "lease expired (run lost with its owner)")
+
+    # Throttled by the agent's provider (failure.classify_failure); retry_delay backs off hardest
+    if fk == "rate_limit":
+        return RetryDecision(True, "rate limited")
+
+    # A runner pool worker died mid-run (possibly while running another task)
+    if fk == "runner_lost":
+        return RetryDecision(True, "runner slot lost (pool worker died)")
+
     # Known fixable buckets
     if fk in {"lint", "format", "type", "build"}:
         return RetryDecision(True, f"fixable failure_kind={fk}")
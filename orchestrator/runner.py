@@ -3,21 +3,39 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import re
+import selectors
+import signal
 import subprocess
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, Iterable, Optional, Tuple
 
 from . import db as dbm
 from .worktree import ensure_task_worktree
 
 
-def run_task(db_path: str, task_id: str) -> int:
-    con = dbm.connect(dbm.DbConfig(path=db_path))
-    dbm.migrate(con)
+def run_task(
+    db_path: str,
+    task_id: str,
+    *,
+    con=None,
+    timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+) -> int:
+    # Long-lived callers (the daemon's runner pool) pass their own migrated
+    # connection instead of paying connect + migrate per task.
+    if con is None:
+        con = dbm.connect(dbm.DbConfig(path=db_path))
+        dbm.migrate(con)
 
     row = con.execute(
-        "SELECT id, routing, prompt, worktree_path, repo_path, plan_id FROM tasks WHERE id=?",
+        """
+        SELECT id, routing, prompt, worktree_path, repo_path, plan_id, timeout_seconds, idle_timeout_seconds
+        FROM tasks WHERE id=?
+        """,
         (task_id,),
     ).fetchone()
     if not row:
@@ -26,6 +44,11 @@ def run_task(db_path: str, task_id: str) -> int:
 
     routing = (row["routing"] or "").strip().lower()
     prompt = row["prompt"] or ""
+    # Explicit values (the daemon's effective per-route limits) win over the task row.
+    limits = {
+        "timeout": timeout if timeout is not None else row["timeout_seconds"],
+        "idle_timeout": idle_timeout if idle_timeout is not None else row["idle_timeout_seconds"],
+    }
 
     if _is_codex_route(routing):
         worktree_path = row["worktree_path"]
@@ -36,16 +59,16 @@ def run_task(db_path: str, task_id: str) -> int:
                 worktree_path = wt.path
         except Exception as e:
             print(f"worktree setup failed: {e}", file=sys.stderr)
-        return _run_codex(task_id=task_id, prompt=prompt, worktree_path=worktree_path, repo_path=repo_path)
+        return _run_codex(task_id=task_id, prompt=prompt, worktree_path=worktree_path, repo_path=repo_path, **limits)
 
     if _is_reviewer_route(routing):
-        return _run_openclaw_agent(agent="reviewer", prompt=prompt)
+        return _run_openclaw_agent(agent="reviewer", prompt=prompt, **limits)
 
     if _is_designer_route(routing):
-        return _run_openclaw_agent(agent="designer", prompt=prompt)
+        return _run_openclaw_agent(agent="designer", prompt=prompt, **limits)
 
     if _is_triage_route(routing):
-        return _run_openclaw_agent(agent="triage", prompt=prompt)
+        return _run_openclaw_agent(agent="triage", prompt=prompt, **limits)
 
     print(f"unsupported routing: {routing!r}", file=sys.stderr)
     return 64
@@ -67,7 +90,15 @@ def _is_triage_route(r: str) -> bool:
     return r in {"triage", "classify", "qwen-triage"} or "triage" in r
 
 
-def _run_codex(*, task_id: str, prompt: str, worktree_path: Optional[str], repo_path: Optional[str]) -> int:
+def _run_codex(
+    *,
+    task_id: str,
+    prompt: str,
+    worktree_path: Optional[str],
+    repo_path: Optional[str],
+    timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+) -> int:
     workdir = (worktree_path or "").strip() or (repo_path or "").strip() or os.environ.get("ORCH_WORKDIR", "").strip()
     if not workdir:
         print("codex route requires worktree_path/repo_path or ORCH_WORKDIR", file=sys.stderr)
@@ -85,27 +116,55 @@ def _run_codex(*, task_id: str, prompt: str, worktree_path: Optional[str], repo_
         return 127
 
     cmd = ["codex", "exec", "--dangerously-bypass-approvals-and-sandbox", prompt]
-    p = subprocess.run(cmd, cwd=str(wd), text=True, capture_output=True)
-    out = (p.stdout or "") + "\n" + (p.stderr or "")
-    if p.stdout:
-        print(p.stdout)
-    if p.stderr:
-        print(p.stderr, file=sys.stderr)
-
-    # Codex may exit 0 but still report a sandbox block without applying edits.
-    blocked_signals = [
-        "blocked by the execution sandbox",
-        "Sandbox(LandlockRestrict)",
-        "couldn't write files directly",
-        "panicked at linux-sandbox",
-    ]
-    if p.returncode == 0 and any(sig.lower() in out.lower() for sig in blocked_signals):
+    abort, signals = _block_settings()
+    rc, blocked = _stream_proc(
+        cmd, cwd=str(wd), signals=signals, abort_on_signal=abort, timeout=timeout, idle_timeout=idle_timeout
+    )
+
+    # Codex may exit 0 but still report a sandbox block without applying edits;
+    # with early abort on, the run was killed as soon as the block showed up.
+    if blocked and (rc == 0 or (abort and rc != _TIMEOUT_RC)):
+        print(f"sandbox block: {blocked}", file=sys.stderr)
         return 75
 
-    return p.returncode
+    return rc
+
+
+_BLOCKED_SIGNALS = (
+    "blocked by the execution sandbox",
+    "Sandbox(LandlockRestrict)",
+    "couldn't write files directly",
+    "panicked at linux-sandbox",
+)
+
+# Seconds between SIGTERM and SIGKILL when an agent is aborted or times out.
+_ABORT_GRACE_SECONDS = 5.0
+
+# Exit code for a run killed by timeout / idleTimeout (as timeout(1)).
+_TIMEOUT_RC = 124
 
+# Called with the pid of each agent as it starts; the agent then leads its own
+# process group. The runner pool records it so the daemon can still kill the
+# agent if the worker running this task dies.
+_on_agent_start: Optional[Callable[[int], None]] = None
 
-def _run_openclaw_agent(*, agent: str, prompt: str) -> int:
+
+def _block_settings() -> Tuple[bool, Tuple[str, ...]]:
+    """(abort early?, fatal signals) from the environment.
+
+    ORCH_ABORT_ON_BLOCK=1 kills the agent's process group as soon as a signal
+    appears in its output instead of waiting for it to exit.
+    ORCH_FATAL_SIGNALS replaces the default list (';'-separated, matched
+    case-insensitively as plain substrings).
+    """
+    abort = os.environ.get("ORCH_ABORT_ON_BLOCK", "").strip().lower() in ("1", "true", "yes", "on")
+    custom = tuple(x.strip() for x in os.environ.get("ORCH_FATAL_SIGNALS", "").split(";") if x.strip())
+    return abort, custom or _BLOCKED_SIGNALS
+
+
+def _run_openclaw_agent(
+    *, agent: str, prompt: str, timeout: Optional[float] = None, idle_timeout: Optional[float] = None
+) -> int:
     if not _has_bin("openclaw"):
         print("openclaw binary not found in PATH", file=sys.stderr)
         return 127
@@ -121,12 +180,181 @@ def _run_openclaw_agent(*, agent: str, prompt: str) -> int:
         prompt,
         "--json",
     ]
-    p = subprocess.run(cmd, text=True, capture_output=True)
-    if p.stdout:
-        print(p.stdout)
-    if p.stderr:
-        print(p.stderr, file=sys.stderr)
-    return p.returncode
+    rc, _ = _stream_proc(cmd, timeout=timeout, idle_timeout=idle_timeout)
+    return rc
+
+
+class _SignalScanner:
+    """Incremental, case-insensitive search for any of `signals` in a byte stream.
+
+    Keeps only the last len(longest signal)-1 bytes between chunks, so a
+    signal split across reads is still found and memory stays constant.
+    """
+
+    def __init__(self, signals: Iterable[str]):
+        self._by_needle: Dict[bytes, str] = {s.lower().encode("utf-8"): s for s in signals}
+        needles = sorted(self._by_needle, key=len, reverse=True)
+        self._re = re.compile(b"|".join(re.escape(n) for n in needles)) if needles else None
+        self._keep = max((len(n) for n in needles), default=1) - 1
+        self._carry = b""
+        self.matched: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> Optional[str]:
+        """Scan the next chunk; returns the signal the first time one is seen."""
+        if self.matched is not None or self._re is None:
+            return None
+        hay = self._carry + chunk.lower()
+        m = self._re.search(hay)
+        if m:
+            self.matched = self._by_needle[m.group(0)]
+            return self.matched
+        self._carry = hay[-self._keep :] if self._keep else b""
+        return None
+
+
+def _stream_proc(
+    cmd,
+    *,
+    cwd: Optional[str] = None,
+    signals: Iterable[str] = (),
+    abort_on_signal: bool = False,
+    timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+) -> Tuple[int, Optional[str]]:
+    """Run cmd, passing its stdout/stderr through to ours as it arrives.
+
+    Each stream is scanned for `signals` on the way; returns the exit code
+    and the first signal seen (None if none). With abort_on_signal or a
+    timeout, cmd runs in its own process group, which is terminated at the
+    first signal (abort_on_signal), after `timeout` seconds, or after
+    `idle_timeout` seconds without output (then killed after
+    _ABORT_GRACE_SECONDS); output keeps draining until the pipes close, and
+    the deadlines keep running until cmd exits. A timed-out run returns
+    _TIMEOUT_RC.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    p = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=bool(abort_on_signal or timeout or idle_timeout or _on_agent_start),
+    )
+    if _on_agent_start is not None:
+        _on_agent_start(p.pid)
+    assert p.stdout is not None and p.stderr is not None
+    sinks = {p.stdout: sys.stdout.buffer, p.stderr: sys.stderr.buffer}
+    scanners = {p.stdout: _SignalScanner(signals), p.stderr: _SignalScanner(signals)}
+    matched: Optional[str] = None
+    killer: Optional[threading.Timer] = None
+    timed_out: Optional[str] = None
+    started = last_output = time.monotonic()
+
+    sel = selectors.DefaultSelector()
+    for pipe in sinks:
+        sel.register(pipe, selectors.EVENT_READ)
+    with sel, p.stdout, p.stderr:
+        while sel.get_map():
+            wait = None
+            if killer is None:
+                expiry = _next_expiry(started, last_output, timeout, idle_timeout)
+                if expiry is not None:
+                    wait = expiry[0] - time.monotonic()
+                    if wait <= 0:
+                        timed_out = expiry[1]
+                        killer = _terminate_group(p.pid)
+                        continue
+            for key, _ in sel.select(wait):
+                pipe = key.fileobj
+                chunk = pipe.read1(65536)
+                if not chunk:
+                    sel.unregister(pipe)
+                    continue
+                last_output = time.monotonic()
+                sinks[pipe].write(chunk)
+                sinks[pipe].flush()
+                hit = scanners[pipe].feed(chunk)
+                if hit and matched is None:
+                    matched = hit
+                    if abort_on_signal and killer is None:
+                        killer = _terminate_group(p.pid)
+    if killer is None:
+        # The pipes can close long before the agent exits (it may redirect
+        # its output and hang), so keep the deadlines until it does.
+        expiry = _next_expiry(started, last_output, timeout, idle_timeout)
+        if expiry is not None:
+            try:
+                p.wait(max(0.0, expiry[0] - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                timed_out = expiry[1]
+                killer = _terminate_group(p.pid)
+    rc = p.wait()
+    if killer is not None:
+        # Members that ignore SIGTERM can outlive the leader: keep the SIGKILL
+        # armed until the whole group is gone.
+        while killer.is_alive() and group_alive(p.pid):
+            time.sleep(0.05)
+        killer.cancel()
+    if timed_out:
+        print(f"{timed_out}; killed process group", file=sys.stderr)
+        return _TIMEOUT_RC, matched
+    return rc, matched
+
+
+def _next_expiry(
+    started: float, last_output: float, timeout: Optional[float], idle_timeout: Optional[float]
+) -> Optional[Tuple[float, str]]:
+    """Earliest (monotonic deadline, reason) among the configured timeouts."""
+    expiry = []
+    if timeout:
+        expiry.append((started + timeout, f"timeout: exceeded {timeout:g}s wall clock"))
+    if idle_timeout:
+        expiry.append((last_output + idle_timeout, f"timeout: no output for {idle_timeout:g}s"))
+    return min(expiry) if expiry else None
+
+
+def _terminate_group(pgid: int) -> threading.Timer:
+    """SIGTERM the process group now and SIGKILL it after the grace period."""
+    _signal_group(pgid, signal.SIGTERM)
+    killer = threading.Timer(_ABORT_GRACE_SECONDS, _signal_group, (pgid, signal.SIGKILL))
+    killer.daemon = True
+    killer.start()
+    return killer
+
+
+def _signal_group(pgid: int, sig: int) -> None:
+    try:
+        os.killpg(pgid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def group_alive(pgid: int) -> bool:
+    """Whether process group pgid still has a live (non-zombie) member.
+
+    Orphaned members are reparented to init, which may be slow to reap them
+    (or never do, in containers), so killpg(pgid, 0) alone is not enough.
+    """
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    if not os.path.isdir("/proc"):
+        return True
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                state, _ppid, pgrp = f.read().rsplit(b")", 1)[1].split()[:3]
+        except (OSError, ValueError):
+            continue
+        if int(pgrp) == pgid and state != b"Z":
+            return True
+    return False
 
 
 def _has_bin(name: str) -> bool:
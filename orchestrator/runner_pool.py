@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import resource
+import signal
+import sys
+import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from . import db as dbm
+from . import runner
+
+# Pre-forked worker processes that run runner.run_task in-process (daemon
+# --runner-pool). Workers come from a forkserver that has already imported the
+# orchestrator, and each keeps one migrated SQLite connection, so dispatching a
+# task costs a pickle round trip instead of interpreter startup, imports,
+# connect and migrate.
+#
+# While a task runs, the worker's fds 1/2 point at the task's log file, so
+# runner output and the agent subprocesses it starts land there directly, just
+# like with a --runner shell command.
+#
+# A worker runs one task at a time, so the change in its RUSAGE_CHILDREN
+# across a task is that task's agent CPU time. Peak RSS is a high-water mark
+# over all children the worker ever reaped: it is reported only when this
+# task raised it.
+#
+# If a worker dies (OOM kill, segfault), ProcessPoolExecutor fails every run
+# in flight and terminates the other workers, but not the agents they started:
+# each worker keeps its agent's process group id in <logfile>.agent while the
+# task runs, and kill_lost_agent() uses it to stop the orphan.
+
+_PRELOAD = ["orchestrator.db", "orchestrator.runner", "orchestrator.daemon"]
+
+_con = None
+_db_path: Optional[str] = None
+
+
+class RunnerPool:
+    """Fixed-size pool of long-lived runner processes for one DB."""
+
+    def __init__(self, db_path: str, size: int):
+        self.db_path = db_path
+        self.size = max(1, int(size))
+        self._ctx = multiprocessing.get_context("forkserver")
+        self._ctx.set_forkserver_preload(_PRELOAD)
+        self._pool = self._start()
+
+    def submit(
+        self, task_id: str, logfile: str, *, timeout: Optional[float] = None, idle_timeout: Optional[float] = None
+    ) -> Future:
+        """Run task_id in a worker; the future resolves to a daemon.CmdResult.
+
+        Timeouts are enforced by the runner on the agent's process group, so
+        the worker itself survives them.
+        """
+        try:
+            return self._pool.submit(_run_in_worker, task_id, logfile, timeout, idle_timeout)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OOM killer); the runs it took
+            # down already failed through their futures. Start a fresh pool.
+            self._pool.shutdown(wait=False)
+            self._pool = self._start()
+            return self._pool.submit(_run_in_worker, task_id, logfile, timeout, idle_timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def _start(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=self._ctx,
+            initializer=_init_worker,
+            initargs=(self.db_path,),
+        )
+        # Fork every worker (and run its connect + migrate) now rather than on
+        # the first tasks.
+        for f in [pool.submit(os.getpid) for _ in range(self.size)]:
+            f.result()
+        return pool
+
+
+def agent_pidfile(logfile: str) -> str:
+    return logfile + ".agent"
+
+
+def kill_lost_agent(logfile: str) -> None:
+    """SIGKILL the process group recorded for the run logging to logfile: the
+    agent a dead worker left behind, or a run whose lease was lost."""
+    path = agent_pidfile(logfile)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            pgid = int(f.read().strip() or 0)
+        os.remove(path)
+    except (OSError, ValueError):
+        return
+    if pgid > 0:
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _note_agent(path: str, pid: int) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(str(pid))
+
+
+def _init_worker(db_path: str) -> None:
+    global _con, _db_path
+    # Ctrl-C reaches the whole process group; the daemon decides when runs
+    # stop, as it does for --runner commands it drains on shutdown.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _db_path = db_path
+    _con = dbm.connect(dbm.DbConfig(path=db_path))
+    dbm.migrate(_con)
+
+
+def _run_in_worker(task_id: str, logfile: str, timeout: Optional[float] = None, idle_timeout: Optional[float] = None):
+    from .daemon import _TAIL_BYTES, CmdResult
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    saved = (os.dup(1), os.dup(2))
+    fd = os.open(logfile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    pidfile = agent_pidfile(logfile)
+    runner._on_agent_start = lambda pid: _note_agent(pidfile, pid)
+    try:
+        os.dup2(fd, 1)
+        os.dup2(fd, 2)
+        try:
+            rc = runner.run_task(_db_path or "", task_id, con=_con, timeout=timeout, idle_timeout=idle_timeout)
+        except Exception:
+            traceback.print_exc()
+            rc = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+    finally:
+        runner._on_agent_start = None
+        if os.path.exists(pidfile):
+            os.remove(pidfile)
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        for d in (fd, *saved):
+            os.close(d)
+
+    finished_at = time.time()
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    size = os.path.getsize(logfile)
+    with open(logfile, "rb") as f:
+        f.seek(max(0, size - _TAIL_BYTES))
+        tail = f.read()
+    return CmdResult(
+        returncode=rc,
+        output=tail.decode("utf-8", errors="replace"),
+        output_bytes=size,
+        finished_at=finished_at,
+        cpu_user=after.ru_utime - before.ru_utime,
+        cpu_sys=after.ru_stime - before.ru_stime,
+        max_rss_kb=after.ru_maxrss if after.ru_maxrss > before.ru_maxrss else None,
+    )
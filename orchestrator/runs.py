@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# One `runs` row per attempt (schema v13).
+#
+# The row is inserted by claim_tasks and closed by complete_tasks /
+# reclaim_expired_leases inside the transactions they already open, so
+# recording runs adds no commit to the daemon's hot path. Durations are kept
+# as a column so the per-routing rollups below are served, already sorted,
+# from a covering index.
+
+
+@dataclass(frozen=True)
+class RunStats:
+    """What the daemon measured about one finished attempt."""
+
+    exit_code: Optional[int] = None
+    started_at: Optional[float] = None    # wall clock, seconds
+    finished_at: Optional[float] = None
+    log_path: Optional[str] = None
+    output_bytes: Optional[int] = None
+    cpu_user: Optional[float] = None      # seconds, from the child's rusage
+    cpu_sys: Optional[float] = None
+    max_rss_kb: Optional[int] = None      # peak resident set size of the child tree's largest process
+
+
+def record_claim(con, task: dict, *, attempt: int, owner: Optional[str], claimed_at: float) -> None:
+    """Open the run row for attempt `attempt` of the task row `task` as it was
+    before the claim (caller holds the write lock)."""
+
+    # A task becomes queued when enqueued or requeued (updated_at); a retry
+    # backing off only really queues once not_before passes.
+    queued_at = max(float(task.get("updated_at") or 0), float(task.get("not_before") or 0))
+    con.execute(
+        """
+        INSERT OR REPLACE INTO runs(task_id, attempt, routing, owner, status, queued_at, claimed_at)
+        VALUES(?, ?, ?, ?, 'running', ?, ?)
+        """,
+        (task["id"], attempt, task.get("routing"), owner, queued_at, claimed_at),
+    )
+
+
+def record_finish(
+    con,
+    task_id: str,
+    attempt: Optional[int],
+    *,
+    status: str,
+    failure_kind: Optional[str] = None,
+    stats: Optional[RunStats] = None,
+) -> None:
+    """Close a run row (caller holds the write lock).
+
+    attempt=None closes the task's current attempt.
+    """
+
+    st = stats or RunStats()
+    finished_at = st.finished_at if st.finished_at is not None else time.time()
+    con.execute(
+        """
+        UPDATE runs
+        SET status=?, failure_kind=?, exit_code=?,
+            started_at=COALESCE(?, started_at), finished_at=?,
+            duration_s=? - COALESCE(?, started_at, claimed_at),
+            log_path=?, output_bytes=?, cpu_user=?, cpu_sys=?, max_rss_kb=?
+        WHERE task_id=? AND attempt=COALESCE(?, (SELECT attempt FROM tasks WHERE id=?))
+        """,
+        (
+            status, failure_kind, st.exit_code,
+            st.started_at, finished_at,
+            finished_at, st.started_at,
+            st.log_path, st.output_bytes, st.cpu_user, st.cpu_sys, st.max_rss_kb,
+            task_id, attempt, task_id,
+        ),
+    )
+
+
+# Finished runs of one status in (routing, duration) order, straight off the
+# covering idx_runs_rollup: no table access, no sort.
+_ROLLUP_SQL = """
+    SELECT routing, duration_s
+    FROM runs
+    WHERE status=? AND duration_s IS NOT NULL AND finished_at >= ?
+    ORDER BY routing, duration_s
+"""
+
+# The newest finished runs, by rowid range (+status keeps the planner off
+# idx_runs_rollup, which would read every run of that status and sort).
+_RECENT_SQL = """
+    SELECT routing, duration_s
+    FROM runs
+    WHERE id > ? AND +status=? AND duration_s IS NOT NULL
+    ORDER BY id
+"""
+
+
+@dataclass(frozen=True)
+class RoutingRollup:
+    routing: str
+    count: int
+    percentiles: Dict[int, float]     # percentile -> seconds
+
+
+def duration_percentiles(
+    con,
+    *,
+    status: str = "succeeded",
+    since: float = 0.0,
+    percentiles: Sequence[int] = (50, 90, 95, 99),
+) -> List[RoutingRollup]:
+    """Duration percentiles (nearest rank) per routing over finished runs."""
+
+    out: List[RoutingRollup] = []
+    for routing, durations in _grouped(con.execute(_ROLLUP_SQL, (status, since))):
+        n = len(durations)
+        pcts = {p: durations[min(n - 1, max(0, math.ceil(p / 100 * n) - 1))] for p in percentiles}
+        out.append(RoutingRollup(routing=routing, count=n, percentiles=pcts))
+    return out
+
+
+def recent_durations(con, *, limit: int = 5000, status: str = "succeeded") -> List[Tuple[str, float]]:
+    """(routing, seconds) of up to the last `limit` runs, oldest first."""
+
+    row = con.execute("SELECT MAX(id) AS top FROM runs").fetchone()
+    floor = (row["top"] or 0) - limit
+    return [(r["routing"] or "", float(r["duration_s"])) for r in con.execute(_RECENT_SQL, (floor, status))]
+
+
+def _grouped(rows: Iterable) -> Iterator[Tuple[str, List[float]]]:
+    current: Optional[str] = None
+    bucket: List[float] = []
+    for r in rows:
+        routing = r["routing"] or ""
+        if routing != current and bucket:
+            yield current or "", bucket
+            bucket = []
+        current = routing
+        bucket.append(float(r["duration_s"]))
+    if bucket:
+        yield current or "", bucket
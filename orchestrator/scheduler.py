@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import heapq
+import statistics
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+# In-memory ready queue for the daemon.
+#
+# SQLite stays the source of truth: the queue is rebuilt from the DB on start
+# (and whenever the daemon is told the DB changed behind its back), and every
+# pop is re-validated by the claim transaction. Between rebuilds the daemon
+# feeds completions in, so picking the next task is a heap pop instead of a
+# correlated NOT EXISTS over every queued subtask.
+#
+# Retries backing off (tasks.not_before in the future) wait in a second heap
+# keyed by not_before and move to the ready heap once due, so other ready work
+# is picked meanwhile and a backed-off task costs nothing per pop.
+#
+# With DurationStats, ready tasks are ranked critical path first: a node's
+# rank is its routing's median run time plus the largest rank among the tasks
+# that depend on it, i.e. the expected time from starting it to finishing the
+# longest chain it gates. Ties (and the no-stats case) fall back to oldest
+# first.
+#
+# pop(admit=...) lets the daemon turn away tasks whose route/repo limit is
+# saturated (orchestrator.limits): such a task is parked under the gate that
+# refused it and only returns to the ready heap on unpark(gate), so a
+# saturated route costs nothing per pop while other ready work is picked.
+#
+# Fair share: ready tasks are queued per plan, plans per repo, and pop()
+# serves repos, then plans within the picked repo, by weighted round-robin
+# (stride scheduling). Each flow keeps a virtual time that advances by
+# 1/weight when it is served and the flow with the lowest one goes next.
+# Repos weigh the same; a plan weighs its priority. A flow that becomes ready
+# starts at the virtual time of the last flow served at its level, so it
+# neither owes for the backlog ahead of it nor can claim a burst for the time
+# it was idle: a 2-task plan enqueued behind a 300-task one gets every other
+# pick in that repo. Rank (or age) orders tasks within a plan.
+
+_QUEUED = 0
+_RUNNING = 1
+
+_ACTIVE_SUBTASKS_SQL = """
+    SELECT rowid AS seq, id, plan_id, priority, status, created_at, not_before, routing,
+           COALESCE(repo, repo_path) AS repo
+    FROM tasks
+    WHERE kind='subtask' AND status IN ('queued','running')
+"""
+
+_ACTIVE_DEPS_SQL = """
+    SELECT d.task_id, d.depends_on, td.status AS dep_status
+    FROM tasks t
+    JOIN deps d ON d.task_id = t.id
+    JOIN tasks td ON td.id = d.depends_on
+    WHERE t.kind='subtask' AND t.status='queued'
+"""
+
+
+class DurationStats:
+    """Median of the recent successful run times per routing, in seconds.
+
+    Routings without samples weigh `default`; the median is taken over the
+    last `window` runs so a routing that gets slower is noticed.
+    """
+
+    def __init__(self, *, window: int = 64, default: float = 60.0) -> None:
+        self.window = window
+        self.default = default
+        self._samples: Dict[str, Deque[float]] = {}
+        self._medians: Dict[str, float] = {}
+
+    def weight(self, routing: Optional[str]) -> float:
+        return self._medians.get(_route_key(routing), self.default)
+
+    def observe(self, routing: Optional[str], seconds: float) -> bool:
+        """Record one run; True if the routing's weight changed."""
+        key = _route_key(routing)
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(max(0.0, float(seconds)))
+        median = statistics.median(samples)
+        changed = self._medians.get(key) != median
+        self._medians[key] = median
+        return changed
+
+
+def _route_key(routing: Optional[str]) -> str:
+    return (routing or "").strip().lower()
+
+
+class _Node:
+    __slots__ = (
+        "id", "key", "state", "pending", "children", "deps", "not_before", "routing", "repo", "rank", "plan_id", "weight",
+    )
+
+    def __init__(
+        self,
+        task_id: str,
+        key: Tuple[int, int],
+        state: int,
+        not_before: Optional[int] = None,
+        routing: Optional[str] = None,
+        repo: Optional[str] = None,
+        plan_id: Optional[str] = None,
+        weight: int = 1,
+    ):
+        self.id = task_id
+        self.key = key
+        self.state = state
+        self.pending = 0
+        self.children: List[_Node] = []   # active tasks that depend on this one
+        self.deps: List[_Node] = []       # active tasks this one depends on
+        self.not_before = not_before
+        self.routing = _route_key(routing)
+        self.repo = repo
+        self.rank = 0.0
+        self.plan_id = plan_id
+        self.weight = max(1, weight)
+
+
+class _Flow:
+    """A fair-share queue: a plan (heap of task entries) or a repo (heap of plan flows)."""
+
+    __slots__ = ("key", "weight", "vtime", "clock", "heap", "flows", "active")
+
+    def __init__(self, key: str, weight: int = 1):
+        self.key = key
+        self.weight = weight
+        self.vtime = 0.0      # this flow's virtual time at its parent
+        self.clock = 0.0      # repo: virtual time of the plan served last
+        self.heap: list = []  # plan: (-rank, created_at, seq, task_id); repo: (vtime, n, plan_id)
+        self.flows: Dict[str, _Flow] = {}  # repo: its plans
+        self.active = False   # has a live entry in its parent's heap
+
+
+class ReadyQueue:
+    """Queued/running subtasks with unsatisfied-dependency counters.
+
+    A node enters the ready heap when its counter reaches zero; pop() is
+    O(log n) in the number of ready tasks regardless of how many plans the DB
+    holds.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.time,
+        stats: Optional[DurationStats] = None,
+        *,
+        fair_share: bool = True,
+    ) -> None:
+        self._clock = clock
+        self._stats = stats
+        self._fair_share = fair_share
+        self._nodes: Dict[str, _Node] = {}
+        self._by_routing: Dict[str, Set[_Node]] = {}
+        self._repos: Dict[str, _Flow] = {}
+        self._repo_heap: List[Tuple[float, int, str]] = []
+        self._vclock = 0.0    # virtual time of the repo served last
+        self._seq = 0         # tie-break: flows with equal virtual time go in activation order
+        self._delayed: List[Tuple[int, str]] = []
+        self._parked: Dict[str, List[_Node]] = {}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def rebuild(self, con) -> None:
+        self._nodes = {}
+        self._by_routing = {}
+        self._repos = {}
+        self._repo_heap = []
+        self._vclock = 0.0
+        self._delayed = []
+        self._parked = {}
+
+        for r in con.execute(_ACTIVE_SUBTASKS_SQL).fetchall():
+            state = _RUNNING if r["status"] == "running" else _QUEUED
+            node = _Node(
+                r["id"],
+                (int(r["created_at"]), int(r["seq"])),
+                state,
+                r["not_before"],
+                r["routing"],
+                r["repo"],
+                r["plan_id"],
+                int(r["priority"] or 1),
+            )
+            self._nodes[node.id] = node
+            self._by_routing.setdefault(node.routing, set()).add(node)
+
+        for r in con.execute(_ACTIVE_DEPS_SQL).fetchall():
+            if r["dep_status"] == "succeeded":
+                continue
+            node = self._nodes.get(r["task_id"])
+            if node is None:
+                continue
+            node.pending += 1
+            dep = self._nodes.get(r["depends_on"])
+            if dep is not None:
+                dep.children.append(node)
+                node.deps.append(dep)
+            # A failed/blocked/canceled dependency is not tracked, so the node
+            # never becomes ready; reconciliation blocks it and the next
+            # rebuild drops it.
+
+        if self._stats is not None:
+            self._rank_all()
+
+        for node in self._nodes.values():
+            if node.state == _QUEUED and node.pending == 0:
+                self._push(node)
+
+    def pop(self, admit: Optional[Callable[[str, Optional[str]], Optional[str]]] = None) -> Optional[str]:
+        """Next ready task id, marked running in memory.
+
+        The repo and then the plan are picked by fair share; within the plan,
+        highest rank then oldest first. admit(routing, repo) returns None to
+        accept a task, or the key of the gate refusing it; refused tasks are
+        parked until unpark(key).
+        """
+        self._release_due()
+        while self._repo_heap:
+            vtime, _, key = heapq.heappop(self._repo_heap)
+            repo = self._repos.get(key)
+            if repo is None or not repo.active or vtime != repo.vtime:
+                continue  # stale entry
+            node = self._pop_repo(repo, admit)
+            if node is None:
+                # Nothing claimable left in this repo (stale or parked entries).
+                repo.active = False
+                del self._repos[key]
+                continue
+            self._vclock = repo.vtime
+            repo.vtime += 1.0 / repo.weight
+            self._activate(self._repo_heap, repo)
+            node.state = _RUNNING
+            return node.id
+        return None
+
+    def _pop_repo(self, repo: _Flow, admit) -> Optional[_Node]:
+        while repo.heap:
+            vtime, _, key = heapq.heappop(repo.heap)
+            plan = repo.flows.get(key)
+            if plan is None or not plan.active or vtime != plan.vtime:
+                continue  # stale entry
+            node = self._pop_plan(plan, admit)
+            if node is None:
+                plan.active = False
+                del repo.flows[key]
+                continue
+            repo.clock = plan.vtime
+            plan.vtime += 1.0 / plan.weight
+            self._activate(repo.heap, plan)
+            return node
+        return None
+
+    def _pop_plan(self, plan: _Flow, admit) -> Optional[_Node]:
+        while plan.heap:
+            neg_rank, _, _, task_id = heapq.heappop(plan.heap)
+            node = self._nodes.get(task_id)
+            if node is None or node.state != _QUEUED or node.pending or -neg_rank != node.rank:
+                continue  # stale entry
+            if admit is not None:
+                gate = admit(node.routing, node.repo)
+                if gate is not None:
+                    self._parked.setdefault(gate, []).append(node)
+                    continue
+            return node
+        return None
+
+    def unpark(self, gate: str) -> None:
+        """Gate `gate` admits again: its parked tasks compete for pops again."""
+        for node in self._parked.pop(gate, ()):
+            if self._nodes.get(node.id) is node and node.state == _QUEUED and node.pending == 0:
+                self._push(node)
+
+    def rank(self, task_id: str) -> Optional[float]:
+        node = self._nodes.get(task_id)
+        return node.rank if node is not None else None
+
+    def observe(self, routing: Optional[str], seconds: float) -> None:
+        """Feed a finished run's duration; re-ranks only the affected nodes.
+
+        When the routing's median moves, its nodes are re-weighted and the
+        change is pushed up through their dependencies until ranks settle.
+        """
+        if self._stats is None or not self._stats.observe(routing, seconds):
+            return
+        work = list(self._by_routing.get(_route_key(routing), ()))
+        while work:
+            node = work.pop()
+            if self._nodes.get(node.id) is not node:
+                continue
+            rank = self._rank_of(node)
+            if rank == node.rank:
+                continue
+            node.rank = rank
+            if node.state == _QUEUED and node.pending == 0:
+                self._push(node)
+            work.extend(node.deps)
+
+    def discard(self, task_id: str) -> None:
+        """Forget a task the DB refused to hand out (claimed elsewhere, canceled...)."""
+        self._forget(task_id)
+
+    def next_due_at(self) -> Optional[float]:
+        """When the earliest backed-off ready task becomes claimable (None if none)."""
+        while self._delayed:
+            at, task_id = self._delayed[0]
+            node = self._nodes.get(task_id)
+            if node is not None and node.state == _QUEUED and node.not_before == at:
+                return at
+            heapq.heappop(self._delayed)  # stale entry
+        return None
+
+    def task_succeeded(self, task_id: str) -> None:
+        node = self._forget(task_id)
+        if node is None:
+            return
+        for child in node.children:
+            child.pending -= 1
+            if child.pending == 0 and child.state == _QUEUED:
+                self._push(child)
+
+    def task_requeued(self, task_id: str, not_before: Optional[int] = None) -> None:
+        node = self._nodes.get(task_id)
+        if node is None:
+            return
+        node.state = _QUEUED
+        node.not_before = not_before
+        if node.pending == 0:
+            self._push(node)
+
+    def task_failed(self, task_id: str) -> None:
+        # Terminal failure: the whole descendant closure can never run.
+        stack = [task_id]
+        while stack:
+            node = self._forget(stack.pop())
+            if node is not None:
+                stack.extend(c.id for c in node.children)
+
+    def _forget(self, task_id: str) -> Optional[_Node]:
+        node = self._nodes.pop(task_id, None)
+        if node is not None:
+            self._by_routing.get(node.routing, set()).discard(node)
+        return node
+
+    def _rank_of(self, node: _Node) -> float:
+        assert self._stats is not None
+        below = max((c.rank for c in node.children if c.id in self._nodes), default=0.0)
+        return self._stats.weight(node.routing) + below
+
+    def _rank_all(self) -> None:
+        # Dependents before the tasks they depend on (iterative DFS post-order).
+        done: Set[str] = set()
+        for root in self._nodes.values():
+            if root.id in done:
+                continue
+            stack = [(root, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if expanded:
+                    node.rank = self._rank_of(node)
+                    continue
+                if node.id in done:
+                    continue
+                done.add(node.id)
+                stack.append((node, True))
+                stack.extend((c, False) for c in node.children if c.id not in done)
+
+    def _push(self, node: _Node) -> None:
+        if node.not_before is not None and node.not_before > self._clock():
+            heapq.heappush(self._delayed, (node.not_before, node.id))
+            return
+        self._ready(node)
+
+    def _ready(self, node: _Node) -> None:
+        """Queue a ready node in its plan flow, (re)activating plan and repo."""
+        if self._fair_share:
+            repo_key, plan_key, weight = node.repo or "", node.plan_id or "", node.weight
+        else:
+            repo_key, plan_key, weight = "", "", 1
+        repo = self._repos.get(repo_key)
+        if repo is None:
+            repo = self._repos[repo_key] = _Flow(repo_key)
+        plan = repo.flows.get(plan_key)
+        if plan is None:
+            plan = repo.flows[plan_key] = _Flow(plan_key, weight)
+        heapq.heappush(plan.heap, (-node.rank, node.key[0], node.key[1], node.id))
+        if not plan.active:
+            plan.vtime = max(plan.vtime, repo.clock)
+            self._activate(repo.heap, plan)
+        if not repo.active:
+            repo.vtime = max(repo.vtime, self._vclock)
+            self._activate(self._repo_heap, repo)
+
+    def _activate(self, heap: list, flow: _Flow) -> None:
+        flow.active = True
+        self._seq += 1
+        heapq.heappush(heap, (flow.vtime, self._seq, flow.key))
+
+    def _release_due(self) -> None:
+        now = self._clock()
+        while self._delayed and self._delayed[0][0] <= now:
+            at, task_id = heapq.heappop(self._delayed)
+            node = self._nodes.get(task_id)
+            if node is not None and node.state == _QUEUED and node.not_before == at:
+                self._ready(node)
@@ -18,6 +18,12 @@ def validate_plan(plan: Dict[str, Any], *, max_prompt_chars: int = 20_000) -> No
     Expect (minimal):
       {"planId": str, "subtasks": [ {"id": str, "prompt": str, "routing": str, "dependsOn": [str]? } ] }
 
+    Optional on the plan (default for its subtasks) and on each subtask:
+      "timeoutSeconds" (wall clock per attempt), "idleTimeoutSeconds" (max time without output)
+
+    Optional on the plan only:
+      "priority" (integer 1..100, default 1): the plan's weight in the daemon's fair share
+
     This is intentionally minimal and permissive; you can extend later.
     """
     if not isinstance(plan, dict):
@@ -31,6 +37,13 @@ def validate_plan(plan: Dict[str, Any], *, max_prompt_chars: int = 20_000) -> No
     if not isinstance(subtasks, list) or not subtasks:
         raise ValidationError("subtasks must be a non-empty list")
 
+    for key in _TIMEOUT_KEYS:
+        _check_seconds(plan.get(key), key)
+
+    priority = plan.get("priority")
+    if priority is not None and (isinstance(priority, bool) or not isinstance(priority, int) or not 1 <= priority <= MAX_PRIORITY):
+        raise ValidationError(f"priority must be an integer from 1 to {MAX_PRIORITY}")
+
     ids: Set[str] = set()
     edges: List[Tuple[str, str]] = []
 
@@ -54,6 +67,9 @@ def validate_plan(plan: Dict[str, Any], *, max_prompt_chars: int = 20_000) -> No
         if len(prompt) > max_prompt_chars:
             raise ValidationError(f"subtasks[{i}].prompt too long: {len(prompt)} > {max_prompt_chars}")
 
+        for key in _TIMEOUT_KEYS:
+            _check_seconds(st.get(key), f"subtasks[{i}].{key}")
+
         deps = st.get("dependsOn") or []
         if not isinstance(deps, list):
             raise ValidationError(f"subtasks[{i}].dependsOn must be a list")
@@ -71,6 +87,18 @@ def validate_plan(plan: Dict[str, Any], *, max_prompt_chars: int = 20_000) -> No
     _assert_dag(ids, edges)
 
 
+_TIMEOUT_KEYS = ("timeoutSeconds", "idleTimeoutSeconds")
+
+MAX_PRIORITY = 100
+
+
+def _check_seconds(value: Any, where: str) -> None:
+    if value is None:
+        return
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0:
+        raise ValidationError(f"{where} must be a positive number of seconds")
+
+
 def _assert_dag(nodes: Set[str], edges: List[Tuple[str, str]]) -> None:
     # edges are (node -> depends_on)
     forward: Dict[str, List[str]] = {n: [] for n in nodes}
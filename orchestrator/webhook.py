@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+from . import db as dbm
+from .monitor import CiInfo, PullRequestInfo, WatchConfig, _next_check_at, check_run_state, ci_from_checks
+
+# GitHub webhook receiver: pull_request, check_run and check_suite deliveries
+# update tasks.pr_* / tasks.ci_* in place, so the polling monitor is only
+# needed for reconciliation (missed deliveries, PRs opened before the
+# listener ran).
+#
+# Per-check state is kept in ci_checks keyed by (repo, PR, check name) and
+# folded with monitor.ci_from_checks, which gives the same mapping as polling.
+# A pull_request delivery only writes tasks.ci_* when the listener has checks
+# for the PR or the head commit moved; otherwise the CI polling recorded stays.
+# Tasks are matched by worktree_branch (the PR head ref), falling back to
+# pr_number for tasks whose branch was never recorded, within the delivering
+# repo when the task's repo_slug is known.
+
+_MATCH_TASKS = (
+    "kind='subtask' AND (repo_slug IS NULL OR repo_slug=?) "
+    "AND (worktree_branch=? OR (worktree_branch IS NULL AND pr_number=?))"
+)
+
+
+def handle_event(con, event: str, payload: dict, *, watch: WatchConfig = WatchConfig()) -> int:
+    """Apply one webhook delivery; returns the number of tasks updated."""
+    if event == "pull_request":
+        return _on_pull_request(con, payload, watch)
+    if event in ("check_run", "check_suite"):
+        return _on_check(con, event, payload, watch)
+    return 0
+
+
+def verify_signature(secret: str, body: bytes, header: Optional[str]) -> bool:
+    """Check X-Hub-Signature-256 (sha256=<hex HMAC of the raw body>)."""
+    if not header or not header.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, header[len("sha256=") :])
+
+
+def _on_pull_request(con, payload: dict, watch: WatchConfig) -> int:
+    pr = payload.get("pull_request") or {}
+    repo = ((payload.get("repository") or {}).get("full_name")) or ""
+    head = pr.get("head") or {}
+    if not repo or not pr.get("number") or not head.get("ref"):
+        return 0
+
+    state = "MERGED" if pr.get("merged") else str(pr.get("state") or "").upper() or None
+    info = PullRequestInfo(number=int(pr["number"]), url=str(pr.get("html_url") or ""), state=state)
+    with dbm.tx_immediate(con):
+        new_head = payload.get("action") == "synchronize"
+        if head.get("sha"):
+            # New head commit (synchronize): checks of older commits no longer count.
+            new_head = _drop_stale_checks(con, repo, info.number, head["sha"]) > 0 or new_head
+        ci = _fold_checks(con, repo, info.number)
+        if ci is None and not new_head:
+            # This listener has seen no checks for the PR (merged, labeled, edited...):
+            # keep the CI polling recorded and only update the PR fields.
+            return _apply_pr(con, repo, head["ref"], info, watch)
+        return _apply(con, repo, head["ref"], info, ci or ci_from_checks([]), watch)
+
+
+def _on_check(con, event: str, payload: dict, watch: WatchConfig) -> int:
+    obj = payload.get(event) or {}
+    repo = ((payload.get("repository") or {}).get("full_name")) or ""
+    if event == "check_run":
+        name = str(obj.get("name") or "")
+        link = obj.get("details_url") or obj.get("html_url")
+    else:
+        # Suites have no name of their own; one per app.
+        app = obj.get("app") or {}
+        name = f"suite:{app.get('slug') or app.get('id') or obj.get('id')}"
+        link = None
+    sha = obj.get("head_sha")
+    state = check_run_state(obj.get("status"), obj.get("conclusion"))
+    if not repo or not name or not state:
+        return 0
+
+    updated = 0
+    now = dbm.now_ts()
+    with dbm.tx_immediate(con):
+        # Only PRs from the same repo are listed; fork PRs are left to polling.
+        for pr in obj.get("pull_requests") or []:
+            number = int(pr["number"])
+            head = pr.get("head") or {}
+            if sha and head.get("sha") and head["sha"] != sha:
+                continue  # late delivery for a commit that is no longer the PR head
+            if sha:
+                _drop_stale_checks(con, repo, number, sha)
+            con.execute(
+                """
+                INSERT INTO ci_checks(repo, pr_number, name, head_sha, state, link, updated_at)
+                VALUES(?,?,?,?,?,?,?)
+                ON CONFLICT(repo, pr_number, name) DO UPDATE SET
+                  head_sha=excluded.head_sha, state=excluded.state, link=excluded.link, updated_at=excluded.updated_at
+                """,
+                (repo, number, name, sha, state, link, now),
+            )
+            info = PullRequestInfo(number=number, url="", state=None)
+            ci = _fold_checks(con, repo, number) or ci_from_checks([])
+            updated += _apply(con, repo, head.get("ref"), info, ci, watch)
+    return updated
+
+
+def _drop_stale_checks(con, repo: str, number: int, sha: str) -> int:
+    cur = con.execute(
+        "DELETE FROM ci_checks WHERE repo=? AND pr_number=? AND head_sha IS NOT ?",
+        (repo, number, sha),
+    )
+    return cur.rowcount
+
+
+def _fold_checks(con, repo: str, number: int) -> Optional[CiInfo]:
+    """CI state of the PR from the checks seen so far; None if none were."""
+    rows = con.execute(
+        "SELECT name, state, link FROM ci_checks WHERE repo=? AND pr_number=? ORDER BY name",
+        (repo, number),
+    ).fetchall()
+    return ci_from_checks([dict(r) for r in rows]) if rows else None
+
+
+def _apply(con, repo: str, branch: Optional[str], pr: PullRequestInfo, ci: CiInfo, watch: WatchConfig) -> int:
+    # Polling stays on as reconciliation, on the same schedule watch mode uses.
+    # Check events carry no PR state: each task is scheduled from the one it has,
+    # so a late check on a merged PR does not resume polling.
+    rows = con.execute(
+        f"SELECT id, pr_state FROM tasks WHERE {_MATCH_TASKS}",
+        (repo, branch, pr.number),
+    ).fetchall()
+    now = dbm.now_ts()
+    for r in rows:
+        known = PullRequestInfo(number=pr.number, url=pr.url, state=pr.state or r["pr_state"])
+        next_check_at = _next_check_at(known, ci, watch, prev_pr_state=r["pr_state"])
+        con.execute(
+            """
+            UPDATE tasks
+            SET pr_number=?, pr_url=COALESCE(NULLIF(?, ''), pr_url), pr_state=COALESCE(?, pr_state),
+                ci_state=?, ci_detail=?, ci_url=?, ci_next_check_at=?, updated_at=?
+            WHERE id=?
+            """,
+            (pr.number, pr.url, pr.state, ci.state, ci.detail, ci.url, next_check_at, now, r["id"]),
+        )
+    return len(rows)
+
+
+def _apply_pr(con, repo: str, branch: Optional[str], pr: PullRequestInfo, watch: WatchConfig) -> int:
+    # Each task is rescheduled from the CI it already has (e.g. settled CI on
+    # a merged PR is never polled again).
+    rows = con.execute(
+        f"SELECT id, pr_state, ci_state, ci_detail, ci_url FROM tasks WHERE {_MATCH_TASKS}",
+        (repo, branch, pr.number),
+    ).fetchall()
+    now = dbm.now_ts()
+    for r in rows:
+        known = PullRequestInfo(number=pr.number, url=pr.url, state=pr.state or r["pr_state"])
+        ci = CiInfo(state=r["ci_state"], detail=r["ci_detail"] or "", url=r["ci_url"]) if r["ci_state"] else None
+        next_check_at = _next_check_at(known, ci, watch, prev_pr_state=r["pr_state"])
+        con.execute(
+            """
+            UPDATE tasks
+            SET pr_number=?, pr_url=COALESCE(NULLIF(?, ''), pr_url), pr_state=COALESCE(?, pr_state),
+                ci_next_check_at=?, updated_at=?
+            WHERE id=?
+            """,
+            (pr.number, pr.url, pr.state, next_check_at, now, r["id"]),
+        )
+    return len(rows)
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """HTTP listener for GitHub webhook deliveries; one DB connection per request."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        addr,
+        db_path: str,
+        *,
+        secret: Optional[str] = None,
+        watch: WatchConfig = WatchConfig(),
+        verbose: bool = False,
+    ):
+        self.db_path = db_path
+        self.secret = secret
+        self.watch = watch
+        self.verbose = verbose
+        con = dbm.connect(dbm.DbConfig(path=db_path))
+        try:
+            dbm.migrate(con)
+        finally:
+            con.close()
+        super().__init__(addr, _Handler)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: WebhookServer
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.server.secret and not verify_signature(
+            self.server.secret, body, self.headers.get("X-Hub-Signature-256")
+        ):
+            self._reply(401, {"error": "bad signature"})
+            return
+
+        event = self.headers.get("X-GitHub-Event") or ""
+        try:
+            payload = _decode_body(body, self.headers.get("Content-Type") or "")
+        except ValueError as e:
+            self._reply(400, {"error": f"invalid payload: {e}"})
+            return
+
+        con = dbm.connect(dbm.DbConfig(path=self.server.db_path))
+        try:
+            updated = handle_event(con, event, payload, watch=self.server.watch)
+        finally:
+            con.close()
+        self._reply(200, {"event": event, "updated": updated})
+
+    def _reply(self, code: int, obj: dict) -> None:
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def _decode_body(body: bytes, content_type: str) -> dict:
+    text = body.decode("utf-8")
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        # "Content type: application/x-www-form-urlencoded" webhooks: payload=<json>
+        values: List[str] = parse_qs(text).get("payload") or []
+        if not values:
+            raise ValueError("missing payload field")
+        text = values[0]
+    payload = json.loads(text) if text.strip() else {}
+    if not isinstance(payload, dict):
+        raise ValueError("expected a JSON object")
+    return payload
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", required=True)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8787)
+    ap.add_argument(
+        "--secret",
+        default=os.environ.get("GITHUB_WEBHOOK_SECRET"),
+        help="webhook secret (default: $GITHUB_WEBHOOK_SECRET); unsigned deliveries are rejected when set",
+    )
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args(argv)
+
+    srv = WebhookServer((args.host, args.port), args.db, secret=args.secret, verbose=args.verbose)
+    print(f"listening on http://{srv.server_address[0]}:{srv.server_address[1]}/", file=sys.stderr)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
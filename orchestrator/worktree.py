@@ -9,6 +9,7 @@ from pathlib import Path
 from typing import Optional
 
 from . import db as dbm
+from .monitor import parse_github_repo
 
 
 @dataclass(frozen=True)
@@ -41,7 +42,7 @@ def ensure_task_worktree(
             branch = f"orchestrator/{_sanitize_branch(task_id)}"
             _git(repo_dir, "worktree", "add", str(wt), "-B", branch)
         branch_name = _branch_name(wt)
-        _persist_worktree(con, task_id, str(wt), managed, branch_name)
+        _persist_worktree(con, task_id, str(wt), managed, branch_name, _repo_slug(repo_dir))
         return WorktreeInfo(path=str(wt), branch=branch_name, managed=managed)
 
     managed = True
@@ -51,7 +52,7 @@ def ensure_task_worktree(
         wt.parent.mkdir(parents=True, exist_ok=True)
         _git(repo_dir, "worktree", "add", str(wt), "-B", branch)
     branch_name = _branch_name(wt)
-    _persist_worktree(con, task_id, str(wt), managed, branch_name)
+    _persist_worktree(con, task_id, str(wt), managed, branch_name, _repo_slug(repo_dir))
     return WorktreeInfo(path=str(wt), branch=branch_name, managed=managed)
 
 
@@ -87,18 +88,26 @@ def cleanup_task_worktree(con, *, task_id: str) -> None:
     _clear_worktree_fields(con, task_id)
 
 
-def _persist_worktree(con, task_id: str, path: str, managed: bool, branch: Optional[str]) -> None:
+def _persist_worktree(
+    con, task_id: str, path: str, managed: bool, branch: Optional[str], repo_slug: Optional[str]
+) -> None:
+    # Branch and slug are cached for the monitor, which trusts them until the
+    # worktree is recreated or cleaned up.
     now = dbm.now_ts()
     con.execute(
-        "UPDATE tasks SET worktree_path=?, worktree_managed=?, worktree_branch=?, updated_at=? WHERE id=?",
-        (path, 1 if managed else 0, branch, now, task_id),
+        """
+        UPDATE tasks
+        SET worktree_path=?, worktree_managed=?, worktree_branch=?, repo_slug=?, ci_next_check_at=NULL, updated_at=?
+        WHERE id=?
+        """,
+        (path, 1 if managed else 0, branch, repo_slug, now, task_id),
     )
 
 
 def _clear_worktree_fields(con, task_id: str) -> None:
     now = dbm.now_ts()
     con.execute(
-        "UPDATE tasks SET worktree_path=NULL, worktree_managed=0, worktree_branch=NULL, updated_at=? WHERE id=?",
+        "UPDATE tasks SET worktree_path=NULL, worktree_managed=0, worktree_branch=NULL, repo_slug=NULL, updated_at=? WHERE id=?",
         (now, task_id),
     )
 
@@ -110,6 +119,13 @@ def _branch_name(path: Path) -> Optional[str]:
         return None
 
 
+def _repo_slug(repo_dir: Path) -> Optional[str]:
+    try:
+        return parse_github_repo(_git(repo_dir, "remote", "get-url", "origin"))
+    except Exception:
+        return None
+
+
 def _is_git_repo(path: Path) -> bool:
     try:
         _git(path, "rev-parse", "--is-inside-work-tree")
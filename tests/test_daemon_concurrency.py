@@ -0,0 +1,222 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from orchestrator import db as dbm
+from orchestrator.queue import enqueue_plan
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _wait_for_plan(con, plan_id, *, timeout=15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        row = con.execute("SELECT status FROM tasks WHERE id=?", (plan_id,)).fetchone()
+        if row["status"] in ("succeeded", "failed"):
+            return row["status"]
+        time.sleep(0.1)
+    return None
+
+
+def test_independent_subtasks_run_concurrently(tmp_path):
+    db_path = tmp_path / "orch.db"
+    con = dbm.connect(dbm.DbConfig(path=str(db_path)))
+    dbm.migrate(con)
+
+    plan = {
+        "planId": "p-par",
+        "subtasks": [{"id": f"t{i}", "prompt": f"do {i}", "routing": "triage"} for i in range(3)],
+    }
+    enqueue_plan(con, plan)
+
+    # Each runner checks in and then waits until all three are in flight at once;
+    # with a single slot the barrier never fills and every run exits 1.
+    barrier = tmp_path / "barrier"
+    barrier.mkdir()
+    runner = (
+        f"touch {barrier}/{{task_id}}; "
+        f"for i in $(seq 100); do [ $(ls {barrier} | wc -l) -ge 3 ] && exit 0; sleep 0.05; done; exit 1"
+    )
+
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "orchestrator.daemon",
+            "--db",
+            str(db_path),
+            "--logs",
+            str(tmp_path / "logs"),
+            "--poll",
+            "0.05",
+            "--concurrency",
+            "3",
+            "--runner",
+            runner,
+        ],
+        cwd=ROOT,
+    )
+    try:
+        assert _wait_for_plan(con, "p-par") == "succeeded"
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=10)
+
+    statuses = {r["id"]: r["status"] for r in con.execute("SELECT id, status FROM tasks WHERE kind='subtask'")}
+    assert statuses == {"t0": "succeeded", "t1": "succeeded", "t2": "succeeded"}
+
+
+def test_daemon_reclaims_tasks_of_a_crashed_daemon_on_start(tmp_path):
+    db_path = tmp_path / "orch.db"
+    con = dbm.connect(dbm.DbConfig(path=str(db_path)))
+    dbm.migrate(con)
+    enqueue_plan(con, {"planId": "p-crash", "subtasks": [{"id": "t0", "prompt": "x", "routing": "triage"}]})
+
+    # A daemon on this host claimed t0 with a long lease, then died.
+    dead = subprocess.Popen(["true"])
+    dead.wait()
+    con.execute(
+        "UPDATE tasks SET status='running', attempt=1, lease_owner=?, lease_expires_at=? WHERE id='t0'",
+        (f"{socket.gethostname()}:{dead.pid}:dead", dbm.now_ts() + 3600),
+    )
+
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "orchestrator.daemon",
+            "--db",
+            str(db_path),
+            "--logs",
+            str(tmp_path / "logs"),
+            "--poll",
+            "0.05",
+            "--runner",
+            "exit 0",
+        ],
+        cwd=ROOT,
+    )
+    try:
+        assert _wait_for_plan(con, "p-crash") == "succeeded"
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=10)
+
+    row = con.execute("SELECT attempt, lease_owner FROM tasks WHERE id='t0'").fetchone()
+    assert (row["attempt"], row["lease_owner"]) == (2, None)
+    msgs = [r["message"] for r in con.execute("SELECT message FROM events WHERE task_id='t0' ORDER BY id")]
+    assert any(m.startswith("retry allowed: lease expired (run lost with its owner)") for m in msgs)
+    run = con.execute("SELECT attempt, status, exit_code, log_path, duration_s FROM runs WHERE task_id='t0'").fetchone()
+    assert (run["attempt"], run["status"], run["exit_code"]) == (2, "succeeded", 0)
+    assert run["log_path"].endswith("t0.attempt2.log") and run["duration_s"] >= 0
+
+
+def test_route_cap_limits_one_route_while_others_run(tmp_path):
+    db_path = tmp_path / "orch.db"
+    con = dbm.connect(dbm.DbConfig(path=str(db_path)))
+    dbm.migrate(con)
+    subtasks = [{"id": f"t{i}", "prompt": "x", "routing": "triage"} for i in range(3)]
+    subtasks += [{"id": f"r{i}", "prompt": "x", "routing": "review"} for i in range(2)]
+    enqueue_plan(con, {"planId": "p-cap", "subtasks": subtasks})
+    limits = tmp_path / "limits.json"
+    limits.write_text('{"routes": {"triage": {"maxConcurrent": 1}}}')
+
+    # A second triage run in flight fails to take the lock and exits 1.
+    lock = tmp_path / "triage.lock"
+    runner = (
+        f"if [ {{routing}} = triage ]; then mkdir {lock} || exit 1; sleep 0.3; rmdir {lock}; "
+        f"else sleep 0.3; fi"
+    )
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "orchestrator.daemon",
+            "--db",
+            str(db_path),
+            "--logs",
+            str(tmp_path / "logs"),
+            "--poll",
+            "0.05",
+            "--concurrency",
+            "4",
+            "--limits",
+            str(limits),
+            "--runner",
+            runner,
+        ],
+        cwd=ROOT,
+    )
+    try:
+        assert _wait_for_plan(con, "p-cap") == "succeeded"
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=10)
+
+    spans = {r["task_id"]: (r["started_at"], r["finished_at"]) for r in con.execute("SELECT * FROM runs")}
+    triage = sorted(spans[f"t{i}"] for i in range(3))
+    assert all(a[1] <= b[0] for a, b in zip(triage, triage[1:]))
+    # The review runs did not queue up behind the capped route.
+    assert max(spans[f"r{i}"][0] for i in range(2)) < triage[1][0]
+
+
+def test_daemon_kills_a_run_whose_lease_was_reclaimed(tmp_path):
+    db_path = tmp_path / "orch.db"
+    con = dbm.connect(dbm.DbConfig(path=str(db_path)))
+    dbm.migrate(con)
+    enqueue_plan(con, {"planId": "p-stall", "subtasks": [{"id": "t0", "prompt": "x", "routing": "triage"}]})
+
+    # The first attempt hangs; later ones succeed.
+    marker, pidfile = tmp_path / "ran", tmp_path / "run.pid"
+    runner = f"if [ -e {marker} ]; then exit 0; fi; touch {marker}; echo $$ > {pidfile}; exec sleep 30"
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "orchestrator.daemon",
+            "--db",
+            str(db_path),
+            "--logs",
+            str(tmp_path / "logs"),
+            "--poll",
+            "0.05",
+            "--idle-poll",
+            "0.2",
+            "--lease",
+            "1.5",
+            "--runner",
+            runner,
+        ],
+        cwd=ROOT,
+    )
+    try:
+        deadline = time.time() + 10
+        while not (pidfile.exists() and pidfile.read_text().strip()) and time.time() < deadline:
+            time.sleep(0.05)
+        pid = int(pidfile.read_text())
+        # Another daemon took the task back while this one looked stalled.
+        con.execute("UPDATE tasks SET status='queued', lease_owner=NULL, lease_expires_at=NULL WHERE id='t0'")
+
+        assert _gone(pid)
+        assert _wait_for_plan(con, "p-stall") == "succeeded"
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=10)
+
+    assert con.execute("SELECT attempt FROM tasks WHERE id='t0'").fetchone()["attempt"] == 2
+
+
+def _gone(pid, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                if f.read().split(")")[-1].split()[0] == "Z":
+                    return True
+        except FileNotFoundError:
+            return True
+        time.sleep(0.05)
+    return False
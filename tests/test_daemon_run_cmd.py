@@ -0,0 +1,57 @@
+import threading
+import time
+
+from orchestrator.daemon import _run_cmd
+
+
+def test_run_cmd_streams_full_log_and_keeps_bounded_tail(tmp_path):
+    logfile = tmp_path / "t.log"
+    # ~1 MB of output on stdout, then a failure marker on stderr.
+    cmd = "python3 -c \"import sys; sys.stdout.write('x' * 1_000_000); sys.stdout.flush(); sys.stderr.write('ruff check failed')\"; exit 3"
+
+    res = _run_cmd(cmd, str(logfile), tail_bytes=1000)
+
+    assert res.returncode == 3
+    assert res.output_bytes == 1_000_000 + len("ruff check failed")
+    assert logfile.stat().st_size == res.output_bytes
+    assert len(res.output) == 1000
+    assert res.output.endswith("ruff check failed")
+
+
+def test_run_cmd_log_visible_while_running(tmp_path):
+    logfile = tmp_path / "live.log"
+    release = tmp_path / "release"
+    cmd = f"echo started; while [ ! -e {release} ]; do sleep 0.02; done; echo done"
+
+    t = threading.Thread(target=_run_cmd, args=(cmd, str(logfile)))
+    t.start()
+    try:
+        deadline = time.time() + 5
+        while time.time() < deadline and not (logfile.exists() and logfile.read_text()):
+            time.sleep(0.02)
+        assert logfile.read_text() == "started\n"
+    finally:
+        release.touch()
+        t.join(timeout=5)
+    assert logfile.read_text() == "started\ndone\n"
+
+
+def test_run_cmd_reports_child_rusage(tmp_path):
+    # Burn some CPU and touch ~50 MB in a grandchild of the shell.
+    cmd = "python3 -c \"b = bytearray(50 * 1024 * 1024); sum(range(3_000_000))\""
+
+    t0 = time.time()
+    res = _run_cmd(cmd, str(tmp_path / "t.log"))
+
+    assert res.returncode == 0
+    assert t0 <= res.finished_at <= time.time()
+    assert res.cpu_user + res.cpu_sys > 0.01
+    assert res.max_rss_kb > 50 * 1024
+
+
+def test_timed_out_run_keeps_its_rusage(tmp_path):
+    res = _run_cmd("exec python3 -c \"while True: pass\"", str(tmp_path / "t.log"), timeout=0.5)
+
+    assert res.timed_out == "timeout: exceeded 0.5s wall clock"
+    assert res.cpu_user + res.cpu_sys > 0.1
+    assert res.max_rss_kb > 0
@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from orchestrator import db as dbm
+from orchestrator.daemon import (
+    CmdResult,
+    DaemonConfig,
+    _finish_runs,
+    _Inflight,
+    _parse_route_timeout,
+    _run_cmd,
+    _timeouts_for,
+    main,
+)
+from orchestrator.queue import claim_tasks, enqueue_plan
+from orchestrator.scheduler import ReadyQueue
+
+
+def _gone(pid):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                if f.read().split(")")[-1].split()[0] == "Z":
+                    return True
+        except FileNotFoundError:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_idle_timeout_kills_the_whole_process_group(tmp_path):
+    pidfile = tmp_path / "grandchild.pid"
+    logfile = tmp_path / "t.log"
+    cmd = f"echo started; sh -c 'sleep 30 & echo $! > {pidfile}; wait'; echo never"
+
+    t0 = time.monotonic()
+    res = _run_cmd(cmd, str(logfile), idle_timeout=0.5)
+
+    assert time.monotonic() - t0 < 5
+    assert res.timed_out == "timeout: no output for 0.5s"
+    assert res.output.startswith("started\n")
+    assert "killed process group" in logfile.read_text()
+    assert "never" not in res.output
+    assert _gone(int(pidfile.read_text()))
+
+
+def test_wall_clock_timeout_applies_to_chatty_commands(tmp_path):
+    res = _run_cmd("while true; do echo tick; sleep 0.05; done", str(tmp_path / "t.log"), timeout=0.5, idle_timeout=10)
+    assert res.timed_out == "timeout: exceeded 0.5s wall clock"
+    assert res.output.count("tick") >= 3
+
+
+def test_deadlines_still_apply_after_the_child_closes_its_output(tmp_path):
+    t0 = time.monotonic()
+    res = _run_cmd("echo bye; exec >/dev/null 2>&1; sleep 8", str(tmp_path / "t.log"), timeout=5, idle_timeout=0.5)
+
+    assert time.monotonic() - t0 < 4
+    assert res.timed_out == "timeout: no output for 0.5s"
+    assert res.output.startswith("bye\n")
+
+
+def test_kill_grace_period_covers_the_whole_group(tmp_path):
+    # The shell leader exits on SIGTERM at once; its child needs a moment to
+    # clean up and must get it instead of an immediate SIGKILL.
+    done = tmp_path / "cleaned"
+    cmd = f"sh -c 'trap \"sleep 0.3; touch {done}; exit 0\" TERM; while :; do sleep 0.05; done' & wait"
+
+    res = _run_cmd(cmd, str(tmp_path / "t.log"), timeout=0.3)
+
+    assert res.timed_out == "timeout: exceeded 0.3s wall clock"
+    assert done.exists()
+
+
+@pytest.mark.parametrize("flag", ["--timeout", "--idle-timeout"])
+@pytest.mark.parametrize("value", ["0", "-5"])
+def test_cli_rejects_non_positive_timeouts(flag, value, capsys):
+    with pytest.raises(SystemExit) as e:
+        main(["--db", "x.db", "--runner-pool", flag, value])
+    assert e.value.code == 2
+    assert f"{flag} must be > 0" in capsys.readouterr().err
+
+
+def test_timeout_precedence_task_then_route_then_default():
+    cfg = DaemonConfig(
+        db_path="x",
+        timeout_seconds=100,
+        idle_timeout_seconds=10,
+        route_timeouts=(_parse_route_timeout("codex*=3600:600"), _parse_route_timeout("triage=:30")),
+    )
+    assert _timeouts_for(cfg, {"routing": "codex-backend"}) == (3600, 600)
+    assert _timeouts_for(cfg, {"routing": "triage"}) == (100, 30)
+    assert _timeouts_for(cfg, {"routing": "review"}) == (100, 10)
+    assert _timeouts_for(cfg, {"routing": "codex", "timeout_seconds": 5, "idle_timeout_seconds": None}) == (5, 600)
+
+    for bad in ("codex", "codex=", "codex=-1", "=5", "codex=a:b"):
+        with pytest.raises(ValueError):
+            _parse_route_timeout(bad)
+
+
+def test_timed_out_run_is_requeued_as_retryable_timeout(tmp_path):
+    con = dbm.connect(dbm.DbConfig(path=str(tmp_path / "orch.db")))
+    dbm.migrate(con)
+    enqueue_plan(con, {"planId": "p", "idleTimeoutSeconds": 60, "subtasks": [{"id": "t", "prompt": "x", "timeoutSeconds": 900}]})
+    (task,) = claim_tasks(con, ["t"])
+    assert (task["timeout_seconds"], task["idle_timeout_seconds"]) == (900, 60)
+
+    sched = ReadyQueue()
+    sched.rebuild(con)
+    run = _Inflight(task_id="t", attempt=1, max_attempts=3, logfile="t.log", cmd="x")
+    _finish_runs(con, sched, [(run, CmdResult(returncode=-15, output="", timed_out="timeout: no output for 60s"))])
+
+    row = con.execute("SELECT status, failure_kind, failure_detail FROM tasks WHERE id='t'").fetchone()
+    assert (row["status"], row["failure_kind"]) == ("queued", "timeout")
+    assert row["failure_detail"] == "timeout: no output for 60s; log=t.log"
@@ -14,3 +14,46 @@ def test_migrate_adds_pr_ci_and_worktree_columns(tmp_path):
     assert "ci_state" in cols
     assert "ci_detail" in cols
     assert "ci_url" in cols
+    assert "blocked_by" in cols
+    assert "repo_slug" in cols
+    assert "lease_owner" in cols
+    assert "lease_expires_at" in cols
+    assert "not_before" in cols
+    assert "priority" in cols
+    run_cols = {r["name"] for r in con.execute("PRAGMA table_info(runs)").fetchall()}
+    assert {"queued_at", "claimed_at", "started_at", "finished_at", "exit_code", "cpu_user", "max_rss_kb"} <= run_cols
+
+
+def test_migrate_v3_marks_existing_plans_dirty(tmp_path):
+    db_path = tmp_path / "orch.db"
+    con = dbm.connect(dbm.DbConfig(path=str(db_path)))
+    dbm.migrate(con)
+
+    # Roll back to a v3 layout holding one historical plan.
+    con.execute("DROP TRIGGER trg_tasks_dirty_plan_insert")
+    con.execute("DROP TRIGGER trg_tasks_dirty_plan_status")
+    con.execute("DROP TABLE dirty_plans")
+    con.execute(
+        "INSERT INTO tasks(id, kind, plan_id, status, created_at, updated_at) VALUES('p0','plan','p0','queued',0,0)"
+    )
+    con.execute("UPDATE meta SET value='3' WHERE key='schema_version'")
+
+    dbm.migrate(con)
+    dirty = [r["plan_id"] for r in con.execute("SELECT plan_id FROM dirty_plans").fetchall()]
+    assert dirty == ["p0"]
+
+
+def test_migrate_v11_expires_pre_lease_running_tasks(tmp_path):
+    db_path = tmp_path / "orch.db"
+    con = dbm.connect(dbm.DbConfig(path=str(db_path)))
+    dbm.migrate(con)
+
+    # A v10 daemon died holding a task: running, no lease.
+    con.execute(
+        "INSERT INTO tasks(id, kind, plan_id, status, created_at, updated_at) VALUES('t0','subtask','p0','running',0,0)"
+    )
+    con.execute("UPDATE meta SET value='10' WHERE key='schema_version'")
+
+    dbm.migrate(con)
+    row = con.execute("SELECT lease_owner, lease_expires_at FROM tasks WHERE id='t0'").fetchone()
+    assert (row["lease_owner"], row["lease_expires_at"]) == (None, 0)
@@ -1,4 +1,7 @@
-from orchestrator.failure import classify_failure
+import itertools
+import re
+
+from orchestrator.failure import _PATTERNS, classify_failure, classify_failure_file
 
 
 def test_classify_lint_failure():
@@ -31,6 +34,79 @@ def test_classify_landlock_as_agent():
     assert c.kind == "agent"
 
 
+def test_classify_rate_limit_only_in_provider_context():
+    assert classify_failure("stream error: 429 Too Many Requests", rc=1).kind == "rate_limit"
+    assert classify_failure("codex: error: Rate limit reached for gpt-5 (rate_limit_exceeded)", rc=1).kind == "rate_limit"
+    assert classify_failure("You've hit your usage limit. Try again later.", rc=1).kind == "rate_limit"
+
+    # Failures that merely mention rate limits keep their own kind.
+    c = classify_failure(
+        "FAILED tests/test_client.py::test_backoff - AssertionError: client did not retry after rate limit\n"
+        "===== 1 failed, 20 passed =====",
+        rc=1,
+    )
+    assert c.kind == "test"
+    c = classify_failure(
+        "src/client.ts(12,5): error TS2322: Type 'string' is not assignable to type 'number'.\n"
+        "    // handle Too Many Requests\n"
+        "compilation failed",
+        rc=2,
+    )
+    assert c.kind == "build"
+    assert classify_failure("// handle Too Many Requests; usage limit per user", rc=2).kind == "unknown"
+
+
 def test_classify_unknown():
     c = classify_failure("some random failure text", rc=3)
     assert c.kind == "unknown"
+
+
+def _reference_classify(text, rc=None):
+    # The original one-regex-per-pattern scan; the compiled table must agree with it.
+    hay = (text or "").lower()
+    if rc in (126, 127):
+        return ("agent", f"runner rc={rc}")
+    for kind, patterns in _PATTERNS:
+        for pat in patterns:
+            if re.search(pat, hay):
+                return (kind, f"matched:{pat}")
+    return ("unknown", f"runner rc={rc}" if rc is not None else "no failure signal matched")
+
+
+_SNIPPETS = [
+    "Tests: lint failed",
+    "Build step FAILED after compile",
+    "pytest collected 3 items",
+    "AssertionError: expected 1",
+    "see the CI pipeline",
+    "Codex agent timeout",
+    "decision special facility",
+    "formatting   check ok",
+    "Sandbox(LandlockRestrict) denied",
+    "couldn't write files directly",
+    "linker error in libfoo",
+    "plain progress output",
+    "élint ruff",
+]
+
+
+def test_compiled_table_matches_reference_scan():
+    for a, b in itertools.product(_SNIPPETS, repeat=2):
+        for text in (f"{a}\n{b}", f"{a} {b}"):
+            c = classify_failure(text, rc=1)
+            assert (c.kind, c.detail) == _reference_classify(text, rc=1), text
+
+
+def test_classify_failure_file_scans_whole_log(tmp_path):
+    log = tmp_path / "run.log"
+    # The lint signal sits far before any 20 KB tail; a higher-priority match
+    # in an early chunk must win over a later lower-priority one.
+    log.write_text("ruff: 3 violations\n" + "noise line\n" * 50_000 + "codex exited\n", encoding="utf-8")
+
+    c = classify_failure_file(str(log), rc=1, chunk_bytes=4096)
+    assert (c.kind, c.detail) == ("lint", r"matched:\bruff\b")
+    assert classify_failure_file(str(log), rc=1) == classify_failure(log.read_text(encoding="utf-8"), rc=1)
+
+    empty = tmp_path / "empty.log"
+    empty.write_bytes(b"")
+    assert classify_failure_file(str(empty), rc=3).kind == "unknown"
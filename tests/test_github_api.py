@@ -0,0 +1,191 @@
+import hashlib
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+from orchestrator import db as dbm
+from orchestrator import monitor
+from orchestrator.github_api import GitHubHttpBackend
+
+
+class _Stub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, routes):
+        self.routes = routes          # path -> (status, body, extra headers)
+        self.log = []                 # (path, status)
+        self.connections = 0
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+
+    @property
+    def url(self):
+        return "http://%s:%d" % self.server_address
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        assert self.headers["Authorization"] == "Bearer t0ken"
+        status, obj, extra = self.server.routes.get(path, (404, {"message": "Not Found"}, {}))
+        body = json.dumps(obj).encode()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        self.server.log.append((path, status))
+        self.send_response(status)
+        if status in (200, 304):
+            self.send_header("ETag", etag)
+        for k, v in extra.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def stub():
+    routes = {
+        "/repos/org/repo/pulls": (200, [
+            {"number": 8, "html_url": "https://github.com/org/repo/pull/8", "state": "open", "merged_at": None,
+             "head": {"ref": "orchestrator/t1", "sha": "s8"}},
+            {"number": 7, "html_url": "https://github.com/org/repo/pull/7", "state": "closed", "merged_at": "2026-01-01T00:00:00Z",
+             "head": {"ref": "orchestrator/t0", "sha": "s7"}},
+        ], {}),
+        "/repos/org/repo/commits/s7/check-runs": (200, {"check_runs": [
+            {"name": "tests", "status": "completed", "conclusion": "success", "details_url": "https://ci.example/7"},
+        ]}, {}),
+        "/repos/org/repo/commits/s7/status": (200, {"statuses": []}, {}),
+        "/repos/org/repo/commits/s8/check-runs": (200, {"check_runs": [
+            {"name": "tests", "status": "in_progress", "conclusion": None, "details_url": "https://ci.example/8"},
+        ]}, {}),
+        "/repos/org/repo/commits/s8/status": (200, {"statuses": [
+            {"context": "lint", "state": "failure", "target_url": "https://lint.example/8"},
+        ]}, {}),
+    }
+    srv = _Stub(routes)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        yield srv
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def _seed(db_path):
+    con = dbm.connect(dbm.DbConfig(path=str(db_path)))
+    dbm.migrate(con)
+    for i in range(2):
+        con.execute(
+            "INSERT INTO tasks(id, kind, plan_id, status, repo_path, worktree_path, worktree_branch, repo_slug, created_at, updated_at) "
+            "VALUES(?, 'subtask', 'p', 'succeeded', '/repo', ?, ?, 'org/repo', 0, 0)",
+            (f"t{i}", f"/repo/wt/t{i}", f"orchestrator/t{i}"),
+        )
+    return con
+
+
+def test_http_backend_sweep_reuses_connection_and_etags(tmp_path, stub, monkeypatch):
+    con = _seed(tmp_path / "orch.db")
+    backend = GitHubHttpBackend("t0ken", base_url=stub.url)
+    monkeypatch.setattr("orchestrator.monitor._BACKEND", backend)
+    monkeypatch.setattr("orchestrator.monitor._gh_json", lambda *a: pytest.fail(f"gh called: {a}"))
+
+    assert monitor.monitor_once(str(tmp_path / "orch.db")) == 2
+    rows = {r["id"]: tuple(r) for r in con.execute("SELECT id, pr_number, pr_state, ci_state, ci_detail FROM tasks")}
+    assert rows["t0"] == ("t0", 7, "MERGED", "passed", "SUCCESS")
+    assert rows["t1"] == ("t1", 8, "OPEN", "failed", "FAILURE,IN_PROGRESS")
+    assert {s for _, s in stub.log} == {200}
+
+    # Nothing changed: every request of the second sweep is a 304.
+    stub.log.clear()
+    assert monitor.monitor_once(str(tmp_path / "orch.db")) == 2
+    assert len(stub.log) == 5 and {s for _, s in stub.log} == {304}
+    assert backend.not_modified == 5
+    assert stub.connections == backend.connections_opened == 1
+
+
+def test_http_backend_rate_limit_backs_off_then_succeeds(stub, monkeypatch):
+    hits = {"n": 0}
+    ok = stub.routes["/repos/org/repo/pulls"]
+
+    def limited_once(path):
+        hits["n"] += 1
+        return (403, {"message": "API rate limit exceeded"}, {"X-RateLimit-Remaining": "0"}) if hits["n"] == 1 else ok
+
+    class Routes(dict):
+        def get(self, path, default=None):
+            return limited_once(path) if path == "/repos/org/repo/pulls" else dict.get(self, path, default)
+
+    stub.routes = Routes(stub.routes)
+    monkeypatch.setattr("orchestrator.monitor._BACKOFF", monitor._Backoff(base=0.01, cap=0.02))
+    backend = GitHubHttpBackend("t0ken", base_url=stub.url)
+
+    prs = backend.list_prs("org/repo", limit=200)
+    assert [p["number"] for p in prs] == [8, 7]
+    assert hits["n"] == 2
+
+
+def test_http_backend_falls_back_to_gh_when_unreachable(stub, monkeypatch):
+    url = stub.url
+    stub.shutdown()
+    stub.server_close()
+
+    calls = []
+
+    def fake_gh_json(*args):
+        calls.append(args[:2])
+        return [{"number": 3, "url": "u", "headRefName": "orchestrator/t0", "state": "OPEN"}]
+
+    monkeypatch.setattr("orchestrator.monitor._gh_json", fake_gh_json)
+    backend = monitor._FallbackBackend(GitHubHttpBackend("t0ken", base_url=url, timeout=2), monitor.GhCliBackend())
+    monkeypatch.setattr("orchestrator.monitor._BACKEND", backend)
+
+    assert monitor.list_prs("org/repo")["orchestrator/t0"].number == 3
+    assert calls == [("pr", "list")]
+
+
+@pytest.mark.parametrize("reply", [b"NOT HTTP\r\n", b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\n[{"])
+def test_http_backend_maps_malformed_responses_to_unavailable(reply):
+    # A bad status line or a truncated body is a transport failure too.
+    srv = socket.create_server(("127.0.0.1", 0))
+
+    def serve():
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            with conn:
+                conn.recv(65536)
+                conn.sendall(reply)
+
+    threading.Thread(target=serve, daemon=True).start()
+    try:
+        backend = GitHubHttpBackend("t0ken", base_url="http://%s:%d" % srv.getsockname(), timeout=2)
+        with pytest.raises(monitor.GitHubUnavailable):
+            backend.get_json("/repos/org/repo/pulls")
+    finally:
+        srv.close()
+
+
+def test_make_backend_selection(monkeypatch):
+    monkeypatch.delenv("GH_TOKEN", raising=False)
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    assert monitor.make_backend("auto").name == "gh"
+    with pytest.raises(ValueError):
+        monitor.make_backend("http")
+    monkeypatch.setenv("GITHUB_TOKEN", "x")
+    assert monitor.make_backend("auto").name == "http+gh"
+    assert monitor.make_backend("gh").name == "gh"
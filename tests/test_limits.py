@@ -0,0 +1,100 @@
+import pytest
+
+from orchestrator import db as dbm
+from orchestrator.limits import Limiter, parse_limits
+from orchestrator.queue import enqueue_plan
+from orchestrator.scheduler import ReadyQueue
+
+
+def test_parse_limits_validates_rules():
+    cfg = parse_limits(
+        {
+            "routes": {"Codex*": {"maxConcurrent": 2, "ratePerMinute": 6, "burst": 2}, "triage": {"maxConcurrent": 8}},
+            "repos": {"*": {"maxConcurrent": 1}},
+        }
+    )
+    assert [p for p, _ in cfg.routes] == ["codex*", "triage"]
+    assert cfg.routes[0][1].rate_per_minute == 6 and cfg.repos[0][1].max_concurrent == 1
+
+    for bad in (
+        [],
+        {"route": {}},
+        {"routes": {"codex": {"maxConcurrent": 0}}},
+        {"routes": {"codex": {"maxConcurrent": 1.5}}},
+        {"routes": {"codex": {"burst": 2}}},
+        {"routes": {"codex": {}}},
+        {"routes": {"codex": {"maxConcurrent": 1, "limit": 3}}},
+        {"repos": {" ": {"maxConcurrent": 1}}},
+    ):
+        with pytest.raises(ValueError):
+            parse_limits(bad)
+
+
+def test_limiter_caps_concurrency_per_route_rule_and_per_repo():
+    lim = Limiter(parse_limits({"routes": {"codex*": {"maxConcurrent": 2}}, "repos": {"*": {"maxConcurrent": 1}}}))
+    a = lim.gates_for("codex-backend", "org/a")
+    b = lim.gates_for("codex-frontend", "org/b")
+    c = lim.gates_for("codex-backend", "org/c")
+    assert a == ("route:codex*", "repo:org/a")
+
+    # One budget for every codex routing; one per repo.
+    for gates in (a, b):
+        assert lim.blocking(gates) is None
+        lim.acquire(gates)
+    assert lim.blocking(c) == "route:codex*"
+    assert lim.blocking(lim.gates_for("triage", "org/a")) == "repo:org/a"
+    assert lim.gates_for("triage", None) == ("repo:",)
+
+    lim.release(a)
+    assert lim.reopened() == ["route:codex*", "repo:org/a"]
+    assert lim.blocking(c) is None
+
+
+def test_limiter_token_bucket_paces_starts():
+    now = [0.0]
+    lim = Limiter(parse_limits({"routes": {"codex": {"ratePerMinute": 6, "burst": 2}}}), clock=lambda: now[0])
+    gates = lim.gates_for("codex", None)
+
+    for _ in range(2):                      # the burst
+        assert lim.blocking(gates) is None
+        lim.acquire(gates)
+        lim.release(gates)
+    assert lim.blocking(gates) == "route:codex"
+    assert lim.next_refill_at() == pytest.approx(10.0)   # 6/min = one token per 10s
+    assert lim.reopened() == []
+
+    now[0] = 10.0
+    assert lim.reopened() == ["route:codex"]
+    assert lim.next_refill_at() is None
+
+
+def test_ready_queue_parks_tasks_behind_a_saturated_gate(tmp_path):
+    con = dbm.connect(dbm.DbConfig(path=str(tmp_path / "orch.db")))
+    dbm.migrate(con)
+    enqueue_plan(
+        con,
+        {
+            "planId": "p1",
+            "repo": "org/a",
+            "subtasks": [
+                {"id": "c1", "prompt": "x", "routing": "codex"},
+                {"id": "c2", "prompt": "x", "routing": "codex"},
+                {"id": "t1", "prompt": "x", "routing": "triage"},
+            ],
+        },
+    )
+    rq = ReadyQueue()
+    rq.rebuild(con)
+    seen = []
+
+    def admit(routing, repo):
+        seen.append((routing, repo))
+        return "route:codex" if routing == "codex" else None
+
+    assert rq.pop(admit) == "t1"
+    assert seen == [("codex", "org/a"), ("codex", "org/a"), ("triage", "org/a")]
+    # Parked tasks are not looked at again until their gate reopens.
+    assert rq.pop(admit) is None
+    assert len(seen) == 3
+    rq.unpark("route:codex")
+    assert [rq.pop(), rq.pop()] == ["c1", "c2"]
@@ -0,0 +1,165 @@
+from orchestrator import db as dbm
+from orchestrator.monitor import monitor_once
+
+
+def _seed(db_path, tasks):
+    con = dbm.connect(dbm.DbConfig(path=str(db_path)))
+    dbm.migrate(con)
+    for tid, repo_path in tasks:
+        con.execute(
+            "INSERT INTO tasks(id, kind, plan_id, status, repo_path, worktree_path, created_at, updated_at) "
+            "VALUES(?, 'subtask', 'p', 'succeeded', ?, ?, 0, 0)",
+            (tid, repo_path, f"{repo_path}/.orchestrator/worktrees/{tid}"),
+        )
+    return con
+
+
+def _fake_git(cwd, *args):
+    if args[:2] == ("rev-parse", "--abbrev-ref"):
+        return "orchestrator/" + cwd.rsplit("/", 1)[1] + "\n"
+    if args[:2] == ("remote", "get-url"):
+        return "git@github.com:org/" + cwd.split("/")[1] + ".git\n"
+    raise AssertionError(args)
+
+
+def test_monitor_batches_gh_calls_per_repo(tmp_path, monkeypatch):
+    tasks = [(f"a{i}", "/repo-a") for i in range(4)] + [(f"b{i}", "/repo-b") for i in range(3)]
+    con = _seed(tmp_path / "orch.db", tasks)
+
+    calls = []
+
+    def fake_gh_json(*args):
+        calls.append(args[:2])
+        if args[:2] == ("pr", "list"):
+            repo = args[args.index("--repo") + 1]
+            prefix = repo.split("-")[1]
+            # Newest first; a1 has an older superseded PR that must be ignored.
+            return [
+                {"number": 10 + i, "url": f"https://github.com/{repo}/pull/{10 + i}", "headRefName": f"orchestrator/{prefix}{i}"}
+                for i in range(2)
+            ] + [{"number": 1, "url": "old", "headRefName": f"orchestrator/{prefix}1"}]
+        if args[:2] == ("api", "graphql"):
+            query = args[3]
+            assert "pr10:" in query and "pr11:" in query
+            run = {"__typename": "CheckRun", "name": "t", "status": "COMPLETED", "conclusion": "SUCCESS", "detailsUrl": "u"}
+            pending = {"__typename": "StatusContext", "context": "ci", "state": "PENDING", "targetUrl": "v"}
+            pr = lambda ctxs: {"commits": {"nodes": [{"commit": {"statusCheckRollup": {"contexts": {"nodes": ctxs}}}}]}}
+            return {"data": {"repository": {"pr10": pr([run]), "pr11": pr([run, pending])}}}
+        raise AssertionError(args)
+
+    monkeypatch.setattr("orchestrator.monitor._git", _fake_git)
+    monkeypatch.setattr("orchestrator.monitor._gh_json", fake_gh_json)
+
+    assert monitor_once(str(tmp_path / "orch.db")) == 4
+    assert sorted(calls) == [("api", "graphql")] * 2 + [("pr", "list")] * 2
+
+    rows = {r["id"]: (r["pr_number"], r["ci_state"]) for r in con.execute("SELECT id, pr_number, ci_state FROM tasks")}
+    assert rows["a0"] == (10, "passed")
+    assert rows["a1"] == (11, "pending")
+    assert rows["b1"] == (11, "pending")
+    assert rows["a2"] == (None, None)
+
+
+def test_monitor_isolates_failing_repo_and_backs_off_on_rate_limit(tmp_path, monkeypatch):
+    from orchestrator import monitor
+
+    tasks = [("a0", "/repo-a"), ("b0", "/repo-b")]
+    con = _seed(tmp_path / "orch.db", tasks)
+    limited = {"n": 0}
+
+    def fake_gh_json(*args):
+        if args[:2] == ("pr", "list"):
+            repo = args[args.index("--repo") + 1]
+            if repo == "org/repo-b":
+                raise RuntimeError("HTTP 404: Not Found")
+            if limited["n"] < 2:
+                limited["n"] += 1
+                raise monitor.GhRateLimited("API rate limit exceeded for installation")
+            return [{"number": 5, "url": "u", "headRefName": "orchestrator/a0"}]
+        return {"data": {"repository": {"pr5": None}}}
+
+    backoff = monitor._Backoff(base=0.01, cap=0.02)
+    monkeypatch.setattr("orchestrator.monitor._BACKOFF", backoff)
+    monkeypatch.setattr("orchestrator.monitor._git", _fake_git)
+    monkeypatch.setattr("orchestrator.monitor._gh_json", fake_gh_json)
+
+    res = monitor.monitor_sweep(str(tmp_path / "orch.db"), parallelism=2)
+
+    assert res.updated == 1
+    assert res.errors == {"org/repo-b": "HTTP 404: Not Found"}
+    assert limited["n"] == 2
+    row = con.execute("SELECT pr_number, ci_state FROM tasks WHERE id='a0'").fetchone()
+    assert (row["pr_number"], row["ci_state"]) == (5, "unknown")
+
+
+def test_monitor_caches_branch_and_slug_on_the_task(tmp_path, monkeypatch):
+    tasks = [(f"a{i}", "/repo-a") for i in range(3)]
+    con = _seed(tmp_path / "orch.db", tasks)
+    git_calls = []
+
+    def counting_git(cwd, *args):
+        git_calls.append(args[:2])
+        return _fake_git(cwd, *args)
+
+    def fake_gh_json(*args):
+        if args[:2] == ("pr", "list"):
+            return [{"number": 3, "url": "u", "headRefName": "orchestrator/a0"}]
+        return {"data": {"repository": {"pr3": None}}}
+
+    monkeypatch.setattr("orchestrator.monitor._git", counting_git)
+    monkeypatch.setattr("orchestrator.monitor._gh_json", fake_gh_json)
+
+    assert monitor_once(str(tmp_path / "orch.db")) == 1
+    # One branch lookup per task, one origin lookup for the repo.
+    assert sorted(git_calls) == [("remote", "get-url")] + [("rev-parse", "--abbrev-ref")] * 3
+    rows = con.execute("SELECT worktree_branch, repo_slug FROM tasks ORDER BY id").fetchall()
+    assert [tuple(r) for r in rows] == [(f"orchestrator/a{i}", "org/repo-a") for i in range(3)]
+
+    git_calls.clear()
+    assert monitor_once(str(tmp_path / "orch.db")) == 1
+    assert git_calls == []
+
+
+def test_monitor_looks_up_only_tasks_older_than_a_truncated_listing(tmp_path, monkeypatch):
+    con = _seed(tmp_path / "orch.db", [("old", "/repo-a"), ("new", "/repo-a")])
+    # Oldest listed PR: 2024-01-01T00:00:00Z.
+    con.execute("UPDATE tasks SET created_at=? WHERE id='old'", (1704067200 - 3600,))
+    con.execute("UPDATE tasks SET created_at=? WHERE id='new'", (1704067200 + 3600,))
+    lookups = []
+
+    def fake_gh_json(*args):
+        if args[:2] == ("pr", "list"):
+            if "--head" in args:
+                lookups.append(args[args.index("--head") + 1])
+                return []
+            return [
+                {"number": 9, "url": "u9", "headRefName": "other/9", "createdAt": "2024-02-01T00:00:00Z"},
+                {"number": 8, "url": "u8", "headRefName": "other/8", "createdAt": "2024-01-01T00:00:00Z"},
+            ]
+        raise AssertionError(args)
+
+    monkeypatch.setattr("orchestrator.monitor._PR_LIST_LIMIT", 2)
+    monkeypatch.setattr("orchestrator.monitor._git", _fake_git)
+    monkeypatch.setattr("orchestrator.monitor._gh_json", fake_gh_json)
+
+    assert monitor_once(str(tmp_path / "orch.db")) == 0
+    assert lookups == ["orchestrator/old"]
+
+
+def test_monitor_groups_tasks_by_cached_slug(tmp_path, monkeypatch):
+    # Two clones of one GitHub repo: one listing for both.
+    con = _seed(tmp_path / "orch.db", [("a0", "/repo-a"), ("c0", "/clone-a")])
+    con.execute("UPDATE tasks SET worktree_branch='orchestrator/' || id, repo_slug='org/repo-a'")
+    listings = []
+
+    def fake_gh_json(*args):
+        if args[:2] == ("pr", "list"):
+            listings.append(args[args.index("--repo") + 1])
+            return [{"number": 4, "url": "u", "headRefName": "orchestrator/c0"}]
+        return {"data": {"repository": {"pr4": None}}}
+
+    monkeypatch.setattr("orchestrator.monitor._git", _fake_git)
+    monkeypatch.setattr("orchestrator.monitor._gh_json", fake_gh_json)
+
+    assert monitor_once(str(tmp_path / "orch.db")) == 1
+    assert listings == ["org/repo-a"]
@@ -0,0 +1,70 @@
+from orchestrator import db as dbm
+from orchestrator import monitor
+from orchestrator.monitor import CiInfo, PullRequestInfo, WatchConfig, next_check_delay
+
+
+def test_next_check_delay_by_state():
+    w = WatchConfig(pending_seconds=1, unknown_seconds=2, settled_seconds=3)
+    pr_open = PullRequestInfo(number=1, url="u", state="OPEN")
+    pr_merged = PullRequestInfo(number=1, url="u", state="MERGED")
+
+    assert next_check_delay(None, None, w) == 2
+    assert next_check_delay(pr_open, CiInfo("pending", "PENDING", None), w) == 1
+    assert next_check_delay(pr_open, CiInfo("unknown", "no checks", None), w) == 2
+    assert next_check_delay(pr_open, CiInfo("passed", "SUCCESS", None), w) == 3
+    assert next_check_delay(pr_merged, CiInfo("failed", "FAILURE", None), w) is None
+    assert next_check_delay(pr_merged, CiInfo("pending", "PENDING", None), w) == 1
+    # Unsettled CI on a merged/closed PR: one final check, then never.
+    pr_closed = PullRequestInfo(number=1, url="u", state="CLOSED")
+    assert next_check_delay(pr_closed, CiInfo("unknown", "no checks", None), w, prev_pr_state="OPEN") == 2
+    assert next_check_delay(pr_closed, CiInfo("unknown", "no checks", None), w, prev_pr_state="CLOSED") is None
+    assert next_check_delay(pr_merged, CiInfo("pending", "CANCELLED", None), w, prev_pr_state="MERGED") is None
+
+
+def test_watch_only_rechecks_due_tasks(tmp_path, monkeypatch):
+    con = dbm.connect(dbm.DbConfig(path=str(tmp_path / "orch.db")))
+    dbm.migrate(con)
+    for tid in ("merged", "pending", "nopr"):
+        con.execute(
+            "INSERT INTO tasks(id, kind, plan_id, status, repo_path, worktree_path, created_at, updated_at) "
+            "VALUES(?, 'subtask', 'p', 'succeeded', '/repo', ?, 0, 0)",
+            (tid, f"/repo/wt/{tid}"),
+        )
+
+    listed = []
+
+    def fake_git(cwd, *args):
+        if args[0] == "rev-parse":
+            return cwd.rsplit("/", 1)[1]
+        return "https://github.com/org/repo.git"
+
+    def fake_gh_json(*args):
+        if args[:2] == ("pr", "list"):
+            listed.append(1)
+            return [
+                {"number": 1, "url": "u1", "headRefName": "merged", "state": "MERGED"},
+                {"number": 2, "url": "u2", "headRefName": "pending", "state": "OPEN"},
+            ]
+        ok = {"__typename": "CheckRun", "status": "COMPLETED", "conclusion": "SUCCESS"}
+        wait = {"__typename": "CheckRun", "status": "IN_PROGRESS"}
+        roll = lambda c: {"commits": {"nodes": [{"commit": {"statusCheckRollup": {"contexts": {"nodes": [c]}}}}]}}
+        return {"data": {"repository": {"pr1": roll(ok), "pr2": roll(wait)}}}
+
+    monkeypatch.setattr("orchestrator.monitor._git", fake_git)
+    monkeypatch.setattr("orchestrator.monitor._gh_json", fake_gh_json)
+
+    assert monitor.monitor_once(str(tmp_path / "orch.db")) == 2
+    due_now = {r["id"] for r in monitor._load_due_tasks(con, dbm.now_ts())}
+    assert due_now == set()
+
+    rows = {r["id"]: (r["pr_state"], r["ci_state"], r["ci_next_check_at"]) for r in con.execute("SELECT * FROM tasks")}
+    now = dbm.now_ts()
+    assert rows["merged"] == ("MERGED", "passed", monitor._NEVER)
+    assert rows["pending"][:2] == ("OPEN", "pending")
+    assert now < rows["pending"][2] <= now + WatchConfig.pending_seconds
+    assert now + WatchConfig.pending_seconds < rows["nopr"][2] <= now + WatchConfig.unknown_seconds
+
+    # Past the pending interval only the pending task is due; the merged one never is.
+    later = now + WatchConfig.pending_seconds + 1
+    assert {r["id"] for r in monitor._load_due_tasks(con, later)} == {"pending"}
+    assert {r["id"] for r in monitor._load_due_tasks(con, now + 10**9)} == {"pending", "nopr"}
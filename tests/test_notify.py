@@ -0,0 +1,53 @@
+import time
+
+from orchestrator import db as dbm
+from orchestrator.notify import Waker, notify, socket_path
+from orchestrator.queue import enqueue_plan
+
+
+def test_notify_without_daemon_is_noop(tmp_path):
+    assert notify(str(tmp_path / "orch.db")) is False
+
+
+def test_enqueue_wakes_listening_daemon(tmp_path):
+    db_path = str(tmp_path / "orch.db")
+    con = dbm.connect(dbm.DbConfig(path=db_path))
+    dbm.migrate(con)
+
+    waker = Waker(db_path)
+    try:
+        assert waker.listening
+        assert waker.wait(0.01) is None
+
+        enqueue_plan(con, {"planId": "p1", "subtasks": [{"id": "a", "prompt": "do a"}]})
+        t0 = time.monotonic()
+        assert waker.wait(5.0) == "external"
+        assert time.monotonic() - t0 < 1.0
+        # Drained: no spurious second wakeup.
+        assert waker.wait(0.01) is None
+        waker.wake()
+        assert waker.wait(0.01) == "internal"
+    finally:
+        waker.close()
+
+
+def test_stale_socket_file_is_replaced(tmp_path):
+    db_path = str(tmp_path / "orch.db")
+    first = Waker(db_path)
+    # A second daemon on the same DB must not steal a live socket.
+    second = Waker(db_path)
+    assert not second.listening
+    second.close()
+
+    # Simulate a crash: the socket file stays behind but nobody is bound to it.
+    first._sock.close()
+    first._sock = None
+    restarted = Waker(db_path)
+    try:
+        assert restarted.listening
+        assert notify(db_path) is True
+        assert restarted.wait(1.0) == "external"
+    finally:
+        restarted.close()
+        first.close()
+    assert socket_path(db_path).endswith(".wake")
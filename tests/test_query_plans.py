@@ -0,0 +1,99 @@
+import re
+
+import pytest
+
+from orchestrator import db as dbm
+from orchestrator import monitor, queue, runs, scheduler
+
+# Worklists that are meant to be scanned: they only ever hold pending work.
+_ALLOWED_SCANS = {"dirty_plans", "dp", "doomed", "dm"}
+
+
+@pytest.fixture()
+def con(tmp_path):
+    con = dbm.connect(dbm.DbConfig(path=str(tmp_path / "orch.db")))
+    dbm.migrate(con)
+    con.execute("CREATE TEMP TABLE IF NOT EXISTS doomed(task_id TEXT PRIMARY KEY, root TEXT NOT NULL)")
+    return con
+
+
+def _plan(con, sql, params=()):
+    return [r["detail"] for r in con.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+
+
+def _assert_no_table_scans(details):
+    for d in details:
+        m = re.match(r"SCAN (\w+)", d)
+        if m:
+            assert m.group(1) in _ALLOWED_SCANS, f"full scan in query plan: {d}\n" + "\n".join(details)
+
+
+def test_next_runnable_task_plan(con):
+    details = _plan(con, queue._NEXT_RUNNABLE_SQL, (0, 1))
+    _assert_no_table_scans(details)
+    assert any("idx_tasks_kind_status_created (kind=? AND status=?)" in d for d in details)
+    assert not any("TEMP B-TREE FOR ORDER BY" in d for d in details)
+
+
+def test_doomed_closure_plan(con):
+    details = _plan(con, queue._DOOMED_SQL)
+    _assert_no_table_scans(details)
+    assert any(d.startswith("SEARCH f USING INDEX idx_tasks_plan_kind_status") for d in details)
+    assert any("idx_deps_depends_on (depends_on=?)" in d for d in details)
+
+
+def test_dirty_plan_status_plan(con):
+    details = _plan(con, queue._DIRTY_PLAN_STATUS_SQL)
+    _assert_no_table_scans(details)
+    assert details[0].startswith("SCAN dp")
+    assert any("idx_tasks_plan_kind_status (plan_id=? AND kind=?)" in d for d in details)
+
+
+def test_ready_queue_rebuild_plans(con):
+    for sql in (scheduler._ACTIVE_SUBTASKS_SQL, scheduler._ACTIVE_DEPS_SQL):
+        details = _plan(con, sql)
+        _assert_no_table_scans(details)
+        assert any("idx_tasks_kind_status_created (kind=? AND status=?)" in d for d in details)
+
+
+def test_claim_revalidation_plan(con):
+    details = _plan(con, queue._CLAIMABLE_SQL, ("t", 0))
+    _assert_no_table_scans(details)
+    assert details[0].startswith("SEARCH t USING INDEX sqlite_autoindex_tasks_1 (id=?)")
+
+
+def test_expired_leases_plan(con):
+    details = _plan(con, queue._EXPIRED_LEASES_SQL, (0,))
+    _assert_no_table_scans(details)
+    assert details == ["SEARCH tasks USING INDEX idx_tasks_lease_expiry (lease_expires_at<?)"]
+
+
+def test_runs_rollup_plans(con):
+    details = _plan(con, runs._ROLLUP_SQL, ("succeeded", 0))
+    assert details == ["SEARCH runs USING COVERING INDEX idx_runs_rollup (status=?)"]
+    details = _plan(con, runs._RECENT_SQL, (0, "succeeded"))
+    assert details == ["SEARCH runs USING INTEGER PRIMARY KEY (rowid>?)"]
+
+
+def test_monitor_watch_due_plans(con):
+    details = _plan(con, monitor._DUE_TASKS_SQL, (0,))
+    _assert_no_table_scans(details)
+    assert [d for d in details if d.startswith("SEARCH")] == [
+        "SEARCH tasks USING INDEX idx_tasks_ci_next_check (ci_next_check_at<?)",
+        "SEARCH tasks USING INDEX idx_tasks_ci_next_check (ci_next_check_at=?)",
+    ]
+    assert _plan(con, monitor._NEXT_DUE_SQL) == ["SEARCH tasks USING INDEX idx_tasks_ci_next_check"]
+
+
+@pytest.mark.parametrize(
+    "sql,params,index",
+    [
+        ("SELECT status, attempt FROM tasks WHERE id=?", ("t",), "sqlite_autoindex_tasks_1"),
+        ("SELECT status FROM tasks WHERE kind='subtask' AND plan_id=?", ("p",), "idx_tasks_plan_kind_status"),
+        ("SELECT * FROM events WHERE task_id=? ORDER BY ts", ("t",), "idx_events_task_ts"),
+    ],
+)
+def test_point_lookups_use_index(con, sql, params, index):
+    details = _plan(con, sql, params)
+    _assert_no_table_scans(details)
+    assert any(index in d for d in details)
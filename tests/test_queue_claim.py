@@ -0,0 +1,167 @@
+import re
+
+from orchestrator import db as dbm
+from orchestrator.failure import classify_failure
+from orchestrator.queue import (
+    TaskResult,
+    claim_tasks,
+    complete_tasks,
+    enqueue_plan,
+    held_leases,
+    next_runnable_task,
+    reclaim_expired_leases,
+    renew_leases,
+)
+from orchestrator.retry_policy import decide_retry, retry_delay
+
+
+def _con(tmp_path):
+    con = dbm.connect(dbm.DbConfig(path=str(tmp_path / "orch.db")))
+    dbm.migrate(con)
+    enqueue_plan(
+        con,
+        {
+            "planId": "p1",
+            "subtasks": [
+                {"id": "a", "prompt": "a"},
+                {"id": "b", "prompt": "b"},
+                {"id": "c", "prompt": "c"},
+                {"id": "d", "prompt": "d", "dependsOn": ["a"]},
+            ],
+        },
+    )
+    return con
+
+
+def test_claim_tasks_takes_up_to_limit_runnable(tmp_path):
+    con = _con(tmp_path)
+
+    claimed = claim_tasks(con, limit=10)
+    assert sorted(t["id"] for t in claimed) == ["a", "b", "c"]
+    assert all(t["status"] == "running" and t["attempt"] == 1 for t in claimed)
+
+    assert claim_tasks(con, limit=10) == []
+
+
+def test_claim_tasks_revalidates_candidates(tmp_path):
+    con = _con(tmp_path)
+
+    claimed = claim_tasks(con, ["d", "a", "b", "c"], limit=2)
+    assert [t["id"] for t in claimed] == ["a", "b"]
+    rows = {r["id"]: r["status"] for r in con.execute("SELECT id, status FROM tasks WHERE kind='subtask'")}
+    assert rows == {"a": "running", "b": "running", "c": "queued", "d": "queued"}
+
+
+def test_complete_tasks_records_batch_with_retry_decisions(tmp_path):
+    con = _con(tmp_path)
+    claim_tasks(con, limit=3)
+
+    done = complete_tasks(
+        con,
+        [
+            TaskResult("a", ok=True),
+            TaskResult("b", ok=False, failure_kind="lint", failure_detail="matched:ruff"),
+            TaskResult("c", ok=False, failure_kind="unknown", failure_detail="runner rc=3"),
+        ],
+    )
+
+    assert [(c.task_id, c.status) for c in done] == [("a", "succeeded"), ("b", "queued"), ("c", "failed")]
+    rows = {r["id"]: (r["status"], r["failure_kind"]) for r in con.execute("SELECT id, status, failure_kind FROM tasks WHERE kind='subtask'")}
+    assert rows["a"] == ("succeeded", None)
+    assert rows["b"] == ("queued", "lint")
+    assert rows["c"] == ("failed", "unknown")
+    msgs = [r["message"] for r in con.execute("SELECT message FROM events WHERE task_id='b' ORDER BY id")]
+    assert msgs[-2] == "failed: lint (matched:ruff)"
+    assert re.fullmatch(r"retry allowed: fixable failure_kind=lint \(backoff \d+s\)", msgs[-1])
+
+
+def _lease(con, task_id):
+    row = con.execute("SELECT status, lease_owner, lease_expires_at FROM tasks WHERE id=?", (task_id,)).fetchone()
+    return row["status"], row["lease_owner"], row["lease_expires_at"]
+
+
+def test_leased_claims_are_renewed_and_reclaimed_when_they_lapse(tmp_path):
+    con = _con(tmp_path)
+    claimed = claim_tasks(con, ["a", "b"], limit=2, owner="w1", lease_seconds=30)
+    t0 = dbm.now_ts()
+    assert [t["lease_owner"] for t in claimed] == ["w1", "w1"]
+    assert t0 <= _lease(con, "a")[2] <= t0 + 31
+
+    # Only the owner's leases are renewed.
+    assert renew_leases(con, "w1", ["a", "b", "c"], lease_seconds=300) == 2
+    assert renew_leases(con, "w2", ["a"], lease_seconds=300) == 0
+    assert held_leases(con, "w1", [("a", 1), ("b", 2), ("c", 1)]) == {"a"}   # b is on attempt 1
+    assert _lease(con, "a")[2] >= t0 + 299
+
+    # Not expired yet: nothing to reclaim.
+    assert reclaim_expired_leases(con) == []
+
+    # w1 crashed: "a" is on its last attempt, "b" has attempts left.
+    con.execute("UPDATE tasks SET max_attempts=1 WHERE id='a'")
+    done = reclaim_expired_leases(con, now=t0 + 301)
+    assert [(c.task_id, c.status) for c in done] == [("a", "failed"), ("b", "queued")]
+    assert _lease(con, "a") == ("failed", None, None)
+    assert _lease(con, "b") == ("queued", None, None)
+    row = con.execute("SELECT failure_kind, failure_detail FROM tasks WHERE id='b'").fetchone()
+    assert (row["failure_kind"], row["failure_detail"]) == ("lease", "lease expired (owner w1)")
+
+
+def test_complete_tasks_drops_results_of_a_lost_lease(tmp_path):
+    con = _con(tmp_path)
+    claim_tasks(con, ["a", "b"], limit=2, owner="w1", lease_seconds=30)
+    reclaim_expired_leases(con, now=dbm.now_ts() + 60)      # w1 stalled past its lease
+    con.execute("UPDATE tasks SET not_before=NULL")          # backoff elapsed
+    claim_tasks(con, ["a"], owner="w2", lease_seconds=30)   # attempt 2 elsewhere
+
+    done = complete_tasks(
+        con, [TaskResult("a", ok=True, attempt=1), TaskResult("b", ok=True, attempt=1)], owner="w1"
+    )
+    assert [(c.task_id, c.status) for c in done] == [("a", "lost"), ("b", "lost")]
+    assert _lease(con, "a") == ("running", "w2", _lease(con, "a")[2])
+    assert _lease(con, "b")[0] == "queued"
+
+    done = complete_tasks(con, [TaskResult("a", ok=True, attempt=2)], owner="w2")
+    assert [(c.task_id, c.status) for c in done] == [("a", "succeeded")]
+    assert _lease(con, "a") == ("succeeded", None, None)
+
+
+def test_retry_backoff_grows_per_kind_and_is_jittered():
+    assert [retry_delay("lint", n, rng=lambda: 1.0) for n in (1, 2, 3)] == [10.0, 20.0, 40.0]
+    assert retry_delay("lint", 20, rng=lambda: 1.0) == 600.0          # capped
+    assert retry_delay("lint", 1, rng=lambda: 0.0) == 5.0               # half fixed, half jitter
+    assert retry_delay("rate_limit", 1, rng=lambda: 1.0) == 300.0
+
+    # Backoff follows the kind alone: a "429" in a task id or log path means nothing.
+    dec = decide_retry(
+        failure_kind="lint", failure_detail="matched:ruff; log=logs/fix-4290.attempt1.log", attempt=1, max_attempts=3,
+        rng=lambda: 1.0,
+    )
+    assert dec.should_retry and dec.delay_seconds == 10.0
+
+    dec = decide_retry(failure_kind="lint", failure_detail="", attempt=2, max_attempts=3, rng=lambda: 0.5)
+    assert dec.should_retry and dec.delay_seconds == 15.0
+
+    cls = classify_failure("stream error: 429 Too Many Requests; rate limit reached for codex", rc=1)
+    assert cls.kind == "rate_limit"
+    dec = decide_retry(failure_kind=cls.kind, failure_detail=cls.detail, attempt=1, max_attempts=3, rng=lambda: 0.0)
+    assert dec.should_retry and dec.delay_seconds == 150.0
+
+
+def test_retry_is_not_runnable_until_its_backoff_elapses(tmp_path):
+    con = _con(tmp_path)
+    claim_tasks(con, ["b"])
+    t0 = dbm.now_ts()
+
+    (done,) = complete_tasks(con, [TaskResult("b", ok=False, failure_kind="lint", failure_detail="matched:ruff")])
+    assert done.status == "queued" and t0 + 5 <= done.not_before <= t0 + 11
+    row = con.execute("SELECT status, not_before FROM tasks WHERE id='b'").fetchone()
+    assert (row["status"], row["not_before"]) == ("queued", done.not_before)
+
+    # Other ready work is handed out meanwhile; "b" is refused even by id.
+    assert claim_tasks(con, ["b"]) == []
+    assert [t["id"] for t in claim_tasks(con, limit=10)] == ["a", "c"]
+    assert next_runnable_task(con) is None
+
+    con.execute("UPDATE tasks SET not_before=? WHERE id='b'", (t0 - 1,))
+    (again,) = claim_tasks(con, ["b"])
+    assert (again["attempt"], again["not_before"]) == (2, None)
@@ -0,0 +1,99 @@
+from orchestrator import db as dbm
+from orchestrator.queue import enqueue_plan, refresh_blocked_and_plans
+
+
+def _con(tmp_path):
+    con = dbm.connect(dbm.DbConfig(path=str(tmp_path / "orch.db")))
+    dbm.migrate(con)
+    return con
+
+
+def _status(con, task_id):
+    return con.execute("SELECT status FROM tasks WHERE id=?", (task_id,)).fetchone()["status"]
+
+
+def test_refresh_blocks_dependents_and_fails_plan(tmp_path):
+    con = _con(tmp_path)
+    enqueue_plan(
+        con,
+        {
+            "planId": "p1",
+            "subtasks": [
+                {"id": "a", "prompt": "do a"},
+                {"id": "b", "prompt": "do b", "dependsOn": ["a"]},
+            ],
+        },
+    )
+    refresh_blocked_and_plans(con)
+    assert con.execute("SELECT COUNT(*) AS n FROM dirty_plans").fetchone()["n"] == 0
+
+    con.execute("UPDATE tasks SET status='failed' WHERE id='a'")
+    assert con.execute("SELECT plan_id FROM dirty_plans").fetchall()[0]["plan_id"] == "p1"
+
+    refresh_blocked_and_plans(con)
+    assert _status(con, "b") == "blocked"
+    assert _status(con, "p1") == "failed"
+    msgs = [r["message"] for r in con.execute("SELECT message FROM events WHERE task_id IN ('b','p1') ORDER BY id")]
+    assert msgs == ["enqueued plan", "blocked: dependency_failed (root a)", "plan status -> failed"]
+
+
+def test_refresh_blocks_whole_descendant_chain_in_one_pass(tmp_path):
+    con = _con(tmp_path)
+    # a -> b -> c -> d, plus e depending on both c and an unrelated x.
+    enqueue_plan(
+        con,
+        {
+            "planId": "chain",
+            "subtasks": [
+                {"id": "a", "prompt": "do a"},
+                {"id": "b", "prompt": "do b", "dependsOn": ["a"]},
+                {"id": "c", "prompt": "do c", "dependsOn": ["b"]},
+                {"id": "d", "prompt": "do d", "dependsOn": ["c"]},
+                {"id": "x", "prompt": "do x"},
+                {"id": "e", "prompt": "do e", "dependsOn": ["c", "x"]},
+            ],
+        },
+    )
+    refresh_blocked_and_plans(con)
+    con.execute("UPDATE tasks SET status='failed' WHERE id='a'")
+
+    refresh_blocked_and_plans(con)
+
+    rows = {
+        r["id"]: (r["status"], r["blocked_by"])
+        for r in con.execute("SELECT id, status, blocked_by FROM tasks WHERE kind='subtask'")
+    }
+    assert rows == {
+        "a": ("failed", None),
+        "b": ("blocked", "a"),
+        "c": ("blocked", "a"),
+        "d": ("blocked", "a"),
+        "e": ("blocked", "a"),
+        "x": ("queued", None),
+    }
+    assert _status(con, "chain") == "queued"
+
+    con.execute("UPDATE tasks SET status='succeeded' WHERE id='x'")
+    refresh_blocked_and_plans(con)
+    assert _status(con, "chain") == "failed"
+
+
+def test_refresh_skips_plans_without_subtask_changes(tmp_path):
+    con = _con(tmp_path)
+    enqueue_plan(con, {"planId": "old", "subtasks": [{"id": "x", "prompt": "do x"}]})
+    enqueue_plan(con, {"planId": "new", "subtasks": [{"id": "y", "prompt": "do y"}]})
+    refresh_blocked_and_plans(con)
+
+    # Edits that don't touch a subtask status leave the plan clean, so a
+    # tampered plan row is not recomputed until one of its subtasks changes.
+    con.execute("UPDATE tasks SET status='running', title='t' WHERE id='old'")
+    con.execute("UPDATE tasks SET title='renamed' WHERE id='x'")
+    con.execute("UPDATE tasks SET status='succeeded' WHERE id='y'")
+    refresh_blocked_and_plans(con)
+
+    assert _status(con, "old") == "running"
+    assert _status(con, "new") == "succeeded"
+
+    con.execute("UPDATE tasks SET status='succeeded' WHERE id='x'")
+    refresh_blocked_and_plans(con)
+    assert _status(con, "old") == "succeeded"
@@ -0,0 +1,144 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from orchestrator import db as dbm
+from orchestrator.daemon import _finish_runs, _Inflight, _result_of
+from orchestrator.queue import claim_tasks, enqueue_plan
+from orchestrator.runner_pool import RunnerPool
+from orchestrator.scheduler import ReadyQueue
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _gone(pid):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                if f.read().split(")")[-1].split()[0] == "Z":
+                    return True
+        except FileNotFoundError:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _fake_openclaw(tmp_path, monkeypatch):
+    # Reports the pid of the process that ran it, i.e. the runner. The
+    # forkserver keeps the PATH of the first test that starts it, so every
+    # test shares this one script: prompt "die" kills the worker running it,
+    # "hang:<file>" writes the agent's pid to <file> and hangs.
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    exe = bindir / "openclaw"
+    exe.write_text(
+        "#!/bin/sh\n"
+        "case \"$*\" in\n"
+        "  *die*) kill -9 $PPID; exit 0;;\n"
+        "  *hang:*) p=\"${*##*hang:}\"; echo $$ > \"${p%% *}\"; sleep 30;;\n"
+        "esac\n"
+        "echo \"runner pid $PPID\"\necho agent-stderr >&2\n"
+    )
+    exe.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_runner_pool_reuses_workers_and_logs_output(tmp_path, monkeypatch):
+    _fake_openclaw(tmp_path, monkeypatch)
+    db_path = str(tmp_path / "orch.db")
+    con = dbm.connect(dbm.DbConfig(path=db_path))
+    dbm.migrate(con)
+    enqueue_plan(con, {
+        "planId": "p",
+        "subtasks": [
+            {"id": "t0", "prompt": "a", "routing": "triage"},
+            {"id": "t1", "prompt": "b", "routing": "triage"},
+            {"id": "t2", "prompt": "c", "routing": "no-such-route"},
+        ],
+    })
+
+    pool = RunnerPool(db_path, 1)
+    try:
+        results = {tid: pool.submit(tid, str(tmp_path / f"{tid}.log")).result(timeout=30) for tid in ("t0", "t1", "t2")}
+    finally:
+        pool.shutdown()
+
+    assert [results[t].returncode for t in ("t0", "t1", "t2")] == [0, 0, 64]
+    logs = {t: (tmp_path / f"{t}.log").read_text() for t in results}
+    assert "agent-stderr" in logs["t0"]
+    assert logs["t0"].splitlines()[0] == logs["t1"].splitlines()[0]  # same long-lived worker
+    assert logs["t0"].splitlines()[0] != f"runner pid {os.getpid()}"
+    assert "unsupported routing: 'no-such-route'" in results["t2"].output
+    assert results["t2"].output_bytes == len(logs["t2"].encode())
+
+
+def test_daemon_runner_pool_mode(tmp_path, monkeypatch):
+    _fake_openclaw(tmp_path, monkeypatch)
+    db_path = tmp_path / "orch.db"
+    con = dbm.connect(dbm.DbConfig(path=str(db_path)))
+    dbm.migrate(con)
+    enqueue_plan(con, {
+        "planId": "p-pool",
+        "subtasks": [
+            {"id": "a", "prompt": "a", "routing": "triage"},
+            {"id": "b", "prompt": "b", "routing": "review", "dependsOn": ["a"]},
+        ],
+    })
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "orchestrator.daemon", "--db", str(db_path), "--logs", str(tmp_path / "logs"),
+         "--poll", "0.05", "--concurrency", "2", "--runner-pool"],
+        cwd=ROOT,
+    )
+    try:
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            if con.execute("SELECT status FROM tasks WHERE id='p-pool'").fetchone()["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.1)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=15)
+
+    statuses = {r["id"]: r["status"] for r in con.execute("SELECT id, status FROM tasks")}
+    assert statuses == {"p-pool": "succeeded", "a": "succeeded", "b": "succeeded"}
+    assert (tmp_path / "logs" / "b.attempt1.log").read_text().startswith("runner pid ")
+
+
+def test_dead_worker_requeues_its_siblings_and_kills_their_agents(tmp_path, monkeypatch):
+    _fake_openclaw(tmp_path, monkeypatch)
+    db_path = str(tmp_path / "orch.db")
+    con = dbm.connect(dbm.DbConfig(path=db_path))
+    dbm.migrate(con)
+    enqueue_plan(con, {
+        "planId": "p",
+        "subtasks": [{"id": "a", "prompt": "die", "routing": "triage"}, {"id": "b", "prompt": f"hang:{tmp_path}/agent.pid", "routing": "triage"}],
+    })
+    claim_tasks(con, ["a", "b"], limit=2)
+    runs = {tid: _Inflight(task_id=tid, attempt=1, max_attempts=3, logfile=str(tmp_path / f"{tid}.log"), cmd="") for tid in "ab"}
+
+    pool = RunnerPool(db_path, 2)
+    try:
+        fb = pool.submit("b", runs["b"].logfile)
+        deadline = time.monotonic() + 10
+        while not (tmp_path / "agent.pid").exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        agent = int((tmp_path / "agent.pid").read_text())
+        fa = pool.submit("a", runs["a"].logfile)
+        done = [(runs["a"], _result_of(fa, runs["a"])), (runs["b"], _result_of(fb, runs["b"]))]
+    finally:
+        pool.shutdown()
+
+    assert all(res.slot_lost for _, res in done)
+    assert _gone(agent)
+    sched = ReadyQueue()
+    sched.rebuild(con)
+    _finish_runs(con, sched, done)
+    rows = {r["id"]: r for r in con.execute("SELECT id, status, failure_kind FROM tasks WHERE kind='subtask'")}
+    assert {t: (r["status"], r["failure_kind"]) for t, r in rows.items()} == {
+        "a": ("queued", "runner_lost"),
+        "b": ("queued", "runner_lost"),
+    }
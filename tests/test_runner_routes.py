@@ -1,8 +1,16 @@
+import os
+import time
+
 from orchestrator.runner import (
+    _BLOCKED_SIGNALS,
+    _SignalScanner,
     _is_codex_route,
     _is_designer_route,
     _is_reviewer_route,
     _is_triage_route,
+    _run_codex,
+    _run_openclaw_agent,
+    _stream_proc,
 )
 
 
@@ -13,3 +21,125 @@ def test_route_detection():
     assert _is_reviewer_route("pr-review")
     assert _is_designer_route("gemini-design")
     assert _is_triage_route("qwen-triage")
+
+
+def test_signal_scanner_finds_signals_split_across_chunks():
+    sc = _SignalScanner(_BLOCKED_SIGNALS)
+    assert sc.feed(b"working... error: Sandbox(Landlock") is None
+    assert sc.feed(b"RESTRICT) while writing") == "Sandbox(LandlockRestrict)"
+    assert sc.feed(b"blocked by the execution sandbox") is None  # first match wins
+
+    sc = _SignalScanner(_BLOCKED_SIGNALS)
+    for b in b"x" * 100 + b"PANICKED at linux-sandbox":
+        sc.feed(bytes([b]))
+    assert sc.matched == "panicked at linux-sandbox"
+
+
+def test_codex_output_is_streamed_and_sandbox_block_maps_to_75(tmp_path, monkeypatch, capfd):
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    codex = bindir / "codex"
+    codex.write_text(
+        "#!/bin/sh\n"
+        "printf 'step 1\\n'\n"
+        "printf 'apply: blocked by the exec' >&2\n"
+        "sleep 0.05\n"
+        "printf 'ution sandbox\\n' >&2\n"
+        "exit 0\n"
+    )
+    codex.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bindir}:/usr/bin:/bin")
+
+    rc = _run_codex(task_id="t1", prompt="p", worktree_path=str(tmp_path / "wt"), repo_path=None)
+
+    assert rc == 75
+    out, err = capfd.readouterr()
+    assert out == "step 1\n"
+    assert err == "apply: blocked by the execution sandbox\nsandbox block: blocked by the execution sandbox\n"
+
+
+def test_codex_early_abort_kills_process_group(tmp_path, monkeypatch, capfd):
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    child_pid = tmp_path / "child.pid"
+    codex = bindir / "codex"
+    codex.write_text(
+        "#!/bin/sh\n"
+        f"sleep 60 & echo $! > {child_pid}\n"
+        "echo 'thread main panicked at linux-sandbox/src/landlock.rs' >&2\n"
+        "sleep 60\n"
+        "exit 0\n"
+    )
+    codex.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bindir}:/usr/bin:/bin")
+    monkeypatch.setenv("ORCH_ABORT_ON_BLOCK", "1")
+
+    t0 = time.monotonic()
+    rc = _run_codex(task_id="t1", prompt="p", worktree_path=str(tmp_path / "wt"), repo_path=None)
+
+    assert rc == 75
+    assert time.monotonic() - t0 < 10
+    assert capfd.readouterr().err.endswith("sandbox block: panicked at linux-sandbox\n")
+    pid = int(child_pid.read_text())
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and _alive(pid):
+        time.sleep(0.05)
+    assert not _alive(pid)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # A reaped-later zombie still answers kill(0); check its state.
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_agent_idle_timeout_returns_124(tmp_path, monkeypatch, capfd):
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    agent = bindir / "openclaw"
+    agent.write_text("#!/bin/sh\necho thinking\nsleep 30\n")
+    agent.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bindir}:/usr/bin:/bin")
+
+    t0 = time.monotonic()
+    rc = _run_openclaw_agent(agent="triage", prompt="p", idle_timeout=0.3)
+
+    assert rc == 124
+    assert time.monotonic() - t0 < 5
+    out, err = capfd.readouterr()
+    assert out == "thinking\n"
+    assert err == "timeout: no output for 0.3s; killed process group\n"
+
+
+def test_stream_proc_times_out_a_child_that_closed_its_output(capfd):
+    t0 = time.monotonic()
+    rc, _ = _stream_proc(["sh", "-c", "exec >/dev/null 2>&1; sleep 8"], timeout=0.5)
+
+    assert rc == 124
+    assert time.monotonic() - t0 < 5
+    assert capfd.readouterr().err == "timeout: exceeded 0.5s wall clock; killed process group\n"
+
+
+def test_stream_proc_kills_group_members_that_outlive_the_leader(tmp_path, monkeypatch):
+    monkeypatch.setattr("orchestrator.runner._ABORT_GRACE_SECONDS", 0.3)
+    pidfile = tmp_path / "member.pid"
+    member = f"trap '' TERM; echo \\$\\$ > {pidfile}; exec sleep 30"
+    cmd = ["sh", "-c", f'sh -c "{member}" >/dev/null 2>&1 & sleep 30']
+
+    rc, _ = _stream_proc(cmd, timeout=0.5)
+
+    assert rc == 124
+    pid = int(pidfile.read_text())
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            state = f.read().rsplit(b")", 1)[1].split()[0]
+    except FileNotFoundError:
+        state = b"gone"
+    assert state in (b"Z", b"gone")
@@ -0,0 +1,78 @@
+from orchestrator import db as dbm
+from orchestrator.queue import TaskResult, claim_tasks, complete_tasks, enqueue_plan, reclaim_expired_leases
+from orchestrator.runs import RunStats, duration_percentiles, recent_durations
+
+
+def _con(tmp_path):
+    con = dbm.connect(dbm.DbConfig(path=str(tmp_path / "orch.db")))
+    dbm.migrate(con)
+    enqueue_plan(
+        con,
+        {
+            "planId": "p1",
+            "subtasks": [
+                {"id": "a", "prompt": "a", "routing": "codex"},
+                {"id": "b", "prompt": "b", "routing": "triage"},
+            ],
+        },
+    )
+    return con
+
+
+def _runs(con):
+    return [dict(r) for r in con.execute("SELECT * FROM runs ORDER BY id")]
+
+
+def test_runs_row_per_attempt_opened_at_claim_and_closed_at_completion(tmp_path):
+    con = _con(tmp_path)
+    claim_tasks(con, ["a"], owner="w1")
+
+    (run,) = _runs(con)
+    assert (run["task_id"], run["attempt"], run["routing"], run["owner"], run["status"]) == ("a", 1, "codex", "w1", "running")
+    assert run["queued_at"] <= run["claimed_at"]
+
+    stats = RunStats(exit_code=3, started_at=run["claimed_at"] + 1, finished_at=run["claimed_at"] + 31,
+                     log_path="a.attempt1.log", output_bytes=123, cpu_user=2.5, cpu_sys=0.5, max_rss_kb=4096)
+    complete_tasks(con, [TaskResult("a", ok=False, failure_kind="lint", failure_detail="ruff", attempt=1, run=stats)])
+    con.execute("UPDATE tasks SET not_before=NULL")
+    claim_tasks(con, ["a"], owner="w1")
+    complete_tasks(con, [TaskResult("a", ok=True, attempt=2)])
+
+    first, second = _runs(con)
+    assert (first["status"], first["failure_kind"], first["exit_code"], first["duration_s"]) == ("failed", "lint", 3, 30)
+    assert (first["log_path"], first["output_bytes"], first["cpu_user"], first["cpu_sys"], first["max_rss_kb"]) == (
+        "a.attempt1.log", 123, 2.5, 0.5, 4096)
+    # Without measurements the row is still closed, timed from the claim.
+    assert (second["attempt"], second["status"], second["started_at"]) == (2, "succeeded", None)
+    assert second["duration_s"] >= 0 and second["finished_at"] >= second["claimed_at"]
+
+
+def test_reclaimed_lease_closes_the_run_as_lost(tmp_path):
+    con = _con(tmp_path)
+    claim_tasks(con, ["b"], owner="w1", lease_seconds=5)
+    reclaim_expired_leases(con, now=dbm.now_ts() + 10)
+
+    (run,) = _runs(con)
+    assert (run["status"], run["failure_kind"]) == ("lost", "lease")
+
+
+def test_duration_percentiles_per_routing(tmp_path):
+    con = dbm.connect(dbm.DbConfig(path=str(tmp_path / "orch.db")))
+    dbm.migrate(con)
+    rows = [(f"c{i}", "codex", "succeeded", float(i), 1000.0 + i) for i in range(1, 101)]
+    rows += [("t1", "triage", "succeeded", 5.0, 50.0), ("t2", "triage", "failed", 500.0, 2000.0)]
+    con.executemany(
+        "INSERT INTO runs(task_id, attempt, routing, status, duration_s, finished_at) VALUES(?, 1, ?, ?, ?, ?)", rows
+    )
+
+    rollups = {r.routing: r for r in duration_percentiles(con)}
+    assert rollups["codex"].count == 100
+    assert rollups["codex"].percentiles == {50: 50.0, 90: 90.0, 95: 95.0, 99: 99.0}
+    assert (rollups["triage"].count, rollups["triage"].percentiles[99]) == (1, 5.0)
+
+    # Window by finish time; failed runs are their own population.
+    assert [(r.routing, r.count) for r in duration_percentiles(con, since=1091)] == [("codex", 10)]
+    assert [(r.routing, r.percentiles[50]) for r in duration_percentiles(con, status="failed")] == [("triage", 500.0)]
+
+    # The last 3 runs, of which 2 succeeded.
+    assert recent_durations(con, limit=3) == [("codex", 100.0), ("triage", 5.0)]
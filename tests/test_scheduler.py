@@ -0,0 +1,203 @@
+from orchestrator import db as dbm
+from orchestrator.queue import enqueue_plan
+from orchestrator.scheduler import DurationStats, ReadyQueue
+
+
+def _con(tmp_path):
+    con = dbm.connect(dbm.DbConfig(path=str(tmp_path / "orch.db")))
+    dbm.migrate(con)
+    return con
+
+
+def _diamond(con, plan_id="p1"):
+    enqueue_plan(
+        con,
+        {
+            "planId": plan_id,
+            "subtasks": [
+                {"id": f"{plan_id}-a", "prompt": "a"},
+                {"id": f"{plan_id}-b", "prompt": "b", "dependsOn": [f"{plan_id}-a"]},
+                {"id": f"{plan_id}-c", "prompt": "c", "dependsOn": [f"{plan_id}-a"]},
+                {"id": f"{plan_id}-d", "prompt": "d", "dependsOn": [f"{plan_id}-b", f"{plan_id}-c"]},
+            ],
+        },
+    )
+
+
+def test_ready_queue_releases_dependents_as_deps_succeed(tmp_path):
+    con = _con(tmp_path)
+    _diamond(con)
+    rq = ReadyQueue()
+    rq.rebuild(con)
+
+    assert rq.pop() == "p1-a"
+    assert rq.pop() is None
+
+    rq.task_succeeded("p1-a")
+    assert {rq.pop(), rq.pop()} == {"p1-b", "p1-c"}
+    rq.task_succeeded("p1-b")
+    assert rq.pop() is None
+    rq.task_succeeded("p1-c")
+    assert rq.pop() == "p1-d"
+
+
+def test_ready_queue_requeue_and_terminal_failure(tmp_path):
+    con = _con(tmp_path)
+    _diamond(con)
+    rq = ReadyQueue()
+    rq.rebuild(con)
+
+    assert rq.pop() == "p1-a"
+    rq.task_requeued("p1-a")
+    assert rq.pop() == "p1-a"
+
+    rq.task_failed("p1-a")
+    assert rq.pop() is None
+    assert len(rq) == 0
+
+
+def test_ready_queue_rebuild_matches_db_state(tmp_path):
+    con = _con(tmp_path)
+    _diamond(con, "p1")
+    _diamond(con, "p2")
+    con.execute("UPDATE tasks SET status='succeeded' WHERE id IN ('p1-a','p1-b')")
+    con.execute("UPDATE tasks SET status='running' WHERE id='p1-c'")
+    con.execute("UPDATE tasks SET status='failed' WHERE id='p2-a'")
+
+    rq = ReadyQueue()
+    rq.rebuild(con)
+
+    # p1-d waits on the running p1-c; p2's chain is doomed.
+    assert rq.pop() is None
+    rq.task_succeeded("p1-c")
+    assert rq.pop() == "p1-d"
+
+
+def test_ready_queue_holds_backed_off_retries_until_due(tmp_path):
+    con = _con(tmp_path)
+    _diamond(con, "p1")
+    _diamond(con, "p2")
+    con.execute("UPDATE tasks SET not_before=1100 WHERE id='p2-a'")
+    now = [1000.0]
+    rq = ReadyQueue(clock=lambda: now[0])
+    rq.rebuild(con)
+
+    # p2-a is backing off; other ready work goes first.
+    assert rq.pop() == "p1-a"
+    assert rq.pop() is None
+    assert rq.next_due_at() == 1100
+
+    rq.task_requeued("p1-a", not_before=1050)
+    assert rq.next_due_at() == 1050
+    now[0] = 1050
+    assert rq.pop() == "p1-a"
+    assert rq.pop() is None
+    now[0] = 1100
+    assert rq.pop() == "p2-a"
+    assert rq.next_due_at() is None
+
+
+def _wide_plan(con):
+    # Three independent leaves enqueued before a three-step chain.
+    subtasks = [{"id": f"w{i}", "prompt": "w", "routing": "triage"} for i in range(3)]
+    subtasks += [
+        {"id": "x1", "prompt": "x", "routing": "triage"},
+        {"id": "x2", "prompt": "x", "routing": "triage", "dependsOn": ["x1"]},
+        {"id": "x3", "prompt": "x", "routing": "codex", "dependsOn": ["x2"]},
+    ]
+    enqueue_plan(con, {"planId": "wide", "subtasks": subtasks})
+
+
+def test_ready_queue_starts_the_critical_path_first(tmp_path):
+    con = _con(tmp_path)
+    _wide_plan(con)
+
+    fifo = ReadyQueue()
+    fifo.rebuild(con)
+    assert [fifo.pop() for _ in range(4)] == ["w0", "w1", "w2", "x1"]
+
+    rq = ReadyQueue(stats=DurationStats(default=10))
+    rq.rebuild(con)
+    assert (rq.rank("x1"), rq.rank("x2"), rq.rank("x3"), rq.rank("w0")) == (30, 20, 10, 10)
+    assert [rq.pop() for _ in range(4)] == ["x1", "w0", "w1", "w2"]
+
+
+def test_ready_queue_reranks_incrementally_from_observed_durations(tmp_path):
+    con = _con(tmp_path)
+    _wide_plan(con)
+    con.execute("UPDATE tasks SET routing='codex' WHERE id='w2'")
+    rq = ReadyQueue(stats=DurationStats(default=10))
+    rq.rebuild(con)
+
+    # codex runs turn out to take 100s: x3 and w2 get heavier, and so does
+    # everything upstream of x3.
+    rq.observe("codex", 100)
+    assert (rq.rank("x1"), rq.rank("x2"), rq.rank("x3"), rq.rank("w2"), rq.rank("w0")) == (120, 110, 100, 100, 10)
+    assert [rq.pop() for _ in range(4)] == ["x1", "w2", "w0", "w1"]
+
+    # The median over the window, not the last sample, sets the weight.
+    rq.observe("codex", 40)
+    rq.observe("codex", 500)
+    assert rq.rank("x3") == 100
+
+
+def _flat(con, plan_id, n, *, repo=None, priority=None):
+    plan = {"planId": plan_id, "subtasks": [{"id": f"{plan_id}-{i}", "prompt": "x"} for i in range(n)]}
+    if repo:
+        plan["repo"] = repo
+    if priority:
+        plan["priority"] = priority
+    enqueue_plan(con, plan)
+
+
+def test_ready_queue_shares_picks_between_plans(tmp_path):
+    con = _con(tmp_path)
+    _flat(con, "big", 300)
+    _flat(con, "hotfix", 2)
+
+    fifo = ReadyQueue(fair_share=False)
+    fifo.rebuild(con)
+    assert [fifo.pop() for _ in range(3)] == ["big-0", "big-1", "big-2"]
+
+    rq = ReadyQueue()
+    rq.rebuild(con)
+    assert [rq.pop() for _ in range(5)] == ["big-0", "hotfix-0", "big-1", "hotfix-1", "big-2"]
+
+    # A plan enqueued later waits one pick per other ready plan, not for the backlog.
+    con.execute("UPDATE tasks SET status='running' WHERE id IN ('big-0','big-1','big-2','hotfix-0','hotfix-1')")
+    _flat(con, "late", 2)
+    rq.rebuild(con)
+    assert [rq.pop() for _ in range(4)] == ["big-3", "late-0", "big-4", "late-1"]
+
+
+def test_ready_queue_weights_plans_by_priority_and_shares_repos(tmp_path):
+    con = _con(tmp_path)
+    _flat(con, "low", 20, repo="org/a")
+    _flat(con, "high", 20, repo="org/a", priority=3)
+    rq = ReadyQueue()
+    rq.rebuild(con)
+    picked = [rq.pop() for _ in range(8)]
+    assert sum(t.startswith("high") for t in picked) == 6
+
+    # Repos share equally, however many plans each one holds.
+    con = _con(tmp_path / "repos")
+    for i in range(4):
+        _flat(con, f"a{i}", 5, repo="org/a")
+    _flat(con, "b", 5, repo="org/b")
+    rq = ReadyQueue()
+    rq.rebuild(con)
+    picked = [rq.pop() for _ in range(6)]
+    assert sum(t.startswith("b-") for t in picked) == 3
+
+
+def test_ready_queue_reactivates_a_drained_plan(tmp_path):
+    con = _con(tmp_path)
+    _flat(con, "big", 10)
+    _diamond(con, "small")
+    rq = ReadyQueue()
+    rq.rebuild(con)
+
+    assert [rq.pop() for _ in range(3)] == ["big-0", "small-a", "big-1"]
+    # small has nothing ready until small-a succeeds; then it is served next.
+    rq.task_succeeded("small-a")
+    assert rq.pop() in ("small-b", "small-c")
@@ -26,3 +26,23 @@ def test_validate_plan_cycle():
                 ],
             }
         )
+
+
+@pytest.mark.parametrize("value", [0, -5, "60", True, None])
+def test_validate_plan_timeouts(value):
+    plan = {"planId": "p1", "timeoutSeconds": 3600, "subtasks": [{"id": "a", "prompt": "do a", "idleTimeoutSeconds": value}]}
+    if value is None:
+        validate_plan(plan)
+        return
+    with pytest.raises(ValidationError, match=r"subtasks\[0\]\.idleTimeoutSeconds"):
+        validate_plan(plan)
+
+
+@pytest.mark.parametrize("value", [1, 100, 0, 101, 2.5, "3", True])
+def test_validate_plan_priority(value):
+    plan = {"planId": "p1", "priority": value, "subtasks": [{"id": "a", "prompt": "do a"}]}
+    if isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= 100:
+        validate_plan(plan)
+        return
+    with pytest.raises(ValidationError, match="priority"):
+        validate_plan(plan)
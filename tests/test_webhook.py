@@ -0,0 +1,159 @@
+import hashlib
+import hmac
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from orchestrator import db as dbm
+from orchestrator.webhook import WebhookServer
+
+REPO = {"full_name": "org/repo"}
+BRANCH = "orchestrator/subtask-backend-1"
+
+
+def _pull_request(action, sha, *, state="open", merged=False):
+    return {
+        "action": action,
+        "number": 7,
+        "pull_request": {
+            "number": 7,
+            "html_url": "https://github.com/org/repo/pull/7",
+            "state": state,
+            "merged": merged,
+            "head": {"ref": BRANCH, "sha": sha},
+        },
+        "repository": REPO,
+    }
+
+
+def _check_run(name, sha, status, conclusion=None):
+    return {
+        "action": "completed" if status == "completed" else "created",
+        "check_run": {
+            "name": name,
+            "head_sha": sha,
+            "status": status,
+            "conclusion": conclusion,
+            "details_url": f"https://ci.example/{name}",
+            "pull_requests": [{"number": 7, "head": {"ref": BRANCH, "sha": sha}}],
+        },
+        "repository": REPO,
+    }
+
+
+@pytest.fixture()
+def server(tmp_path):
+    db_path = str(tmp_path / "orch.db")
+    srv = WebhookServer(("127.0.0.1", 0), db_path, secret="s3cret")
+    con = dbm.connect(dbm.DbConfig(path=db_path))
+    con.execute(
+        "INSERT INTO tasks(id, kind, plan_id, status, worktree_path, worktree_branch, created_at, updated_at) "
+        "VALUES('subtask-backend-1', 'subtask', 'p', 'succeeded', '/wt', ?, 0, 0)",
+        (BRANCH,),
+    )
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    try:
+        yield srv, con
+    finally:
+        srv.shutdown()
+        srv.server_close()
+        con.close()
+
+
+def _post(srv, event, payload, *, secret="s3cret"):
+    body = json.dumps(payload).encode()
+    headers = {"X-GitHub-Event": event, "Content-Type": "application/json"}
+    if secret:
+        headers["X-Hub-Signature-256"] = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    url = "http://%s:%d/" % srv.server_address
+    with urllib.request.urlopen(urllib.request.Request(url, data=body, headers=headers)) as resp:
+        return json.loads(resp.read())
+
+
+def _task(con):
+    return con.execute("SELECT * FROM tasks WHERE id='subtask-backend-1'").fetchone()
+
+
+def test_webhook_events_update_task(server):
+    srv, con = server
+
+    assert _post(srv, "pull_request", _pull_request("opened", "a1"))["updated"] == 1
+    t = _task(con)
+    assert (t["pr_number"], t["pr_url"], t["pr_state"]) == (7, "https://github.com/org/repo/pull/7", "OPEN")
+    assert (t["ci_state"], t["ci_detail"]) == (None, None)  # no checks seen yet: left to polling
+
+    _post(srv, "check_run", _check_run("lint", "a1", "completed", "success"))
+    _post(srv, "check_run", _check_run("tests", "a1", "in_progress"))
+    t = _task(con)
+    assert (t["ci_state"], t["ci_detail"]) == ("pending", "IN_PROGRESS,SUCCESS")
+
+    _post(srv, "check_run", _check_run("tests", "a1", "completed", "failure"))
+    t = _task(con)
+    assert (t["ci_state"], t["ci_detail"], t["ci_url"]) == ("failed", "FAILURE,SUCCESS", "https://ci.example/lint")
+
+    # A push drops the old commit's checks; a late delivery for it is ignored.
+    _post(srv, "pull_request", _pull_request("synchronize", "b2"))
+    late = _check_run("tests", "a1", "completed", "failure")
+    late["check_run"]["pull_requests"][0]["head"]["sha"] = "b2"
+    assert _post(srv, "check_run", late)["updated"] == 0
+    assert _task(con)["ci_state"] == "unknown"
+    _post(srv, "check_suite", {
+        "action": "completed",
+        "check_suite": {
+            "head_sha": "b2", "status": "completed", "conclusion": "success", "app": {"slug": "actions"},
+            "pull_requests": [{"number": 7, "head": {"ref": BRANCH, "sha": "b2"}}],
+        },
+        "repository": REPO,
+    })
+    assert _task(con)["ci_state"] == "passed"
+
+    _post(srv, "pull_request", _pull_request("closed", "b2", state="closed", merged=True))
+    t = _task(con)
+    assert (t["pr_state"], t["ci_state"]) == ("MERGED", "passed")
+    assert t["ci_next_check_at"] == 2**63 - 1
+
+
+def test_pull_request_event_keeps_polled_ci(server):
+    srv, con = server
+    con.execute(
+        "UPDATE tasks SET pr_number=7, pr_state='OPEN', ci_state='passed', ci_detail='SUCCESS', "
+        "ci_url='https://ci.example/lint' WHERE id='subtask-backend-1'"
+    )
+
+    assert _post(srv, "pull_request", _pull_request("closed", "a1", state="closed", merged=True))["updated"] == 1
+    t = _task(con)
+    assert (t["pr_state"], t["ci_state"], t["ci_detail"], t["ci_url"]) == (
+        "MERGED", "passed", "SUCCESS", "https://ci.example/lint",
+    )
+    assert t["ci_next_check_at"] == 2**63 - 1
+
+
+def test_late_check_on_merged_pr_keeps_it_unpolled(server):
+    srv, con = server
+    con.execute(
+        "UPDATE tasks SET pr_number=7, pr_state='MERGED', ci_state='passed', ci_next_check_at=? "
+        "WHERE id='subtask-backend-1'",
+        (2**63 - 1,),
+    )
+
+    assert _post(srv, "check_run", _check_run("tests", "a1", "in_progress"))["updated"] == 1
+    t = _task(con)
+    assert (t["pr_state"], t["ci_state"]) == ("MERGED", "pending")
+    assert t["ci_next_check_at"] == 2**63 - 1
+
+
+def test_webhook_rejects_bad_signature_and_ignores_other_events(server):
+    srv, con = server
+    with pytest.raises(urllib.error.HTTPError) as e:
+        _post(srv, "pull_request", _pull_request("opened", "a1"), secret="wrong")
+    assert e.value.code == 401
+    assert _task(con)["pr_number"] is None
+
+    assert _post(srv, "ping", {"zen": "hi"})["updated"] == 0
+    other = _pull_request("opened", "a1")
+    other["pull_request"]["head"]["ref"] = "feature/unrelated"
+    assert _post(srv, "pull_request", other)["updated"] == 0